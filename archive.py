@@ -0,0 +1,110 @@
+import gzip
+import json
+import os
+import time
+import zlib
+
+SEGMENT_PREFIX = "tasks-"
+SEGMENT_SUFFIX = ".ndjson.gz"
+
+
+class TaskArchive:
+    """
+    Completed tasks moved out of the live list.
+
+    Archived tasks are appended to one gzip-compressed NDJSON segment per
+    month (data/archive/tasks-2025-03.ndjson.gz). Each append adds a gzip
+    member, so earlier bytes are never rewritten, and nothing here is read
+    at startup: the live list and its snapshot only hold tasks still in use.
+
+    Records are addressed by "<segment>:<line>", which never changes because
+    segments are append-only. Restoring a task copies it back into the list
+    and adds its address to restored.txt, so browsing skips it from then on.
+    Undoing an archive marks its records restored the same way.
+    """
+
+    COMPRESS_LEVEL = 1  # Archive appends favour speed; history is read rarely
+
+    def __init__(self, directory="data/archive"):
+        self.directory = directory
+        self.restored_path = os.path.join(directory, "restored.txt")
+
+    def append(self, tasks):
+        """Appends tasks to the current month's segment. Runs on the autosave worker."""
+        if not tasks:
+            return
+        archived_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        lines = "".join(json.dumps(dict(task, archived_at=archived_at)) + "\n" for task in tasks)
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{archived_at[:7]}{SEGMENT_SUFFIX}")
+        with gzip.open(path, "at", encoding="utf-8", compresslevel=self.COMPRESS_LEVEL) as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def segments(self):
+        """Segment file names, newest month first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted((name for name in os.listdir(self.directory)
+                       if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)),
+                      reverse=True)
+
+    def iter_segment(self, name):
+        """Yields (address, task) for each record in a segment, decompressing as it goes."""
+        try:
+            with gzip.open(os.path.join(self.directory, name), "rt", encoding="utf-8") as file:
+                for number, line in enumerate(file):
+                    try:
+                        task = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line from an interrupted append
+                    yield f"{name}:{number}", task
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            return  # Truncated member at the end; everything before it was read
+
+    def iter_records(self):
+        """
+        Yields (address, task) for every archived task that hasn't been
+        restored, month by month starting with the newest. Segments are only
+        opened when the records before them have been consumed, so a browser
+        taking one page at a time reads only what it shows.
+        """
+        restored = self.restored()
+        for name in self.segments():
+            for address, task in self.iter_segment(name):
+                if address not in restored:
+                    yield address, task
+
+    def restored(self):
+        try:
+            with open(self.restored_path, encoding="utf-8") as file:
+                return {line.strip() for line in file if line.strip()}
+        except FileNotFoundError:
+            return set()
+
+    def unarchive(self, task_ids):
+        """
+        Marks the newest unrestored record of each task restored, after
+        archiving it was undone. Runs on the autosave worker, after the
+        append it undoes, which is in one of the newest segments.
+        """
+        wanted = set(task_ids)
+        restored = self.restored()
+        addresses = []
+        for name in self.segments():
+            found = [(address, task["id"]) for address, task in self.iter_segment(name)
+                     if task.get("id") in wanted and address not in restored]
+            for address, task_id in reversed(found):
+                if task_id in wanted:
+                    wanted.discard(task_id)
+                    addresses.append(address)
+            if not wanted:
+                break
+        if addresses:
+            self.mark_restored(addresses)
+
+    def mark_restored(self, addresses):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.restored_path, "a", encoding="utf-8") as file:
+            file.write("".join(address + "\n" for address in addresses))
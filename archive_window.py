@@ -0,0 +1,103 @@
+import tkinter as tk
+from itertools import islice
+
+
+class ArchiveWindow:
+    """
+    Browser for archived tasks. Records are read a page at a time from the
+    archive's lazy iterator, so opening the window costs one page no matter
+    how much history there is; "Load more" reads the next page.
+    """
+
+    PAGE_SIZE = 200
+
+    def __init__(self, parent, archive, theme_colors, on_restore_callback):
+        self.archive = archive
+        self.theme_colors = theme_colors
+        self.on_restore_callback = on_restore_callback
+        self.records = archive.iter_records()
+        self.entries = []  # (address, task) per listbox line
+        self.exhausted = False
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Archive")
+        self.window.geometry("550x500")
+        self.window.configure(bg=theme_colors["bg"])
+        self.window.transient(parent)
+
+        self._create_list()
+        self._create_buttons()
+        self.load_page()
+
+    def _create_list(self):
+        list_frame = tk.Frame(self.window, bg=self.theme_colors["bg"])
+        list_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(list_frame, selectmode=tk.EXTENDED,
+                                  yscrollcommand=scrollbar.set,
+                                  bg=self.theme_colors["entry_bg"],
+                                  fg=self.theme_colors["fg"],
+                                  selectbackground=self.theme_colors["select_bg"],
+                                  highlightthickness=0)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.configure(command=self.listbox.yview)
+
+        self.count_label = tk.Label(self.window, text="",
+                                    bg=self.theme_colors["bg"],
+                                    fg=self.theme_colors["fg"])
+        self.count_label.pack()
+
+    def _create_buttons(self):
+        button_frame = tk.Frame(self.window, bg=self.theme_colors["bg"])
+        button_frame.pack(pady=10)
+
+        self.more_button = tk.Button(button_frame, text="Load more", command=self.load_page,
+                                     bg=self.theme_colors["button_bg"],
+                                     fg=self.theme_colors["fg"],
+                                     width=12)
+        self.more_button.pack(side=tk.LEFT, padx=5)
+
+        restore_button = tk.Button(button_frame, text="Restore selected",
+                                   command=self._restore_selected,
+                                   bg=self.theme_colors["button_bg"],
+                                   fg=self.theme_colors["fg"],
+                                   width=14)
+        restore_button.pack(side=tk.LEFT, padx=5)
+
+        close_button = tk.Button(button_frame, text="Close", command=self.window.destroy,
+                                 bg=self.theme_colors["button_bg"],
+                                 fg=self.theme_colors["fg"],
+                                 width=12)
+        close_button.pack(side=tk.LEFT, padx=5)
+
+    def load_page(self):
+        page = list(islice(self.records, self.PAGE_SIZE))
+        if len(page) < self.PAGE_SIZE:
+            self.exhausted = True
+            self.more_button.configure(state=tk.DISABLED)
+        self.entries.extend(page)
+        self.listbox.insert(tk.END, *(self._describe(task) for _, task in page))
+        self._update_count()
+
+    def _describe(self, task):
+        check = "✓" if task.get("completed") else "  "
+        return f"{task.get('archived_at', '')[:10]}  {check}  {task.get('text', '')}"
+
+    def _update_count(self):
+        more = "" if self.exhausted else "+"
+        self.count_label.configure(text=f"{len(self.entries):,}{more} archived tasks")
+
+    def _restore_selected(self):
+        picked = self.listbox.curselection()
+        if not picked:
+            return
+        restored = [self.entries[index] for index in picked]
+        self.on_restore_callback([task for _, task in restored])
+        self.archive.mark_restored([address for address, _ in restored])
+        # Highest line first so the remaining indexes stay valid
+        for index in sorted(picked, reverse=True):
+            self.listbox.delete(index)
+            del self.entries[index]
+        self._update_count()
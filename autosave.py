@@ -0,0 +1,284 @@
+import functools
+import queue
+import threading
+
+from order_keys import order_of
+from task_model import Change
+
+
+def freeze_changes(changes):
+    """
+    Copies a ChangeSet so the worker thread never sees later edits to the
+    same task dictionaries.
+    """
+    frozen = []
+    for change in changes:
+        frozen.append(Change(
+            change.kind, change.index,
+            task=change.task.copy() if change.task is not None else None,
+            dest=change.dest,
+            fields=dict(change.fields) if change.fields is not None else None,
+            old=dict(change.old) if change.old is not None else None,
+        ))
+    return frozen
+
+
+def restore_unarchived(tasks, unarchived):
+    """
+    Adds tasks whose archive write failed back into a snapshot taken after
+    they were removed from the list, in order-key position.
+    """
+    present = {task["id"] for task in tasks}
+    missing = [task for task_id, task in unarchived.items() if task_id not in present]
+    unarchived.clear()
+    return sorted(tasks + missing, key=order_of) if missing else tasks
+
+
+class Autosaver:
+    """
+    Debounced background persistence for a TaskStore.
+
+    Change sets are queued as they happen and written together once the list
+    has been quiet for `delay_ms`. Writes run on a single worker thread that
+    owns the store, so the Tk event loop never waits on disk. Results come
+    back through a queue that is polled with root.after, and are reported
+    through the `on_status(text)` callback.
+
+    reload() reads the store again on the worker, after whatever it is
+    still writing. Until its result has been handled, queued changes are
+    held back, so everything written after the reload is still in
+    `pending` when the app merges the tasks from disk with its own.
+
+    After a failed write the store may have missed changes, so the next
+    save rewrites the whole list. While `is_loading()` is true, get_tasks()
+    only has the part of the list streamed in so far, and a rewrite would
+    drop the rest: the rewrite waits for loaded(), and the failed changes
+    are kept to be recorded again if the list is closed before that.
+    """
+
+    POLL_MS = 100  # How often to check the worker while a write is in flight
+
+    def __init__(self, root, store, get_tasks, on_status, delay_ms=1000, is_loading=None):
+        self.root = root
+        self.store = store
+        self.get_tasks = get_tasks
+        self.on_status = on_status
+        self.delay_ms = delay_ms
+        self.is_loading = is_loading or (lambda: False)
+
+        self.pending = []            # Frozen changes not yet handed to the worker
+        self.full_snapshot = None    # Complete task list to write instead of changes
+        self.in_flight = 0           # Jobs handed to the worker but not finished
+        self.resync = False          # A write failed; next save rewrites everything
+        self.failed = []             # Changes of writes that failed while loading
+        self.reloading = False       # A reload is in flight; writes wait for it
+        self._timer = None
+        self._poll_timer = None
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self.worker.start()
+
+    # Main thread
+
+    def enqueue(self, changes):
+        """Queues a ChangeSet and (re)starts the quiet-period timer."""
+        if self.resync and not self.is_loading():
+            self._resync()
+        elif self.full_snapshot is None:
+            self.pending.extend(freeze_changes(changes))
+        else:
+            self.full_snapshot = [task.copy() for task in self.get_tasks()]
+        self._schedule()
+
+    def loaded(self):
+        """Call once the list has streamed in completely; a rewrite held back goes out now."""
+        if self.resync:
+            self._resync()
+            self._schedule()
+
+    def _resync(self):
+        # The store may have missed earlier changes, so write the full list
+        self.full_snapshot = [task.copy() for task in self.get_tasks()]
+        self.pending = []
+        self.failed = []
+        self.resync = False
+
+    def save_all(self, tasks):
+        """Queues a full rewrite of the store, e.g. for the "Save Tasks" button."""
+        self.full_snapshot = [task.copy() for task in tasks]
+        self.pending = []  # The snapshot already contains them
+        self._schedule(delay_ms=0)
+
+    def archive(self, archive, tasks, on_failed):
+        """
+        Queues completed tasks for the archive ahead of the change set that
+        removes them, so the store never drops a task before its archive copy
+        is on disk. If the archive write fails, on_failed(tasks) is called on
+        the Tk thread to put them back, and the worker keeps their removal
+        out of the store.
+        """
+        self.jobs.put(("archive", (archive, [task.copy() for task in tasks], on_failed)))
+        self._started()
+
+    def unarchive(self, archive, tasks):
+        """Queues marking the tasks' archive records restored, after any archiving still queued."""
+        self.jobs.put(("unarchive", (archive, [task["id"] for task in tasks])))
+        self._started()
+
+    def reload(self, on_loaded):
+        """Reads the store again on the worker and calls on_loaded(tasks) on the Tk thread."""
+        self.reloading = True
+        self.jobs.put(("reload", on_loaded))
+        self._started("Reloading…")
+
+    def busy(self):
+        """True while writes are in flight or a full rewrite is queued."""
+        return bool(self.in_flight) or self.full_snapshot is not None or self.resync
+
+    def _archive_failed(self, error, tasks, on_failed):
+        print(f"Archiving failed: {error}")
+        self.on_status(f"Archive failed: {error}")
+        on_failed(tasks)
+
+    def _unarchive_failed(self, error):
+        # The tasks are back in the list anyway; the archive still lists them too
+        print(f"Updating the archive failed: {error}")
+        self.on_status(f"Archive update failed: {error}")
+
+    def _reloaded(self, error, tasks, on_loaded):
+        self.reloading = False
+        if error is not None:
+            print(f"Reloading failed: {error}")
+            self.on_status(f"Reload failed: {error}")
+        else:
+            if not self.in_flight and not self.pending and self.full_snapshot is None:
+                self.on_status("All changes saved")  # on_loaded may say more
+            on_loaded(tasks)
+        if self.pending or self.full_snapshot is not None:
+            self._schedule()  # Held back while reloading
+
+    def _schedule(self, delay_ms=None):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+        self._timer = self.root.after(self.delay_ms if delay_ms is None else delay_ms,
+                                      self._submit)
+        self.on_status("Unsaved changes")
+
+    def _submit(self):
+        self._timer = None
+        if self.reloading:
+            return  # _reloaded() schedules it again
+        if self.resync and self.is_loading():
+            return  # loaded() schedules the rewrite
+        if self.full_snapshot is not None:
+            self.jobs.put(("compact", self.full_snapshot))
+        elif self.pending:
+            self.jobs.put(("record", self.pending))
+        else:
+            return
+        self.full_snapshot = None
+        self.pending = []
+        self._started()
+
+    def _started(self, status="Saving…"):
+        self.in_flight += 1
+        self.on_status(status)
+        if self._poll_timer is None:
+            self._poll_timer = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._poll_timer = None
+        while True:
+            try:
+                error, handler = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.in_flight -= 1
+            if handler is not None:
+                handler()  # The job reports its own outcome
+            elif not self.in_flight and not self.pending and self._timer is None:
+                self.on_status("All changes saved")
+        if self.in_flight:
+            self._poll_timer = self.root.after(self.POLL_MS, self._poll)
+
+    def _write_failed(self, error, kind, changes):
+        print(f"Autosave failed: {error}")
+        self.resync = True
+        if kind == "record" and self.is_loading():
+            self.failed.extend(changes)
+        self.on_status(f"Save failed: {error}")
+
+    def flush(self):
+        """Writes everything still queued and waits for the worker; call on exit."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        if self.resync and self.is_loading():
+            # Only part of the list is here: record the changes again instead
+            self.pending = self.failed + self.pending
+            self.failed = []
+            self.resync = False
+        elif self.resync:
+            self._resync()
+        self.reloading = False  # Its result won't be handled any more
+        self._submit()
+        self.jobs.put(("close", None))
+        self.worker.join()
+
+    # Worker thread
+
+    def _run(self):
+        unarchived = {}  # Id -> task whose archive write failed; the store keeps it
+        while True:
+            kind, payload = self.jobs.get()
+            if kind == "close":
+                self.store.close()
+                return
+            if kind == "archive":
+                archive, tasks, on_failed = payload
+                try:
+                    archive.append(tasks)
+                    self.results.put((None, None))
+                except Exception as error:
+                    unarchived.update((task["id"], task) for task in tasks)
+                    # Bound now: the loop rebinds these names before the Tk thread runs it
+                    self.results.put((error, functools.partial(
+                        self._archive_failed, error, tasks, on_failed)))
+                continue
+            if kind == "unarchive":
+                archive, task_ids = payload
+                try:
+                    archive.unarchive(task_ids)
+                    self.results.put((None, None))
+                except Exception as error:
+                    self.results.put((error, functools.partial(self._unarchive_failed, error)))
+                continue
+            if kind == "reload":
+                try:
+                    tasks = self.store.reload()
+                    self.results.put((None, functools.partial(
+                        self._reloaded, None, tasks, payload)))
+                except Exception as error:
+                    self.results.put((error, functools.partial(
+                        self._reloaded, error, None, payload)))
+                continue
+            try:
+                if kind == "compact":
+                    if unarchived:
+                        payload = restore_unarchived(payload, unarchived)
+                    self.store.compact(payload)
+                else:
+                    if unarchived:
+                        payload = [change for change in payload
+                                   if change.kind != Change.REMOVE
+                                   or unarchived.pop(change.task["id"], None) is None]
+                    self.store.record(payload)
+                    if self.store.compaction_due():
+                        # Rebuild from what is already on disk, not from live UI state
+                        self.store.compact(self.store.load())
+                self.results.put((None, None))
+            except Exception as error:  # Reported on the Tk thread
+                self.results.put((error, functools.partial(
+                    self._write_failed, error, kind, payload)))
@@ -0,0 +1,404 @@
+"""
+Benchmarks for the task model, persistence and rendering paths.
+
+Generates synthetic task files (1k, 10k and 100k tasks by default) and
+times the code paths the app really runs. Results, including peak Python
+memory and live widget counts, are written as JSON so two revisions can be
+compared:
+
+    python benchmarks/bench_tasks.py --output before.json
+    python benchmarks/bench_tasks.py --output after.json --compare before.json
+
+The model and storage benchmarks never import tkinter. The rendering
+benchmarks need a display; on a headless box run them under Xvfb
+(e.g. `xvfb-run python benchmarks/bench_tasks.py`), or pass --no-gui.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive import TaskArchive  # noqa: E402
+from order_keys import ensure_keys  # noqa: E402
+from search_index import Query, SearchIndex  # noqa: E402
+import task_format  # noqa: E402
+from task import Task  # noqa: E402
+from task_model import TaskModel  # noqa: E402
+from task_store import open_task_store  # noqa: E402
+
+PRIORITIES = ("normal", "normal", "normal", "medium", "high")
+
+
+def make_tasks(count, seed=0):
+    """Synthetic tasks with mixed priorities, ~30% completed."""
+    rng = random.Random(seed)
+    tasks = [{"text": f"Task {i} " + "x" * rng.randint(5, 60),
+              "completed": rng.random() < 0.3,
+              "priority": rng.choice(PRIORITIES)} for i in range(count)]
+    ensure_keys(tasks)  # Ids and order keys, as the app stores them
+    return tasks
+
+
+def write_task_file(data_dir, tasks):
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "tasks.json"), "w") as file:
+        file.write(task_format.dumps(tasks))
+
+
+def copy_tasks(tasks):
+    return [dict(task) for task in tasks]
+
+
+def capture(tasks, mutate):
+    """Runs mutate(model) on a fresh model and returns the ChangeSet it produced."""
+    model = TaskModel(copy_tasks(tasks))
+    captured = []
+    model.subscribe(captured.append)
+    mutate(model)
+    return captured[0]
+
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, size, name, fn, setup=None, repeat=None, **extra):
+        """
+        Times fn(state) where state = setup() is rebuilt (untimed) before each
+        run, then measures peak Python memory of one more run with tracemalloc.
+        """
+        setup = setup or (lambda: None)
+        times = []
+        for _ in range(repeat or self.repeat):
+            state = setup()
+            start = time.perf_counter()
+            fn(state)
+            times.append(time.perf_counter() - start)
+
+        state = setup()
+        tracemalloc.start()
+        fn(state)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {"size": size, "name": name,
+                  "median_s": statistics.median(times), "min_s": min(times),
+                  "peak_kib": round(peak / 1024, 1)}
+        result.update(extra)
+        self.results.append(result)
+        print(f"{size:>8,}  {name:<40} {result['median_s'] * 1000:10.2f} ms"
+              f"  peak {result['peak_kib']:>10,.1f} KiB")
+        return result
+
+
+def bench_storage(bench, size, tasks, workdir):
+    data_dir = os.path.join(workdir, f"storage-{size}")
+    write_task_file(data_dir, tasks)
+
+    # JSON snapshot + journal
+    store = open_task_store("json", data_dir)
+    bench.run(size, "json.load (load_tasks)", lambda _: store.load())
+    bench.run(size, "json.stream_first_batch",
+              lambda _: next(store.iter_batches(500)))
+    bench.run(size, "json.stream_load",
+              lambda _: [None for _ in store.iter_batches(500)])
+    # Without the binary snapshot cache: parse the JSON, then write the cache
+    bench.run(size, "json.stream_first_batch (cache miss)",
+              lambda _: next(store.iter_batches(500)), setup=store.cache.clear)
+    bench.run(size, "json.stream_load (cache miss)",
+              lambda _: [None for _ in store.iter_batches(500)], setup=store.cache.clear)
+    bench.run(size, "json.compact (save_tasks)", lambda _: store.compact(tasks))
+    # A priority the task doesn't already have, so the edit isn't skipped as a no-op
+    update = capture(tasks, lambda model: model.set_priority(
+        size // 2, "medium" if model[size // 2]["priority"] == "high" else "high"))
+    bench.run(size, "json.record_one_edit", lambda _: store.record(update), repeat=50)
+    store.compact(tasks)
+    store.close()
+
+    # SQLite
+    db_store = open_task_store("sqlite", data_dir)  # Imports the JSON file
+    bench.run(size, "sqlite.load", lambda _: db_store.load())
+    bench.run(size, "sqlite.record_one_edit", lambda _: db_store.record(update), repeat=50)
+    move = capture(tasks, lambda model: model.move(0, size // 2))
+    bench.run(size, "sqlite.record_move", lambda _: db_store.record(move))
+
+    def remove_setup():
+        db_store.compact(tasks)
+        return capture(tasks, lambda model: model.remove_completed())
+    bench.run(size, "sqlite.record_remove_completed", db_store.record, setup=remove_setup)
+    db_store.close()
+
+    # Archive: remove_task's completed tasks appended on the worker, browsed a page at a time
+    archive = TaskArchive(os.path.join(data_dir, "archive"))
+    completed = [task for task in tasks if task["completed"]]
+    bench.run(size, "archive.append (remove_task)", lambda _: archive.append(completed), repeat=3)
+    bench.run(size, "archive.first_page (open browser)",
+              lambda _: list(islice(archive.iter_records(), 200)))  # ArchiveWindow.PAGE_SIZE
+
+
+def bench_model(bench, size, tasks):
+    model = TaskModel(copy_tasks(tasks))
+    bench.run(size, "model.move (on_drag_stop)",
+              lambda _: (model.move(0, size - 1), model.move(size - 1, 0)))
+    bench.run(size, "model.move_many (multi-row drag)",
+              lambda _: model.move_many(range(10, 20), size // 2))
+    bench.run(size, "model.set_priority", lambda _: model.set_priority(size // 2, "high"))
+
+    # Bulk actions on every 20th task (5,000 of 100k), each one change set
+    picked = range(0, size, 20)
+
+    def fresh():
+        return TaskModel(copy_tasks(tasks))
+    bench.run(size, "model.update_many (bulk set priority)",
+              lambda m: m.update_many(picked, priority="high"), setup=fresh)
+    bench.run(size, "model.move_many (bulk move to top)",
+              lambda m: m.move_many(picked, 0), setup=fresh)
+    bench.run(size, "model.remove_many (bulk delete)",
+              lambda m: m.remove_many(picked), setup=fresh)
+    pasted = [f"Pasted task {i}" for i in range(len(picked))]
+    bench.run(size, "model.insert_many (multi-line paste)",
+              lambda m: m.insert_many(len(m), [{"text": text, "completed": False,
+                                                "priority": "normal"} for text in pasted]),
+              setup=fresh)
+    bench.run(size, "model.remove_completed (remove_task)",
+              lambda m: m.remove_completed(), setup=lambda: TaskModel(copy_tasks(tasks)))
+
+
+def bench_search(bench, size, tasks):
+    bench.run(size, "search.build_index", SearchIndex,
+              setup=lambda: TaskModel(copy_tasks(tasks)), repeat=1)
+    model = TaskModel(copy_tasks(tasks))
+    index = SearchIndex(model)
+    for text in ("task 1234", "task 1", "priority:high is:open", "x"):
+        query = Query(text)
+        bench.run(size, f"search.query {text!r}", lambda _: index.search(query))
+    # A broad query shows its first batch of matches while the rest is scanned
+    broad = Query("t")
+    bench.run(size, "search.scan 't' (first batch)", lambda _: next(index.scan(broad, model)))
+
+    def type_query(_):
+        # One search per keystroke, each narrowing the previous result
+        previous, shown = Query(""), None
+        for end in range(1, len("task 1234") + 1):
+            query = Query("task 1234"[:end])
+            shown = index.search(query, shown if previous and query.narrows(previous) else None)
+            previous = query
+    bench.run(size, "search.type 'task 1234' (9 keystrokes)", type_query)
+    edits = iter(range(1 << 30))
+    bench.run(size, "search.index_one_edit",
+              lambda _: model.update(size // 2, text=f"edited task {next(edits)}"))
+
+
+def bench_memory(bench, size):
+    """
+    Bytes kept per task, and the time of a full GC pass over them, for
+    the plain dicts json.load returns versus the Task objects the model keeps.
+    Unlike dicts of plain values, Task objects are tracked by the GC, so
+    they are also timed after gc.freeze().
+    """
+    encoded = json.dumps(make_tasks(size))
+    layouts = (("dict", lambda records: records),
+               ("Task", lambda records: [Task.from_mapping(record) for record in records]))
+    for layout, build in layouts:
+        gc.collect()
+        tracemalloc.start()
+        tasks = build(json.loads(encoded))
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        per_task = round(retained / size, 1)
+        bench.run(size, f"memory.{layout} tasks (gc.collect)", lambda _: gc.collect(),
+                  repeat=3, bytes_per_task=per_task)
+        print(f"{size:>8,}  {'memory.' + layout + ' bytes per task':<40} {per_task:10.1f}")
+        if layout == "Task":
+            # What the app does once loading is done: later GC passes skip the tasks
+            gc.freeze()
+            bench.run(size, "memory.Task tasks frozen (gc.collect)", lambda _: gc.collect(),
+                      repeat=3)
+            gc.unfreeze()
+        del tasks
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def bench_gui(bench, size, tasks, workdir):
+    import tkinter as tk
+    from task_list_view import TaskRow
+    from todo_app import TodoApp
+
+    app_dir = os.path.join(workdir, f"app-{size}")
+    write_task_file(os.path.join(app_dir, "data"), tasks)
+    cwd = os.getcwd()
+    os.chdir(app_dir)  # TodoApp uses paths relative to the working directory
+    try:
+        root = tk.Tk()
+        root.geometry("600x800")
+
+        holder = {}
+
+        def startup(_):
+            for child in root.winfo_children():
+                child.destroy()
+            app = TodoApp(root)
+            if app.loader is not None:
+                app.loader.finish()
+            root.update()
+            holder["app"] = app
+
+        def stop_previous():
+            if "app" in holder:
+                holder["app"].autosaver.flush()
+        bench.run(size, "gui.startup (TodoApp + load_tasks)", startup,
+                  setup=stop_previous, repeat=3)
+        app = holder["app"]
+        bench.results[-1]["widgets"] = count_widgets(root)
+
+        def flush(_):
+            root.update_idletasks()
+
+        bench.run(size, "gui.refresh_task_display",
+                  lambda _: (app.refresh_task_display(), flush(None)))
+        bench.results[-1]["widgets"] = count_widgets(root)
+
+        view = app.task_list
+        created = []
+
+        def create_row(_):
+            row = TaskRow(view)
+            row.show(app.tasks[0], 0)
+            created.append(row)
+        bench.run(size, "gui.row_create (create_task_checkbox)", create_row, repeat=20)
+        for row in created:
+            row.frame.destroy()
+
+        def drag(_):
+            app.on_drag_start(None, 0)
+            y = view.viewport.winfo_rooty() + 5 * view.row_height + 1
+            app.on_drag_stop(SimpleNamespace(y_root=y))
+            flush(None)
+        bench.run(size, "gui.on_drag_stop", drag)
+
+        def drag_preview(_):
+            app.on_drag_start(None, 0)
+            top = view.viewport.winfo_rooty()
+            for step in range(50):  # Pointer sweeping down the list, marker following
+                view.drag.motion(SimpleNamespace(y_root=top + step * view.row_height // 4))
+                flush(None)
+            view.drag.cancel()
+        bench.run(size, "gui.drag_motion (50 events)", drag_preview)
+
+        bench.run(size, "gui.remove_task",
+                  lambda _: (app.remove_task(), flush(None)),
+                  setup=lambda: app.model.reset(copy_tasks(tasks)))
+
+        def toggle_theme(_):
+            settings = dict(app.settings, dark_mode=not app.settings["dark_mode"])
+            app.on_settings_applied(settings)
+            flush(None)
+        bench.run(size, "gui.on_settings_applied", toggle_theme)
+        bench.results[-1]["widgets"] = count_widgets(root)
+
+        app.autosaver.flush()
+        root.destroy()
+    finally:
+        os.chdir(cwd)
+
+
+def display_available():
+    try:
+        import tkinter as tk
+        tk.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as file:
+        baseline = {(r["size"], r["name"]): r for r in json.load(file)["results"]}
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get((result["size"], result["name"]))
+        if not before or not before["median_s"]:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{result['size']:>8,}  {result['name']:<40} x{ratio:6.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown ratio reported as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--no-gui", action="store_true", help="skip the Tk benchmarks")
+    parser.add_argument("--memory-sizes", type=int, nargs="*", default=[100000, 1000000],
+                        help="list sizes for the per-task memory benchmark (none to skip)")
+    args = parser.parse_args(argv)
+
+    gui = not args.no_gui and display_available()
+    if not args.no_gui and not gui:
+        print("No display available; skipping GUI benchmarks (use xvfb-run or --no-gui)")
+
+    bench = Bench(args.repeat)
+    workdir = tempfile.mkdtemp(prefix="2do-bench-")
+    try:
+        for size in args.sizes:
+            tasks = make_tasks(size)
+            bench_model(bench, size, tasks)
+            bench_search(bench, size, tasks)
+            bench_storage(bench, size, tasks, workdir)
+            if gui:
+                bench_gui(bench, size, tasks, workdir)
+        for size in args.memory_sizes:
+            bench_memory(bench, size)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"revision": git_revision(), "python": platform.python_version(),
+                 "platform": platform.platform(), "gui": gui,
+                 "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": bench.results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        return 1 if compare(bench.results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
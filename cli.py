@@ -0,0 +1,253 @@
+"""
+Command-line interface to the task list, for scripts and cron jobs.
+
+    python cli.py add Buy milk --priority high
+    python cli.py add Pay rent --due 2025-07-01 --remind +2d
+    python cli.py list is:open priority:high
+    python cli.py done 12 15
+    python cli.py priority medium 12
+    python cli.py rm 15
+    python cli.py import < tasks.txt
+    python cli.py export --format json > tasks.json
+    python cli.py --list Work add Send invoice
+
+main.py forwards these commands here too. Nothing in this module imports
+tkinter, so a command starts in a few tens of milliseconds. It works on the
+same data directory and storage backend as the app, takes the same file
+lock, and a running app merges the changes in as it would any other
+external edit. Each command is one change set, written to the store in a
+single write, however many tasks it touches.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from autosave import freeze_changes
+from reminders import format_when, next_reminder, parse_when
+from search_index import Query
+from task import Task, new_task
+from task_model import TaskModel
+from task_store import open_task_store
+
+PRIORITIES = ("normal", "medium", "high")
+COMMANDS = ("add", "list", "done", "priority", "rm", "import", "export")
+
+
+class CommandError(Exception):
+    """Reported on stderr with exit status 1."""
+
+
+def storage_backend(data_dir):
+    """The "storage" setting from settings.json, without loading the app's settings code."""
+    try:
+        with open(os.path.join(data_dir, "settings.json"), "r") as file:
+            return json.load(file).get("storage", "json")
+    except (OSError, json.JSONDecodeError):
+        return "json"
+
+
+def open_model(store, tasks=None):
+    """
+    A TaskModel whose every change set is written straight to the store.
+    With tasks=None nothing is read: the model starts empty with the store's
+    id and key bounds reserved, which is all appending needs.
+    """
+    if tasks is None:
+        bounds = store.bounds()
+        tasks = [] if bounds is not None else store.load()
+    else:
+        bounds = None
+    model = TaskModel()
+    model.reset(tasks, *(bounds or ()))
+    model.subscribe(lambda changes: save(store, changes))
+    return model
+
+
+def save(store, changes):
+    if changes.source != "user":
+        return
+    store.record(freeze_changes(changes))
+    if store.compaction_due():
+        store.compact(store.load())
+
+
+def find_tasks(model, ids):
+    """Model indexes of the tasks with the given ids."""
+    missing = [task_id for task_id in ids if model.get(task_id) is None]
+    if missing:
+        raise CommandError("No task with id " + ", ".join(map(str, missing)))
+    return [model.index_of(model.get(task_id)) for task_id in ids]
+
+
+def parse_tasks(text, fmt):
+    """New task dicts from imported text: one per line, or a JSON array."""
+    if fmt == "lines":
+        return [new_task(line.strip()) for line in text.splitlines() if line.strip()]
+    try:
+        records = json.loads(text)
+    except json.JSONDecodeError as error:
+        raise CommandError(f"Invalid JSON on stdin: {error}")
+    if not isinstance(records, list):
+        raise CommandError("Expected a JSON array of tasks")
+    now = int(time.time())
+    tasks = []
+    for record in records:
+        if isinstance(record, str):
+            record = {"text": record}
+        # Ids and keys are handed out again, as for tasks restored from the archive;
+        # a creation time is kept, and records without one are created now
+        task = {key: value for key, value in record.items() if key not in ("id", "order")}
+        task.setdefault("created", now)
+        task.setdefault("completed", False)
+        if not isinstance(task.get("priority"), str):
+            task["priority"] = "normal"  # Missing or null
+        tasks.append(task)
+    return tasks
+
+
+def format_task(task):
+    check = "x" if task["completed"] else " "
+    line = f"{task['id']:>6} [{check}] {str(task.get('priority', 'normal')):<6} {task['text']}"
+    if task.get("due") is not None:
+        line += f"  (due {format_when(task['due'])})"
+    return line
+
+
+def note_reminder(args, tasks):
+    """Tells the app about new reminders, in case their list isn't open (see ListManifest)."""
+    when = next_reminder(tasks)
+    if when is None:
+        return
+    from task_lists import DEFAULT_LIST, ListManifest
+    manifest = ListManifest(args.data_dir)
+    manifest.note_reminder(DEFAULT_LIST if args.list is None else manifest.find(args.list), when)
+    manifest.save()
+
+
+# Commands
+
+def cmd_add(store, args):
+    task = new_task(" ".join(args.text), args.priority)
+    for field, text in (("due", args.due), ("remind_at", args.remind)):
+        if text is not None:
+            task[field] = parse_when(text)
+    model = open_model(store)
+    model.add(task)
+    note_reminder(args, [task])
+    print(model[-1]["id"])
+
+
+def cmd_import(store, args):
+    tasks = parse_tasks(sys.stdin.read(), args.format)
+    model = open_model(store)
+    model.insert_many(len(model), tasks)  # One change set, one write
+    note_reminder(args, tasks)
+    print(f"Imported {len(tasks):,} tasks")
+
+
+def cmd_list(store, args):
+    query = Query(" ".join(args.query))
+    tasks = store.load()
+    if query:
+        tasks = filter(query.matches, tasks)
+    sys.stdout.writelines(format_task(task) + "\n" for task in tasks)
+
+
+def cmd_export(store, args):
+    tasks = store.load()
+    if args.format == "lines":
+        sys.stdout.writelines(task["text"] + "\n" for task in tasks)
+    else:
+        # One task per line; indent= would switch json to its slow pure-Python encoder
+        sys.stdout.write("[\n" + ",\n".join(json.dumps(task, default=Task.copy)
+                                            for task in tasks) + "\n]\n")
+
+
+def cmd_done(store, args):
+    model = open_model(store, store.load())
+    count = model.update_many(find_tasks(model, args.ids), completed=not args.undo)
+    print(f"Updated {count:,} tasks")
+
+
+def cmd_priority(store, args):
+    model = open_model(store, store.load())
+    count = model.update_many(find_tasks(model, args.ids), priority=args.level)
+    print(f"Updated {count:,} tasks")
+
+
+def cmd_rm(store, args):
+    model = open_model(store, store.load())
+    count = model.remove_many(find_tasks(model, args.ids))
+    print(f"Removed {count:,} tasks")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="2do", description="2do task list from the command line")
+    parser.add_argument("--data-dir", default="data", help="directory holding the task files")
+    parser.add_argument("--list", help="name of the list to work on (default: the first list)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add a task")
+    add.add_argument("text", nargs="+")
+    add.add_argument("--priority", choices=PRIORITIES, default="normal")
+    add.add_argument("--due", help="YYYY-MM-DD [HH:MM], or from now: +30m, +2h, +1d, +1w")
+    add.add_argument("--remind", help="when to show a reminder, in the same format")
+    add.set_defaults(run=cmd_add)
+
+    listing = commands.add_parser("list", help="print tasks, optionally filtered")
+    listing.add_argument("query", nargs="*",
+                         help="words to match, plus priority:<level> and is:done / is:open")
+    listing.set_defaults(run=cmd_list)
+
+    done = commands.add_parser("done", help="mark tasks as completed")
+    done.add_argument("ids", nargs="+", type=int)
+    done.add_argument("--undo", action="store_true", help="mark them as not completed")
+    done.set_defaults(run=cmd_done)
+
+    priority = commands.add_parser("priority", help="set the priority of tasks")
+    priority.add_argument("level", choices=PRIORITIES)
+    priority.add_argument("ids", nargs="+", type=int)
+    priority.set_defaults(run=cmd_priority)
+
+    rm = commands.add_parser("rm", help="delete tasks")
+    rm.add_argument("ids", nargs="+", type=int)
+    rm.set_defaults(run=cmd_rm)
+
+    importing = commands.add_parser("import", help="add tasks read from stdin")
+    importing.add_argument("--format", choices=("lines", "json"), default="lines",
+                           help="one task per line, or a JSON array of tasks (as exported)")
+    importing.set_defaults(run=cmd_import)
+
+    export = commands.add_parser("export", help="write every task to stdout")
+    export.add_argument("--format", choices=("json", "lines"), default="json")
+    export.set_defaults(run=cmd_export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    list_dir = args.data_dir
+    if args.list is not None:
+        from task_lists import ListManifest  # Only needed to look the list up
+        manifest = ListManifest(args.data_dir)
+        list_id = manifest.find(args.list)
+        if list_id is None:
+            print(f"2do: No list called {args.list!r}", file=sys.stderr)
+            return 1
+        list_dir = manifest[list_id]["dir"]
+    os.makedirs(list_dir, exist_ok=True)
+    store = open_task_store(storage_backend(args.data_dir), list_dir)
+    try:
+        args.run(store, args)
+    except (CommandError, ValueError) as error:  # Includes corrupt or too new task files
+        print(f"2do: {error}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import tkinter as tk
+
+
+class DragController:
+    """
+    Drag-to-reorder for a TaskListView.
+
+    The viewport's screen position and size are read once when a drag
+    starts; after that every motion event maps to a row by arithmetic on
+    the fixed row height, with no Tk round-trips. While dragging, a thin
+    marker shows where the task will land, and holding the pointer near the
+    top or bottom edge scrolls the list.
+    """
+
+    EDGE = 32          # Distance from the viewport edge where auto-scroll starts
+    SCROLL_MS = 30     # Auto-scroll tick
+    MARKER_HEIGHT = 2
+
+    def __init__(self, view):
+        self.view = view
+        self.task = None       # Task being dragged
+        self.origin = 0        # Viewport top in screen coordinates
+        self.height = 0        # Viewport height
+        self.pointer = None    # Pointer offset inside the viewport
+        self._timer = None
+        self.marker = tk.Frame(view.viewport, height=self.MARKER_HEIGHT)
+
+    @property
+    def active(self):
+        return self.task is not None
+
+    def start(self, index):
+        """Begins dragging the row at index."""
+        self.task = self.view.task_at(index)
+        self.origin = self.view.viewport.winfo_rooty()
+        self.height = self.view.viewport.winfo_height()
+        self.pointer = None
+
+    def motion(self, event):
+        if not self.active:
+            return
+        self.pointer = event.y_root - self.origin
+        self._place_marker()
+        if self._scroll_step() and self._timer is None:
+            self._timer = self.view.viewport.after(self.SCROLL_MS, self._auto_scroll)
+
+    def stop(self, event):
+        """
+        Ends the drag and returns (source, target) row indexes, or None if
+        the dragged task is no longer on display.
+        """
+        source = self._source()
+        self.cancel()
+        if source is None:
+            return None
+        return source, self.view.index_at_offset(event.y_root - self.origin)
+
+    def cancel(self):
+        self.task = None
+        if self._timer is not None:
+            self.view.viewport.after_cancel(self._timer)
+            self._timer = None
+        self.marker.place_forget()
+
+    def _source(self):
+        """Current row of the dragged task; loading or filtering may have moved it."""
+        if self.task is None or self.task["id"] not in self.view.app.model.by_id:
+            return None
+        return self.view.index_of(self.task)
+
+    def _place_marker(self):
+        view = self.view
+        source = self._source()
+        target = view.index_at_offset(self.pointer)
+        if source is None or target == source:
+            self.marker.place_forget()
+            return
+        # The task lands below the target row when moving down, above it when moving up
+        gap = target + 1 if target > source else target
+        y = gap * view.row_height - view.top - (view.ROW_PADDING + self.MARKER_HEIGHT) // 2
+        self.marker.configure(bg=view.app.theme.colors["fg"])
+        self.marker.place(x=4, y=y, relwidth=1.0, width=-8, height=self.MARKER_HEIGHT)
+        self.marker.lift()
+
+    def _scroll_step(self):
+        """Pixels to scroll per tick: faster the closer the pointer is to an edge."""
+        if self.pointer is None:
+            return 0
+        if self.pointer < self.EDGE:
+            return -self._speed(self.EDGE - self.pointer)
+        if self.pointer > self.height - self.EDGE:
+            return self._speed(self.pointer - (self.height - self.EDGE))
+        return 0
+
+    def _speed(self, depth):
+        # Up to two rows per tick once the pointer is well past the edge
+        return max(1, self.view.row_height * min(depth, 2 * self.EDGE) // self.EDGE)
+
+    def _auto_scroll(self):
+        self._timer = None
+        step = self._scroll_step()
+        if not self.active or not step:
+            return
+        self.view.scroll_to(self.view.top + step)
+        self._place_marker()
+        self._timer = self.view.viewport.after(self.SCROLL_MS, self._auto_scroll)
@@ -0,0 +1,109 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; the lock does nothing there
+    fcntl = None
+
+
+def file_signature(path):
+    """(size, mtime_ns, inode) of path, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def file_signatures(paths):
+    return tuple(file_signature(path) for path in paths)
+
+
+class FileLock:
+    """
+    Advisory exclusive lock on a separate lock file (e.g. data/tasks.lock).
+
+    Held while the task files are written, or read as a pair, so another
+    instance of the app never sees a snapshot without its journal. Tools
+    that ignore the lock aren't stopped by it. The lock is re-entrant
+    within the process, so load() can compact() while holding it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._depth = 0
+
+    def __enter__(self):
+        if self._depth == 0 and fcntl is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a")
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class Watch:
+    """One set of files watched together; see FileWatcher.watch()."""
+
+    def __init__(self, paths, on_change):
+        self.paths = tuple(paths)
+        self.on_change = on_change
+        self.seen = file_signatures(self.paths)
+
+    def accept(self):
+        """Takes the files as they are now as seen, e.g. right after writing them."""
+        self.seen = file_signatures(self.paths)
+
+
+class FileWatcher:
+    """
+    Notices when files are changed by someone else, e.g. a second instance
+    of the app, a sync tool or a script.
+
+    There is no portable change notification in the standard library, so
+    the files are stat()ed on a root.after timer. A change in size, mtime or
+    inode (an atomic rename) calls the watch's on_change() on the Tk thread.
+    on_change may return False to be asked again on the next poll, e.g.
+    while a write of our own is still in flight.
+    """
+
+    INTERVAL_MS = 1000
+
+    def __init__(self, root, interval_ms=INTERVAL_MS):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.watches = []
+        self._timer = None
+
+    def watch(self, paths, on_change):
+        """Starts watching paths; returns the Watch, whose accept() skips our own writes."""
+        watch = Watch(paths, on_change)
+        self.watches.append(watch)
+        if self._timer is None:
+            self._timer = self.root.after(self.interval_ms, self.poll)
+        return watch
+
+    def unwatch(self, watch):
+        if watch in self.watches:
+            self.watches.remove(watch)
+
+    def poll(self):
+        self._timer = None
+        for watch in self.watches:
+            current = file_signatures(watch.paths)
+            if current != watch.seen and watch.on_change() is not False:
+                watch.seen = current
+        self._timer = self.root.after(self.interval_ms, self.poll)
+
+    def stop(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
@@ -0,0 +1,173 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = "TODO_PROFILE"  # Set to 1 to profile without the --profile flag
+
+# Handlers, mutations, view updates and store writes timed when profiling is on
+UI_HANDLERS = ("add_task", "toggle_task", "remove_task", "on_drag_stop",
+               "update_task_priority", "refresh_task_display", "load_tasks",
+               "save_tasks", "on_settings_applied", "merge_from_disk",
+               "undo", "redo", "set_view")
+MODEL_MUTATIONS = ("add", "insert_many", "insert_loaded", "update", "update_many", "toggle",
+                   "set_priority", "move", "move_many", "remove_many", "remove_completed",
+                   "reset", "apply")
+VIEW_UPDATES = ("apply", "render", "refresh")
+STORE_WRITES = ("record", "compact")
+
+
+def enabled(flag=False):
+    return flag or os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+def count_widgets(widget):
+    return sum(1 + count_widgets(child) for child in widget.winfo_children())
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Profiler:
+    """
+    Opt-in timing of handlers, model mutations and store writes.
+
+    instrument() replaces methods on a class (or instance) with timed
+    wrappers, so nothing is wrapped, and nothing costs anything, unless
+    profiling was switched on. A root.after heartbeat measures how late the
+    event loop runs its callbacks, and the live widget count is sampled
+    along with it.
+
+    Results are kept as Chrome trace events (load data/trace.json in
+    chrome://tracing or Perfetto) and as rolling per-name samples for a
+    p50/p95/p99 summary (data/profile_summary.json).
+    """
+
+    HEARTBEAT_MS = 50     # Expected interval between heartbeats
+    WIDGETS_EVERY = 20    # Count widgets on every n-th heartbeat
+    SUMMARY_MS = 10000    # How often the rolling summary is written
+    WINDOW = 1000         # Samples kept per name for the percentiles
+    MAX_EVENTS = 200000   # Oldest trace events are dropped beyond this
+
+    def __init__(self, root, data_dir="data"):
+        self.root = root
+        self.trace_path = os.path.join(data_dir, "trace.json")
+        self.summary_path = os.path.join(data_dir, "profile_summary.json")
+        self.events = deque(maxlen=self.MAX_EVENTS)
+        self.samples = {}  # Name -> recent durations in ms
+        self._lock = threading.Lock()  # Store writes are timed on the autosave thread
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self._last_beat = None
+        self._beats = 0
+
+    # Recording
+
+    def instrument(self, target, names, category):
+        """Wraps target.<name> for each name with a timed version."""
+        for name in names:
+            method = getattr(target, name)
+            setattr(target, name, self.timed(method, f"{category}.{name}", category))
+
+    def instrument_created(self, cls, attribute, names, category):
+        """
+        Instruments <instance>.<attribute> of every cls instance created from
+        now on, e.g. the store each list session opens for itself.
+        """
+        init = cls.__init__
+
+        @functools.wraps(init)
+        def __init__(instance, *args, **kwargs):
+            init(instance, *args, **kwargs)
+            self.instrument(getattr(instance, attribute), names, category)
+        cls.__init__ = __init__
+
+    def timed(self, function, name, category):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(name, category, start, time.perf_counter())
+        return wrapper
+
+    def record(self, name, category, start, end):
+        self.events.append({"name": name, "cat": category, "ph": "X",
+                            "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6,
+                            "pid": self.pid, "tid": threading.get_ident()})
+        self._sample(name, (end - start) * 1000)
+
+    def counter(self, name, **values):
+        self.events.append({"name": name, "ph": "C", "pid": self.pid,
+                            "ts": (time.perf_counter() - self.origin) * 1e6, "args": values})
+
+    def _sample(self, name, value):
+        with self._lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.WINDOW)
+            samples.append(value)
+
+    # Event loop
+
+    def start(self):
+        """Starts the heartbeat and the periodic summary."""
+        self._last_beat = time.perf_counter()
+        self.root.after(self.HEARTBEAT_MS, self._heartbeat)
+        self.root.after(self.SUMMARY_MS, self._write_summary_periodically)
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        lag = max(0.0, (now - self._last_beat) * 1000 - self.HEARTBEAT_MS)
+        self._last_beat = now
+        self._sample("loop.lag", lag)
+        self.counter("event loop lag", lag_ms=round(lag, 3))
+
+        self._beats += 1
+        if self._beats % self.WIDGETS_EVERY == 0:
+            widgets = count_widgets(self.root)
+            self._sample("widgets", widgets)
+            self.counter("live widgets", widgets=widgets)
+        self.root.after(self.HEARTBEAT_MS, self._heartbeat)
+
+    def _write_summary_periodically(self):
+        self.write_summary()
+        self.root.after(self.SUMMARY_MS, self._write_summary_periodically)
+
+    # Export
+
+    def summary(self):
+        """p50/p95/p99/max (ms, or a count for widgets) over the recent samples of each name."""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self.samples.items()}
+        result = {}
+        for name, ordered in sorted(snapshot.items()):
+            result[name] = {"count": len(ordered),
+                            "p50": round(percentile(ordered, 0.50), 3),
+                            "p95": round(percentile(ordered, 0.95), 3),
+                            "p99": round(percentile(ordered, 0.99), 3),
+                            "max": round(ordered[-1], 3)}
+        return result
+
+    def write_summary(self):
+        os.makedirs(os.path.dirname(self.summary_path) or ".", exist_ok=True)
+        with open(self.summary_path, "w") as file:
+            json.dump(self.summary(), file, indent=2)
+
+    def export(self):
+        """Writes the trace and the summary, and prints the summary."""
+        os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+        with open(self.trace_path, "w") as file:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, file)
+        self.write_summary()
+
+        print(f"{'name':<32} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name, stats in self.summary().items():
+            print(f"{name:<32} {stats['count']:>6} {stats['p50']:>9} {stats['p95']:>9} "
+                  f"{stats['p99']:>9} {stats['max']:>9}")
+        print(f"Wrote {self.trace_path} and {self.summary_path}")
@@ -1,16 +1,81 @@
-import tkinter as tk
-from todo_app import TodoApp
+import time
 
+STARTED = time.perf_counter()  # Taken before the imports below, which count towards startup
 
-def main():
+import argparse  # noqa: E402
+import sys  # noqa: E402
+
+import cli  # noqa: E402  (no tkinter; the GUI modules are imported in main())
+
+
+def report_first_paint(root, started, profiler=None):
+    """
+    Prints the time from startup until the window, with its first batch of
+    tasks, has been drawn: the first idle moment after Tk exposes it.
+    """
+    def on_expose(event):
+        root.unbind("<Expose>", binding)
+        root.after_idle(painted)  # Runs once the pending redraws are done
+
+    def painted():
+        end = time.perf_counter()
+        print(f"First paint after {(end - started) * 1000:.0f} ms")
+        if profiler is not None:
+            profiler.record("startup.first_paint", "startup", started, end)
+
+    binding = root.bind("<Expose>", on_expose, add="+")
+
+
+def main(argv=None):
     """
     Entry point for the 2do App.
     Creates the main Tkinter window and starts the application.
+    Pass --profile (or set TODO_PROFILE=1) to time handlers and event-loop lag.
+    A command such as `add` or `list` runs the command-line interface
+    instead (see cli.py), without importing tkinter at all.
     """
+    argv = sys.argv[1:] if argv is None else argv
+    # The --data-dir and --list options may come before the command
+    if any(arg in cli.COMMANDS for arg in argv[:5]):
+        return cli.main(argv)
+
+    parser = argparse.ArgumentParser(description="2do App")
+    parser.add_argument("--profile", action="store_true",
+                        help="write handler timings to data/trace.json and data/profile_summary.json")
+    args = parser.parse_args(argv)
+
+    # The GUI modules are only imported once we know the window is wanted
+    import tkinter as tk
+
+    import instrumentation
+    from task_list_view import TaskListView
+    from task_lists import ListSession
+    from task_model import TaskModel
+    from todo_app import TodoApp
+
     root = tk.Tk()  # Create main Tkinter window
+
+    profiler = None
+    if instrumentation.enabled(args.profile):
+        profiler = instrumentation.Profiler(root)
+        # Wrapped before the app exists so button commands and startup are timed too
+        profiler.instrument(TodoApp, instrumentation.UI_HANDLERS, "ui")
+        profiler.instrument(TaskModel, instrumentation.MODEL_MUTATIONS, "model")
+        profiler.instrument(TaskListView, instrumentation.VIEW_UPDATES, "view")
+        # Every list opens its own store, the startup list as well as those opened later
+        profiler.instrument_created(ListSession, "store", instrumentation.STORE_WRITES, "store")
+
     app = TodoApp(root)  # Instantiate TodoApp
+
+    if profiler is not None:
+        profiler.start()
+    report_first_paint(root, STARTED, profiler)
+
     root.mainloop()  # Start tkinter event loop
 
+    if profiler is not None:
+        profiler.export()
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,187 @@
+from bisect import bisect_left, bisect_right
+from operator import attrgetter
+
+GAP = 1 << 16  # Spacing between order keys when there is room to spare
+
+
+def order_of(task):
+    return task["order"]
+
+
+# order_of for Task objects, reading the slot instead of going through the mapping
+task_order = attrgetter("order")
+
+
+def key_between(low, high):
+    """
+    Returns an integer order key strictly between low and high, or None if
+    they are adjacent. Either bound may be None for the ends of the list.
+    """
+    if low is None and high is None:
+        return 0
+    if high is None:
+        return low + GAP
+    if low is None:
+        return high - GAP
+    if high - low > 1:
+        return (low + high) // 2
+    return None
+
+
+def spread_keys(low, high, count):
+    """Returns `count` keys evenly spaced strictly between low and high."""
+    step = (high - low) // (count + 1)
+    return [low + step * (i + 1) for i in range(count)]
+
+
+def ensure_keys(tasks, next_id=1):
+    """
+    Gives every task an "id" and an "order" key, in list order.
+    Returns True if anything had to be assigned (i.e. the data should be
+    written back), False if the list already carried its keys.
+    """
+    changed = False
+    if any("order" not in task for task in tasks):
+        for position, task in enumerate(tasks):
+            task["order"] = position * GAP
+        changed = True
+    else:
+        tasks.sort(key=order_of)
+
+    used = {task["id"] for task in tasks if "id" in task}
+    next_id = max(used, default=next_id - 1) + 1
+    for task in tasks:
+        if "id" not in task:
+            task["id"] = next_id
+            next_id += 1
+            changed = True
+    return changed
+
+
+class OrderedTaskList:
+    """
+    Task objects kept sorted by their order key, stored in blocks of up to
+    2 * BLOCK_SIZE entries.
+
+    Positional lookup, insert and pop only touch one block plus a small
+    index of block offsets, and index_of() finds a task's position by
+    binary search on its key instead of scanning the list.
+    """
+
+    BLOCK_SIZE = 512
+
+    def __init__(self, tasks=()):
+        tasks = list(tasks)
+        self.blocks = [tasks[i:i + self.BLOCK_SIZE]
+                       for i in range(0, len(tasks), self.BLOCK_SIZE)]
+        self.length = len(tasks)
+        self._dirty = True
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def __getitem__(self, index):
+        block, offset = self._locate(index)
+        return self.blocks[block][offset]
+
+    def _rebuild_index(self):
+        """Recomputes block start offsets and first keys after a change."""
+        self._starts = []
+        self._firsts = []
+        start = 0
+        for block in self.blocks:
+            self._starts.append(start)
+            self._firsts.append(block[0].order)
+            start += len(block)
+        self._dirty = False
+
+    def keys_changed(self):
+        """Must be called after order keys were rewritten in place."""
+        self._dirty = True
+
+    def _locate(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("task index out of range")
+        if self._dirty:
+            self._rebuild_index()
+        block = bisect_right(self._starts, index) - 1
+        return block, index - self._starts[block]
+
+    def index_of(self, task):
+        """Position of a task in the list, found by binary search on its key."""
+        if not self.length:
+            raise ValueError("task is not in the list")
+        if self._dirty:
+            self._rebuild_index()
+        key = task.order
+        block = max(0, bisect_right(self._firsts, key) - 1)
+        # Walk back over blocks that may start with the same key
+        while block > 0 and self._firsts[block] == key:
+            block -= 1
+        for b in range(block, len(self.blocks)):
+            items = self.blocks[b]
+            offset = bisect_left(items, key, key=task_order)
+            while offset < len(items) and items[offset].order == key:
+                if items[offset] is task:
+                    return self._starts[b] + offset
+                offset += 1
+            if offset < len(items):
+                break
+        raise ValueError("task is not in the list")
+
+    def insert_sorted(self, task):
+        """Inserts a task at the position given by its key; returns that position."""
+        if self._dirty:
+            self._rebuild_index()
+        key = task.order
+        if not self.blocks:
+            self.blocks.append([task])
+            self.length = 1
+            self._dirty = True
+            return 0
+        block = max(0, bisect_right(self._firsts, key) - 1)
+        items = self.blocks[block]
+        offset = bisect_right(items, key, key=task_order)
+        items.insert(offset, task)
+        index = self._starts[block] + offset
+        self.length += 1
+        if len(items) > 2 * self.BLOCK_SIZE:
+            self.blocks[block:block + 1] = [items[:self.BLOCK_SIZE], items[self.BLOCK_SIZE:]]
+            self._dirty = True
+        else:
+            self._shift_starts(block, 1)
+            self._firsts[block] = items[0].order
+        return index
+
+    def pop(self, index):
+        block, offset = self._locate(index)
+        items = self.blocks[block]
+        task = items.pop(offset)
+        self.length -= 1
+        if not items:
+            del self.blocks[block]
+            self._dirty = True
+        else:
+            self._shift_starts(block, -1)
+            self._firsts[block] = items[0].order
+        return task
+
+    def _shift_starts(self, block, delta):
+        starts = self._starts
+        for b in range(block + 1, len(starts)):
+            starts[b] += delta
+
+    def remove_many(self, tasks):
+        """Removes a set of tasks in one pass over the blocks."""
+        doomed = {id(task) for task in tasks}
+        kept = [task for task in self if id(task) not in doomed]
+        self.blocks = [kept[i:i + self.BLOCK_SIZE]
+                       for i in range(0, len(kept), self.BLOCK_SIZE)]
+        self.length = len(kept)
+        self._dirty = True
@@ -0,0 +1,51 @@
+import tkinter as tk
+
+from reminders import format_when
+
+
+class ReminderWindow:
+    """
+    Lists reminders as they come due. The app keeps one window open and
+    adds to it, so reminders caught up at startup or firing together show
+    up in one place instead of one popup each.
+    """
+
+    def __init__(self, parent, theme_colors):
+        self.theme_colors = theme_colors
+
+        self.window = tk.Toplevel(parent)
+        self.window.title("Reminders")
+        self.window.geometry("450x300")
+        self.window.configure(bg=theme_colors["bg"])
+        self.window.transient(parent)
+
+        list_frame = tk.Frame(self.window, bg=theme_colors["bg"])
+        list_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox = tk.Listbox(list_frame, yscrollcommand=scrollbar.set,
+                                  bg=theme_colors["entry_bg"],
+                                  fg=theme_colors["fg"],
+                                  selectbackground=theme_colors["select_bg"],
+                                  highlightthickness=0)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.configure(command=self.listbox.yview)
+
+        dismiss_button = tk.Button(self.window, text="Dismiss", command=self.window.destroy,
+                                   bg=theme_colors["button_bg"],
+                                   fg=theme_colors["fg"],
+                                   width=12)
+        dismiss_button.pack(pady=10)
+
+    def exists(self):
+        return bool(self.window.winfo_exists())
+
+    def add(self, tasks):
+        self.listbox.insert(tk.END, *(self._describe(task) for task in tasks))
+        self.listbox.see(tk.END)
+        self.window.deiconify()
+        self.window.lift()
+
+    def _describe(self, task):
+        return f"{format_when(task['remind_at'])}  {task['text']}"
@@ -0,0 +1,188 @@
+import heapq
+import re
+import time
+
+from task_model import Change
+
+# Optional task fields holding a time as epoch seconds (None when not set)
+TIMED_FIELDS = ("due", "remind_at")
+_WATCHED = frozenset(TIMED_FIELDS + ("completed",))
+_RELATIVE = re.compile(r"^\+(\d+)\s*([mhdw])$")
+_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_when(text, now=None):
+    """
+    Epoch seconds from "YYYY-MM-DD HH:MM", "YYYY-MM-DD" (the end of that
+    day) or a time from now such as "+30m", "+2h", "+1d", "+1w". Empty text
+    returns None (no time). Raises ValueError for anything else.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    match = _RELATIVE.match(text)
+    if match:
+        now = time.time() if now is None else now
+        return int(now) + int(match.group(1)) * _UNITS[match.group(2)]
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M"):
+        try:
+            return int(time.mktime(time.strptime(text, fmt)))
+        except ValueError:
+            pass
+    try:
+        return int(time.mktime(time.strptime(text + " 23:59", "%Y-%m-%d %H:%M")))
+    except ValueError:
+        raise ValueError(f"Unrecognized time: {text!r} (use YYYY-MM-DD [HH:MM] or +2h)") from None
+
+
+def format_when(when):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(when))
+
+
+def next_reminder(tasks):
+    """The earliest remind_at among open tasks, or None; what a ReminderScheduler fires first."""
+    return min((task["remind_at"] for task in tasks
+                if task.get("remind_at") is not None and not task["completed"]), default=None)
+
+
+def is_overdue(task, now):
+    due = task.get("due")
+    return due is not None and due <= now and not task["completed"]
+
+
+class ReminderScheduler:
+    """
+    Fires reminders and due dates from one timer.
+
+    Upcoming times of open tasks are kept in a min-heap, and a single
+    root.after timer is armed for the earliest one. The scheduler follows
+    the model's ChangeSets, so adding, editing, completing or removing a
+    task only pushes or forgets its own entries, and the timer is only
+    re-armed if the earliest time changed. Between timers nothing runs, no
+    matter how many tasks are scheduled. Entries of edited or removed tasks
+    are left in the heap and skipped when they reach the top.
+
+    When the timer fires, every entry that has come due is popped and
+    handed to on_remind(tasks) (remind_at) or on_due(tasks) (due, so the
+    rows can be recolored as overdue). Times already past when the tasks
+    are loaded fire right away, so reminders that came due while the app
+    was closed are caught up at startup. A delivered reminder's remind_at
+    is cleared through mark_delivered(), so it fires only once.
+    """
+
+    MAX_DELAY_MS = 3600 * 1000  # Wake up hourly at most, in case the clock jumped
+
+    def __init__(self, root, model, on_remind, on_due):
+        self.root = root
+        self.model = model
+        self.on_remind = on_remind
+        self.on_due = on_due
+        self.times = {field: {} for field in TIMED_FIELDS}  # Field -> task id -> scheduled time
+        self.heap = []  # (time, task id, field), including stale entries
+        self._timer = None
+        self._armed_for = None
+        self.rebuild()
+        model.subscribe(self.on_changes)
+
+    def __len__(self):
+        return sum(len(times) for times in self.times.values())
+
+    def rebuild(self):
+        """Schedules every task in the model from scratch, e.g. after a reset."""
+        self.times = {field: {} for field in TIMED_FIELDS}
+        for task in self.model:
+            if not task["completed"]:
+                for field, times in self.times.items():
+                    when = task.get(field)
+                    if when is not None:
+                        times[task["id"]] = when
+        self.heap = [(when, task_id, field) for field, times in self.times.items()
+                     for task_id, when in times.items()]
+        heapq.heapify(self.heap)
+        self._arm()
+
+    def on_changes(self, changes):
+        for change in changes:
+            kind = change.kind
+            if kind == Change.RESET:
+                self.rebuild()
+                return
+            if kind == Change.INSERT:
+                self._schedule(change.task)
+            elif kind == Change.REMOVE:
+                task_id = change.task["id"]
+                for times in self.times.values():
+                    times.pop(task_id, None)
+            elif kind == Change.UPDATE and not _WATCHED.isdisjoint(change.fields):
+                self._schedule(change.task)
+        if len(self.heap) > 2 * len(self) + 64:
+            self.rebuild()  # Mostly stale entries; drop them in one pass
+        else:
+            self._arm()
+
+    def next_time(self, field="remind_at"):
+        """The earliest time still to fire for `field`, or None."""
+        return min(self.times[field].values(), default=None)
+
+    def mark_delivered(self, tasks):
+        """Clears remind_at on tasks whose reminder was shown; saved, but not an undo step."""
+        changes = [Change(Change.UPDATE, task=task, fields={"remind_at": None},
+                          old={"remind_at": task.get("remind_at")})
+                   for task in tasks if self.model.get(task["id"]) is task]
+        if changes:
+            self.model.apply(changes, source="reminder")
+
+    def stop(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+            self._armed_for = None
+
+    def _schedule(self, task):
+        task_id = task["id"]
+        completed = task["completed"]
+        for field, times in self.times.items():
+            when = None if completed else task.get(field)
+            if when is None:
+                times.pop(task_id, None)
+            elif times.get(task_id) != when:
+                times[task_id] = when
+                heapq.heappush(self.heap, (when, task_id, field))
+
+    def _is_current(self, entry):
+        when, task_id, field = entry
+        return self.times[field].get(task_id) == when
+
+    def _arm(self):
+        """Points the one timer at the earliest scheduled time."""
+        heap = self.heap
+        while heap and not self._is_current(heap[0]):
+            heapq.heappop(heap)
+        when = heap[0][0] if heap else None
+        if when == self._armed_for and self._timer is not None:
+            return
+        self.stop()
+        if when is not None:
+            delay = min(self.MAX_DELAY_MS, max(0, int((when - time.time()) * 1000)))
+            self._timer = self.root.after(delay, self._fire)
+            self._armed_for = when
+
+    def _fire(self):
+        self._timer = None
+        self._armed_for = None
+        now = time.time()
+        fired = {field: [] for field in TIMED_FIELDS}
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            entry = heapq.heappop(heap)
+            if self._is_current(entry):
+                when, task_id, field = entry
+                del self.times[field][task_id]
+                task = self.model.get(task_id)
+                if task is not None:
+                    fired[field].append(task)
+        if fired["due"]:
+            self.on_due(fired["due"])
+        if fired["remind_at"]:
+            self.on_remind(fired["remind_at"])
+        self._arm()
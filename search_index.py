@@ -0,0 +1,248 @@
+from itertools import islice
+
+from order_keys import task_order
+from task_model import Change
+
+GRAM = 3  # Length of the character n-grams kept in the index
+
+# Filter tokens understood by the search box, mapped to (field, value)
+FILTERS = {f"priority:{p}": ("priority", p) for p in ("normal", "medium", "high")}
+FILTERS.update({
+    "is:done": ("completed", True),
+    "is:completed": ("completed", True),
+    "is:open": ("completed", False),
+    "is:todo": ("completed", False),
+})
+FIELDS = ("priority", "completed")
+
+
+def grams(text):
+    """
+    Distinct character n-grams of a (case-folded) text. The text is padded
+    so every position starts a full n-gram, which lets shorter words be
+    found as n-gram prefixes.
+    """
+    padded = text + "\0" * (GRAM - 1)
+    return {padded[i:i + GRAM] for i in range(len(text))}
+
+
+class Query:
+    """
+    A parsed filter string: `priority:<level>` and `is:done` / `is:open`
+    tokens, plus words that must each appear somewhere in the task text
+    (case-insensitive substring match, so prefixes work too).
+    """
+
+    def __init__(self, text):
+        self.terms = []
+        self.filters = []
+        for word in text.casefold().split():
+            if word in FILTERS:
+                self.filters.append(FILTERS[word])
+            else:
+                self.terms.append(word)
+
+    def __bool__(self):
+        return bool(self.terms or self.filters)
+
+    def narrows(self, other):
+        """True if every task matching self also matches the Query `other`."""
+        return (all(f in self.filters for f in other.filters) and
+                all(any(old in new for new in self.terms) for old in other.terms))
+
+    def matches(self, task):
+        if any(task.get(field) != value for field, value in self.filters):
+            return False
+        text = task["text"].casefold()
+        return all(term in text for term in self.terms)
+
+
+class SearchIndex:
+    """
+    Inverted index over the model's tasks for the filter box.
+
+    Task text is indexed by character trigrams and priority/completed by
+    value, all as sets of task ids. The index subscribes to the model and
+    follows each ChangeSet, so adding, removing or editing a task only
+    touches that task's entries. A search intersects the posting sets and
+    checks the few remaining candidates against their text.
+
+    A broad query, one most of the list may match, can't be narrowed down
+    that way; scan() then looks through the list a batch at a time, so the
+    first matches can be shown without going through all of it.
+    """
+
+    BROAD = 8           # A query is broad if its candidates are over 1/BROAD of the list
+    SCAN_BATCH = 4096   # Tasks looked at per batch by scan()
+
+    def __init__(self, model):
+        self.model = model
+        self.postings = {}    # n-gram -> ids of tasks whose text contains it
+        self.extensions = {}  # Shorter prefix -> n-grams that start with it
+        self.fields = {}      # (field, value) -> ids of tasks with that value
+        self.texts = {}       # Task id -> case-folded text
+        self.rebuild()
+        model.subscribe(self.on_changes)
+
+    def rebuild(self):
+        self.postings.clear()
+        self.extensions.clear()
+        self.fields.clear()
+        self.texts.clear()
+        for task in self.model:
+            self._add(task)
+
+    def on_changes(self, changes):
+        for change in changes:
+            if change.kind == Change.RESET:
+                self.rebuild()
+            elif change.kind == Change.INSERT:
+                self._add(change.task)
+            elif change.kind == Change.REMOVE:
+                self._remove(change.task)
+            elif change.kind == Change.UPDATE:
+                task = change.task
+                if "text" in change.fields:
+                    self._remove_text(task["id"])
+                    self._add_text(task)
+                for field in FIELDS:
+                    if field in change.fields:
+                        self._remove_field(field, task["id"])
+                        self.fields.setdefault((field, task.get(field)), set()).add(task["id"])
+
+    def search(self, query, within=None):
+        """
+        Tasks matching a Query, in list order. `within` may pass the result
+        of a broader query (e.g. the previous keystroke), which is then
+        narrowed down instead of starting over.
+        """
+        model = self.model
+        smallest, rarest, terms = self._plan(query)
+
+        if within is not None and len(within) <= smallest:
+            return self._narrow(within, query.filters, terms)
+        if rarest is None or smallest * self.BROAD > len(model):
+            # Most of the list is a candidate: one pass in order beats sorting
+            return self._narrow(model, query.filters, terms)
+
+        # Only the rarest part's ids are worked out; the filters' sets are
+        # at hand, and the other words are checked against the few left
+        if rarest in query.filters:
+            ids = self.fields.get(rarest, set())
+        else:
+            ids = self._term_candidates(rarest)
+            terms = [t for t in terms if t != rarest or len(t) > GRAM]  # Longer words match n-grams only
+        ids = ids.intersection(*(self.fields.get(f, set()) for f in query.filters))
+        tasks = sorted((model.get(i) for i in ids), key=task_order)
+        return self._narrow(tasks, (), terms)
+
+    def broad(self, query, within=None):
+        """
+        True if search(query, within) would have to look through most of the
+        list, rather than a small set of candidates the index narrowed it to.
+        """
+        smallest, _, _ = self._plan(query)
+        if within is not None:
+            smallest = min(smallest, len(within))
+        return smallest * self.BROAD > len(self.model)
+
+    def scan(self, query, tasks, batch_size=SCAN_BATCH):
+        """
+        Yields the tasks matching a Query among `tasks` (e.g. the list, a
+        view of it, or the result of a broader query), in the order given:
+        one list of matches, possibly empty, per batch_size tasks looked at.
+        """
+        _, _, terms = self._plan(query)
+        tasks = iter(tasks)
+        while True:
+            batch = list(islice(tasks, batch_size))
+            if not batch:
+                return
+            yield self._narrow(batch, query.filters, terms)
+
+    def _plan(self, query):
+        """
+        (at most how many tasks match, the filter or word that says so,
+        the words rarest first, so each pass over the tasks has less left
+        to check). The sizes come from the posting sets as they are; no set
+        is built here.
+        """
+        estimates = {term: self._estimate(term) for term in query.terms}
+        terms = sorted(query.terms, key=estimates.get)
+        sizes = {f: len(self.fields.get(f, ())) for f in query.filters}
+        if terms:
+            sizes[terms[0]] = estimates[terms[0]]
+        rarest = min(sizes, key=sizes.get, default=None)
+        smallest = len(self.model) if rarest is None else min(sizes[rarest], len(self.model))
+        return smallest, rarest, terms
+
+    def _estimate(self, term):
+        """How many tasks may contain term, at most (or more than there are tasks)."""
+        if len(term) < GRAM:
+            return sum(len(self.postings[gram]) for gram in self.extensions.get(term, ()))
+        return min(len(self.postings.get(term[i:i + GRAM], ())) for i in range(len(term) - GRAM + 1))
+
+    def _narrow(self, tasks, filters, terms):
+        """Keeps the tasks that pass every filter and contain every term."""
+        texts = self.texts
+        for field, value in filters:
+            ids = self.fields.get((field, value), ())
+            tasks = [task for task in tasks if task.id in ids]
+        for term in terms:
+            tasks = [task for task in tasks if term in texts[task.id]]
+        return tasks if isinstance(tasks, list) else list(tasks)
+
+    def _term_candidates(self, term):
+        """Ids of tasks that may contain term."""
+        if len(term) < GRAM:
+            # Union of the n-grams that start with the word
+            return set().union(*(self.postings[gram] for gram in self.extensions.get(term, ())))
+        sets = []
+        for i in range(len(term) - GRAM + 1):
+            ids = self.postings.get(term[i:i + GRAM])
+            if not ids:
+                return set()
+            sets.append(ids)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def _add(self, task):
+        self._add_text(task)
+        for field in FIELDS:
+            self.fields.setdefault((field, task.get(field)), set()).add(task["id"])
+
+    def _add_text(self, task):
+        task_id = task["id"]
+        text = task["text"].casefold()
+        self.texts[task_id] = text
+        for gram in grams(text):
+            ids = self.postings.get(gram)
+            if ids is None:
+                ids = self.postings[gram] = set()
+                for length in range(1, GRAM):
+                    self.extensions.setdefault(gram[:length], set()).add(gram)
+            ids.add(task_id)
+
+    def _remove(self, task):
+        self._remove_text(task["id"])
+        for field in FIELDS:
+            self._remove_field(field, task["id"])
+
+    def _remove_text(self, task_id):
+        text = self.texts.pop(task_id, None)
+        if text is None:
+            return
+        for gram in grams(text):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self.postings[gram]
+                    for length in range(1, GRAM):
+                        self.extensions[gram[:length]].discard(gram)
+
+    def _remove_field(self, field, task_id):
+        # A task sits in exactly one set per field; there are only a few of them
+        for key, ids in self.fields.items():
+            if key[0] == field:
+                ids.discard(task_id)
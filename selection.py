@@ -0,0 +1,47 @@
+from task_model import Change
+
+
+class Selection:
+    """
+    The selected tasks, kept as ids so the selection survives moves,
+    filtering and progressive loading. `anchor` is the task that a
+    shift-click range starts from.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.anchor = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, task):
+        return task["id"] in self.ids
+
+    def clear(self):
+        self.ids.clear()
+        self.anchor = None
+
+    def replace(self, tasks, anchor=None):
+        self.ids = {task["id"] for task in tasks}
+        self.anchor = anchor
+
+    def toggle(self, task):
+        if task["id"] in self.ids:
+            self.ids.discard(task["id"])
+        else:
+            self.ids.add(task["id"])
+        self.anchor = task
+
+    def add(self, tasks):
+        self.ids.update(task["id"] for task in tasks)
+
+    def discard_removed(self, changes):
+        """Drops tasks that a ChangeSet removed from the list."""
+        for change in changes:
+            if change.kind == Change.RESET:
+                self.clear()
+            elif change.kind == Change.REMOVE:
+                self.ids.discard(change.task["id"])
+                if change.task is self.anchor:
+                    self.anchor = None
@@ -0,0 +1,157 @@
+import gc
+import marshal
+import mmap
+import os
+import struct
+import zlib
+from operator import attrgetter
+
+from task import FIELDS, Task
+
+MAGIC = b"2DOC"
+VERSION = 2  # 2: a column for the creation time
+CHUNK_ROWS = 500  # Tasks per separately unmarshalled chunk
+_HEADER = struct.Struct("<4sII")  # Magic, version, length of the marshalled metadata
+_FIELD_SET = frozenset(FIELDS)
+_slot_values = attrgetter(*FIELDS)
+
+
+def snapshot_key(path, data=None):
+    """
+    [size, mtime_ns, crc32] of a snapshot file. `data` may pass the bytes
+    just written to it, to save reading them back for the checksum.
+    """
+    stat = os.stat(path)
+    if data is None:
+        with open(path, "rb") as file:
+            data = file.read()
+    # Only has to catch edits that kept size and mtime, so a fast checksum will do
+    return [stat.st_size, stat.st_mtime_ns, zlib.crc32(data)]
+
+
+class SnapshotCache:
+    """
+    Binary copy of the JSON snapshot for fast cold starts.
+
+    The tasks are stored already normalized, keyed and sorted, in chunks of
+    CHUNK_ROWS. Each chunk is one marshalled column per field (texts,
+    completed flags, priorities, ids, order keys, creation times and extra
+    fields). A small
+    metadata block in front holds the [size, mtime_ns, crc32] key of the
+    JSON file the cache was made from, the id/key bounds and the chunk
+    lengths.
+
+    Reading memory-maps the file and checks the key. Chunks are then
+    unmarshalled and turned into Task objects only as they are consumed, so
+    the first batch is ready before the rest has been touched, and nothing
+    is parsed or normalized. If the key doesn't match the JSON file any
+    more, read() returns None and the caller parses the JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, snapshot_path):
+        """
+        The CachedSnapshot of snapshot_path, or None if the cache is missing,
+        unreadable or was made from a different snapshot.
+        """
+        try:
+            with open(self.path, "rb") as file:
+                view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        try:
+            magic, version, meta_length = _HEADER.unpack_from(view)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError("not a snapshot cache")
+            start = _HEADER.size
+            meta = marshal.loads(view[start:start + meta_length])
+            if len(view) != start + meta_length + sum(meta["chunks"]):
+                raise ValueError("truncated snapshot cache")  # Caught here, not halfway through loading
+            stat = os.stat(snapshot_path)
+            # Size and mtime rule most mismatches out before checksumming the JSON
+            key = meta["key"]
+            if key[:2] == [stat.st_size, stat.st_mtime_ns] and key == snapshot_key(snapshot_path):
+                return CachedSnapshot(view, start + meta_length, meta)
+        except (OSError, ValueError, EOFError, TypeError, KeyError, struct.error):
+            pass
+        view.close()
+        return None
+
+    def write(self, snapshot_path, tasks, data=None):
+        """Caches `tasks` as the contents of the snapshot file just written."""
+        chunks = []
+        for start in range(0, len(tasks), CHUNK_ROWS):
+            columns = list(zip(*map(cache_row, tasks[start:start + CHUNK_ROWS])))
+            chunks.append(marshal.dumps(columns))
+        meta = marshal.dumps({
+            "key": snapshot_key(snapshot_path, data),
+            "bounds": [max((task["id"] for task in tasks), default=0) + 1,
+                       max((task["order"] for task in tasks), default=None)],
+            "chunks": [len(chunk) for chunk in chunks],
+        })
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(_HEADER.pack(MAGIC, VERSION, len(meta)))
+            file.write(meta)
+            file.writelines(chunks)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class CachedSnapshot:
+    """A verified cache file, mapped until its chunks have been read."""
+
+    def __init__(self, view, offset, meta):
+        self.view = view
+        self.offset = offset  # Where the first chunk starts
+        self.meta = meta
+
+    def bounds(self):
+        """(next_id, max_order) of the cached tasks."""
+        next_id, max_order = self.meta["bounds"]
+        return next_id, max_order
+
+    def iter_batches(self):
+        """Yields the tasks a chunk at a time, unmarshalling each only when asked for."""
+        try:
+            offset = self.offset
+            for length in self.meta["chunks"]:
+                columns = marshal.loads(self.view[offset:offset + length])
+                offset += length
+                yield build_tasks(zip(*columns))
+        finally:
+            self.view.close()
+
+    def tasks(self):
+        return [task for batch in self.iter_batches() for task in batch]
+
+
+def cache_row(task):
+    """(text, completed, priority, id, order, created, extra) of a keyed Task or task dict."""
+    if type(task) is Task:
+        return _slot_values(task) + (task.extra,)
+    values = tuple(map(task.get, FIELDS))  # Tasks saved before it was recorded lack "created"
+    if task.keys() <= _FIELD_SET:
+        return values + (None,)
+    extra = {key: value for key, value in task.items() if key not in _FIELD_SET}
+    return values + (extra,)
+
+
+def build_tasks(rows):
+    """Tasks from (text, completed, priority, id, order, created, extra) rows."""
+    # Nothing here can form a cycle, so don't let the collector rescan the
+    # growing list for every few hundred objects allocated
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [Task(*row) for row in rows]
+    finally:
+        if enabled:
+            gc.enable()
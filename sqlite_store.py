@@ -0,0 +1,170 @@
+import json
+import os
+import sqlite3
+
+from task_model import Change
+from task_store import TaskStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id        INTEGER PRIMARY KEY,
+    position  INTEGER NOT NULL,
+    text      TEXT    NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    priority  TEXT    NOT NULL DEFAULT 'normal',
+    extra     TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks(completed);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_position ON tasks(position);
+"""
+
+IMPORTED_VERSION = 1  # PRAGMA user_version once the JSON files were looked at
+
+# Fields with a dedicated column; anything else a task carries goes into `extra`.
+# The task's "id" is the row id and its "order" key lives in `position`.
+COLUMNS = ("id", "order", "text", "completed", "priority")
+
+
+def task_to_row(task):
+    extra = {key: value for key, value in task.items() if key not in COLUMNS}
+    return (task["text"], int(bool(task["completed"])), task.get("priority", "normal"),
+            json.dumps(extra) if extra else None)
+
+
+def row_to_task(task_id, position, text, completed, priority, extra):
+    task = {"id": task_id, "order": position, "text": text,
+            "completed": bool(completed), "priority": priority}
+    if extra:
+        task.update(json.loads(extra))
+    return task
+
+
+class SqliteTaskStore(TaskStore):
+    """
+    Task storage backed by the stdlib sqlite3 module.
+
+    The database runs in WAL mode and indexes completed, priority and position.
+    Rows are keyed by task id and `position` holds the task's order key, so
+    each change touches only its own row: a move is one UPDATE of one key.
+    Each ChangeSet is applied as one transaction, and removing a batch of
+    tasks is a single DELETE.
+
+    On first use an existing JSON snapshot/journal is imported, including the
+    old string-only format. The import happens once per database; the JSON
+    files are left as they were.
+    """
+
+    def __init__(self, db_path, legacy_paths=None):
+        self.db_path = db_path
+        self.legacy_paths = legacy_paths
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Writes happen on the autosave thread, one at a time
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._import_legacy()
+
+    def _import_legacy(self):
+        # user_version marks a database that has had its one chance to import,
+        # so emptying the list doesn't bring the JSON tasks back on the next start
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= IMPORTED_VERSION:
+            return
+        # (A database from before the marker that already has tasks imported them)
+        if self.legacy_paths and self.count() == 0 and not self._import_json():
+            return  # Unreadable; tried again next time
+        self.conn.execute(f"PRAGMA user_version = {IMPORTED_VERSION}")
+
+    def _import_json(self):
+        """Copies the JSON files' tasks in; returns False if they couldn't be read."""
+        from task_format import UnsupportedFormatError
+        from task_journal import TaskJournal
+        legacy = TaskJournal(*self.legacy_paths)
+        if not legacy.exists():
+            return True
+        try:
+            tasks = legacy.load()  # Assigns ids and order keys if they are missing
+        except json.JSONDecodeError:
+            print("Invalid JSON data in json file. Nothing to import")
+            return False
+        except UnsupportedFormatError as error:
+            print(f"{error}. Nothing to import")
+            return False
+        finally:
+            legacy.close()
+        self.compact(tasks)
+        print(f"Imported {len(tasks)} tasks into {self.db_path}")
+        return True
+
+    def exists(self):
+        return self.count() > 0
+
+    def bounds(self):
+        max_id, max_order = self.conn.execute(
+            "SELECT MAX(id), MAX(position) FROM tasks").fetchone()
+        return (max_id or 0) + 1, max_order
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def load(self):
+        tasks = []
+        for batch in self.iter_batches():
+            tasks.extend(batch)
+        return tasks
+
+    def iter_batches(self, batch_size=500):
+        """Pages through the tasks by order key, never holding more than one batch."""
+        query = ("SELECT id, position, text, completed, priority, extra FROM tasks "
+                 "{} ORDER BY position, id LIMIT ?")
+        rows = self.conn.execute(query.format(""), (batch_size,)).fetchall()
+        while rows:
+            yield [row_to_task(*row) for row in rows]
+            last_id, last_position = rows[-1][0], rows[-1][1]
+            rows = self.conn.execute(query.format("WHERE (position, id) > (?, ?)"),
+                                     (last_position, last_id, batch_size)).fetchall()
+
+    def record(self, changes):
+        with self.conn:  # One transaction per change set
+            if len(changes) > 1 and all(c.kind == Change.REMOVE for c in changes):
+                removed = [change.task["id"] for change in changes]
+                self.conn.execute(
+                    "DELETE FROM tasks WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(removed),))
+                return
+            for change in changes:
+                self._record_one(change)
+
+    def _record_one(self, change):
+        execute = self.conn.execute
+        task = change.task
+        if change.kind == Change.INSERT:
+            execute("INSERT OR REPLACE INTO tasks "
+                    "(id, position, text, completed, priority, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (task["id"], task["order"]) + task_to_row(task))
+        elif change.kind == Change.REMOVE:
+            execute("DELETE FROM tasks WHERE id = ?", (task["id"],))
+        elif change.kind == Change.MOVE:
+            execute("UPDATE tasks SET position = ? WHERE id = ?",
+                    (change.fields["order"], task["id"]))
+        elif change.kind == Change.UPDATE:
+            text, completed, priority, extra = task_to_row(task)
+            execute("UPDATE tasks SET position = ?, text = ?, completed = ?, priority = ?, "
+                    "extra = ? WHERE id = ?",
+                    (task["order"], text, completed, priority, extra, task["id"]))
+
+    def compact(self, tasks):
+        with self.conn:
+            self.conn.execute("DELETE FROM tasks")
+            self.conn.executemany(
+                "INSERT INTO tasks (id, position, text, completed, priority, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((task["id"], task["order"]) + task_to_row(task) for task in tasks))
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,130 @@
+import sys
+import time
+from collections.abc import MutableMapping
+
+FIELDS = ("text", "completed", "priority", "id", "order", "created")
+_FIELD_SET = frozenset(FIELDS)
+
+# One shared string per priority instead of a fresh copy from every JSON record
+PRIORITIES = {name: name for name in ("normal", "medium", "high")}
+
+
+def intern_priority(priority):
+    """The shared string for a priority; anything but a string (e.g. null) counts as "normal"."""
+    if type(priority) is not str:
+        return "normal"
+    return PRIORITIES.get(priority) or sys.intern(priority)
+
+
+class Task(MutableMapping):
+    """
+    A task as a fixed set of slots instead of a dict.
+
+    A dict per task pays for a hash table with the same string keys every
+    time; a slotted object stores just the values, and priorities
+    share one interned string each. Task still behaves as a mapping, so
+    task["text"], task.get("priority"), task.update(fields), "id" in task
+    and dict(task) work as they did for the plain dicts. A core field set
+    to None counts as absent, as "id" and "order" are until the model
+    assigns them, and "created" is for tasks saved before it was recorded
+    (see new_task). Keys other than the core fields go to a small `extra`
+    dict that only exists when a record has some.
+
+    Code that owns the tasks (the model and its ordered list) may read the
+    attributes directly, which is cheaper than going through __getitem__.
+    """
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, text="", completed=False, priority="normal", id=None, order=None,
+                 created=None, extra=None):
+        self.text = text
+        self.completed = completed
+        # intern_priority, inlined
+        self.priority = ((PRIORITIES.get(priority) or sys.intern(priority))
+                         if type(priority) is str else "normal")
+        self.id = id
+        self.order = order
+        self.created = created
+        self.extra = extra or None
+
+    @classmethod
+    def from_mapping(cls, record):
+        """A Task with the fields of a dict (or another mapping)."""
+        extra = {key: value for key, value in record.items() if key not in _FIELD_SET}
+        return cls(record.get("text", ""), record.get("completed", False),
+                   record.get("priority", "normal"), record.get("id"), record.get("order"),
+                   record.get("created"), extra)
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            setattr(self, key, intern_priority(value) if key == "priority" else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif self.extra is not None and key in self.extra:
+            del self.extra[key]
+            if not self.extra:
+                self.extra = None
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not None
+        return self.extra is not None and key in self.extra
+
+    def __iter__(self):
+        for key in FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra is not None else default
+
+    def copy(self):
+        """A plain dict with the same fields, e.g. to hand to another thread or to json."""
+        record = {key: value for key in FIELDS if (value := getattr(self, key)) is not None}
+        if self.extra is not None:
+            record.update(self.extra)
+        return record
+
+    def __repr__(self):
+        return f"Task({self.copy()!r})"
+
+
+def new_task(text, priority="normal", **fields):
+    """
+    The record of a task being created now: open, and stamped with its
+    creation time (epoch seconds), which it keeps when it is moved to
+    another list or restored from the archive.
+    """
+    return dict({"text": text, "completed": False, "priority": priority,
+                 "created": int(time.time())}, **fields)
+
+
+def as_task(record):
+    """Returns record itself if it is already a Task, otherwise a Task copy of it."""
+    return record if type(record) is Task else Task.from_mapping(record)
@@ -0,0 +1,103 @@
+"""
+On-disk format of the task snapshot (data/tasks.json).
+
+Since version 2 the file starts with a one-line JSON header naming the
+format and its version, followed by the records as a JSON array:
+
+    {"format": "2do-tasks", "version": 2}
+    [{"text": "...", "completed": false, "priority": "normal", "id": 1, "order": 0}, ...]
+
+Records in the current version are complete: every task is a dict with
+text, completed, priority, id and order, so loading trusts them as they
+are. Tasks created since the app started recording it also carry
+"created", the epoch second they were added; older ones simply lack it. Older files are upgraded once by the steps in MIGRATIONS, each taking
+the records of one version to the next. Version 1 is the original bare
+array, which could hold plain strings and lacked priorities, ids or order
+keys.
+"""
+import json
+
+from order_keys import ensure_keys
+from task import Task
+
+FORMAT = "2do-tasks"
+VERSION = 2
+
+MIGRATIONS = {}  # Version -> step that upgrades a list of records to the next version
+
+
+class UnsupportedFormatError(ValueError):
+    """The file was written by a newer version of the app, or isn't a task file."""
+
+
+def migration(version):
+    """Registers the decorated function as the step from `version` to the next."""
+    def register(step):
+        MIGRATIONS[version] = step
+        return step
+    return register
+
+
+@migration(1)
+def upgrade_bare_array(records):
+    tasks = []
+    for task in records:
+        if isinstance(task, str):
+            # Convert old string-based tasks to dictionary format
+            tasks.append({"text": task, "completed": False, "priority": "normal"})
+        else:
+            # Fill in the fields older versions of the app could leave out
+            task.setdefault("text", "")
+            task.setdefault("completed", False)
+            if not isinstance(task.get("priority"), str):
+                task["priority"] = "normal"  # Missing, or null in hand-edited files
+            tasks.append(task)
+    ensure_keys(tasks)  # Ids and order keys, in list order
+    return tasks
+
+
+def upgrade(records, version):
+    """Runs every step from `version` up to VERSION on the records."""
+    if version > VERSION:
+        raise UnsupportedFormatError(f"Task file version {version} is newer than this app "
+                                     f"supports ({VERSION})")
+    while version < VERSION:
+        records = MIGRATIONS[version](records)
+        version += 1
+    return records
+
+
+def read_header(file):
+    """
+    Reads the header of an open snapshot and returns it, leaving the file at
+    the start of the records array. A file that is a bare array is version 1.
+    """
+    start = file.tell()
+    first = file.read(1)
+    while first.isspace():
+        first = file.read(1)
+    if first == "[":
+        file.seek(start)
+        return {"format": FORMAT, "version": 1}
+    file.seek(start)
+    header = json.loads(file.readline())
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise UnsupportedFormatError("Not a task file")
+    return header
+
+
+def file_version(path):
+    with open(path, "r") as file:
+        return read_header(file)["version"]
+
+
+def load(file):
+    """Reads a whole snapshot: (version the file was in, current-version records)."""
+    version = read_header(file)["version"]
+    return version, upgrade(json.load(file), version)
+
+
+def dumps(tasks):
+    """Serializes tasks (dicts or Tasks) as a current-version snapshot."""
+    header = json.dumps({"format": FORMAT, "version": VERSION})
+    return header + "\n" + json.dumps(tasks, default=Task.copy)
@@ -0,0 +1,431 @@
+import json
+import os
+from contextlib import nullcontext
+
+import task_format
+from file_watcher import FileLock, file_signatures
+from task_loader import iter_json_array
+from order_keys import ensure_keys, order_of
+from snapshot_cache import SnapshotCache
+from task_model import Change
+from task_store import TaskStore
+
+
+def change_to_record(change):
+    """Serializes one model change as a small, id-based journal record."""
+    task_id = change.task["id"]
+    if change.kind == Change.INSERT:
+        return {"op": "insert", "id": task_id, "task": change.task}
+    if change.kind == Change.REMOVE:
+        return {"op": "remove", "id": task_id}
+    if change.kind == Change.MOVE:
+        # A move only rewrites the task's order key
+        return {"op": "move", "id": task_id, "order": change.fields["order"]}
+    if change.kind == Change.UPDATE:
+        return {"op": "update", "id": task_id, "fields": change.fields}
+    raise ValueError(f"Change kind {change.kind} cannot be journaled")
+
+
+def replay_record(by_id, record):
+    """
+    Applies one journal record to a dict of tasks keyed by id. Moves and
+    updates of a task that is gone, e.g. removed by another instance of the
+    app writing to the same journal, are skipped.
+    """
+    op = record["op"]
+    if op == "insert":
+        by_id[record["id"]] = record["task"]
+    elif op == "remove":
+        by_id.pop(record["id"], None)
+    elif op == "move":
+        task = by_id.get(record["id"])
+        if task is not None:
+            task["order"] = record["order"]
+    elif op == "update":
+        task = by_id.get(record["id"])
+        if task is not None:
+            task.update(record["fields"])
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+
+
+def replay_legacy_record(tasks, record):
+    """Applies an index-based record written before tasks had ids."""
+    op = record["op"]
+    if op == "insert":
+        tasks.insert(record["index"], record["task"])
+    elif op == "remove":
+        tasks.pop(record["index"])
+    elif op == "move":
+        tasks.insert(record["dest"], tasks.pop(record["index"]))
+    elif op == "update":
+        tasks[record["index"]].update(record["fields"])
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+
+
+def key_bounds(tasks):
+    """(next_id, max_order) for a list of keyed tasks."""
+    next_id = max((task["id"] for task in tasks), default=0) + 1
+    max_order = max((task["order"] for task in tasks), default=None)
+    return next_id, max_order
+
+
+def write_atomic(path, data):
+    """Writes text to path via a temporary file and an atomic rename."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class TaskJournal(TaskStore):
+    """
+    Append-only JSON storage backend for the task list.
+
+    The snapshot file (data/tasks.json, see task_format) holds the task list
+    as of the last compaction. Every mutation after that is appended to the journal as one
+    JSON line, so a save costs as much as the edit rather than the whole list.
+    Loading reads the snapshot and replays the journal tail on top of it.
+
+    The journal's first line names the snapshot it extends (its size and
+    mtime). If a crash happens between writing a new snapshot and resetting
+    the journal, the stale journal no longer matches and is not replayed twice.
+    The header also carries the next free task id and the highest order key,
+    so tasks added while the snapshot is still streaming in can't collide.
+
+    Records address tasks by id, and a move stores just the new order key.
+    Older index-based records are still replayed. A snapshot in an older
+    format version is upgraded through task_format's migrations. In both
+    cases the original files are backed up once (tasks.json.v1.bak), and
+    the result is compacted into the current format.
+
+    With a cache_path, a binary SnapshotCache of the snapshot is kept next
+    to it and read instead of the JSON whenever it still matches.
+
+    With a lock_path, reads and writes of the file pair hold an advisory
+    FileLock, so several instances of the app can share the files. The
+    store remembers how the files looked after its own last read or write;
+    changed_on_disk() tells the app when someone else has written since.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_every=1000, cache_path=None,
+                 lock_path=None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.cache = SnapshotCache(cache_path) if cache_path else None
+        self.lock = FileLock(lock_path) if lock_path else nullcontext()
+        self.compact_every = compact_every  # Journal records before a compaction is due
+        self.pending_records = 0
+        self._stale = False
+        self._torn = False
+        self._bounds = None
+        self._file = None
+        self._seen = file_signatures(self.watched_paths())
+        self._external = False  # Someone else wrote the files since the app last read them
+
+    def exists(self):
+        return os.path.exists(self.snapshot_path) or os.path.exists(self.journal_path)
+
+    def _snapshot_key(self):
+        if not os.path.exists(self.snapshot_path):
+            return None
+        stat = os.stat(self.snapshot_path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def bounds(self):
+        """
+        (next_id, max_order) reserved by the saved data. Before anything has
+        been loaded they are worked out from the journal alone, so tasks can
+        be appended without reading the snapshot (see cli.py).
+        """
+        if self._bounds is None:
+            self._bounds = self._journal_bounds()
+        return self._bounds
+
+    def _journal_bounds(self):
+        """Header bounds widened by the journal tail, or None if only load() can tell."""
+        header = self._read_header()
+        if header.get("snapshot") != self._snapshot_key() or header.get("next_id") is None:
+            return None
+        next_id, max_order = header["next_id"], header.get("max_order")
+        records = 0
+        for record in self._read_journal():
+            if "id" not in record:
+                return None  # Index-based; load() has to rewrite it first
+            next_id = max(next_id, record["id"] + 1)
+            order = record.get("order")  # Moves
+            if record["op"] == "insert":
+                order = record["task"].get("order")
+            elif record["op"] == "update":
+                order = record["fields"].get("order")  # Re-keyed neighbours
+            if order is not None and (max_order is None or order > max_order):
+                max_order = order
+            records += 1
+        if self._torn:
+            return None  # load() drops the torn tail before anything is appended
+        self.pending_records = records
+        return next_id, max_order
+
+    def watched_paths(self):
+        return self.snapshot_path, self.journal_path
+
+    def changed_on_disk(self):
+        return self._external or file_signatures(self.watched_paths()) != self._seen
+
+    def _check_external(self):
+        """
+        Notes whether the files changed since our last read or write; call
+        with the lock held before touching them. Our own writes that follow
+        don't hide the change from changed_on_disk(), only reload() does.
+        """
+        changed = file_signatures(self.watched_paths()) != self._seen
+        self._external = self._external or changed
+        return changed
+
+    def _remember(self):
+        """Takes the files as they are now as our own; call with the lock held."""
+        self._seen = file_signatures(self.watched_paths())
+
+    def reload(self):
+        self.close()  # The journal may have been replaced; don't append to the old file
+        with self.lock:
+            tasks = self._load()
+            self._external = False
+            self._remember()
+        return tasks
+
+    def load(self):
+        """
+        Rebuilds the task list from the snapshot plus the journal tail.
+        Raises json.JSONDecodeError if the snapshot itself is corrupt.
+        """
+        with self.lock:
+            self._check_external()
+            tasks = self._load()
+            self._remember()
+        return tasks
+
+    def _load(self):
+        tasks = []
+        cached = None
+        version = task_format.VERSION
+        if os.path.exists(self.snapshot_path):
+            version = task_format.file_version(self.snapshot_path)
+            if version == task_format.VERSION:
+                cached = self._read_cache()
+            if cached is not None:
+                tasks = cached.tasks()
+            else:
+                # Current-version records are complete; older ones are upgraded here
+                with open(self.snapshot_path, "r") as file:
+                    version, tasks = task_format.load(file)
+
+        self.pending_records = 0
+        self._stale = self._torn = False
+        legacy = False
+        by_id = None
+        for record in self._read_journal():
+            if "id" in record:
+                if by_id is None:
+                    by_id = {task["id"]: task for task in tasks}
+                replay_record(by_id, record)
+            else:
+                legacy = True
+                replay_legacy_record(tasks, record)
+            self.pending_records += 1
+        if by_id is not None:
+            tasks = sorted(by_id.values(), key=order_of)
+        if legacy:
+            ensure_keys(tasks)  # Index-based records inserted tasks without ids
+
+        if cached is not None and not self.pending_records:
+            self._bounds = cached.bounds()  # The cache knows them without a pass over the list
+        else:
+            self._bounds = key_bounds(tasks)
+        upgraded = version < task_format.VERSION
+        if upgraded or legacy:
+            # Keep the files as they were before rewriting them in the current format
+            self._back_up(version)
+        if self._torn or legacy or upgraded:
+            self.compact(tasks)
+        else:
+            if self._stale or not os.path.exists(self.journal_path):
+                # Don't append behind a stale header; a fresh header also records
+                # the id/key bounds that let the next start stream the snapshot
+                self._start_journal()
+            if cached is None and tasks and not self.pending_records:
+                self._write_cache(tasks)  # Still exactly what the snapshot holds
+        return tasks
+
+    def _back_up(self, version):
+        import shutil  # Only needed for a migration, not on every start
+        for path in (self.snapshot_path, self.journal_path):
+            backup_path = f"{path}.v{version}.bak"
+            if os.path.exists(path) and not os.path.exists(backup_path):
+                shutil.copy2(path, backup_path)
+
+    def iter_batches(self, batch_size=500):
+        """
+        Streams the snapshot in batches without parsing it in one go.
+
+        A journal tail is read first (it is short; compaction bounds it).
+        Tasks it touches are held back while the rest of the snapshot
+        streams, then come as the last batch with the tail replayed on
+        them. Every task carries its order key, so the model puts them in
+        place wherever they arrive.
+
+        Falls back to load() if the journal is torn or index-based, its
+        header doesn't say which ids and keys the snapshot uses, or the
+        snapshot is in an older format that has to be upgraded first.
+        """
+        header = self._read_header()
+        bounds = None
+        if (os.path.exists(self.snapshot_path)
+                and header.get("snapshot") == self._snapshot_key()
+                and task_format.file_version(self.snapshot_path) == task_format.VERSION):
+            bounds = self._journal_bounds()  # None unless the tail can be streamed past
+        if bounds is None:
+            yield from super().iter_batches(batch_size)
+            return
+
+        self._bounds = bounds
+        tail = list(self._read_journal()) if self.pending_records else []
+        self._remember()  # Changes made while streaming show up at the next check
+        if not tail:
+            yield from self._snapshot_batches(batch_size)
+            return
+
+        touched = {record["id"] for record in tail}
+        held = {}  # Id -> copy of a snapshot task the tail changes
+        for batch in self._snapshot_batches(batch_size):
+            kept = []
+            for task in batch:
+                if task["id"] in touched:
+                    held[task["id"]] = task.copy()  # The cache is written from the originals
+                else:
+                    kept.append(task)
+            if kept:
+                yield kept
+        for record in tail:
+            replay_record(held, record)
+        if held:
+            yield sorted(held.values(), key=order_of)
+
+    def _snapshot_batches(self, batch_size):
+        """The snapshot's tasks from the cache, or parsed from the JSON and then cached."""
+        cached = self._read_cache()
+        if cached is not None:
+            yield from cached.iter_batches()  # In chunks of CHUNK_ROWS
+            return
+
+        tasks = []  # Everything streamed, cached once the end is reached
+        with open(self.snapshot_path, "r") as file:
+            task_format.read_header(file)
+            batch = []
+            for record in iter_json_array(file):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    tasks.extend(batch)
+                    yield batch
+                    batch = []
+            if batch:
+                tasks.extend(batch)
+                yield batch
+        self._write_cache(tasks)
+
+    def _read_header(self):
+        if not os.path.exists(self.journal_path):
+            return {}
+        with open(self.journal_path, "r") as file:
+            try:
+                header = json.loads(file.readline())
+            except json.JSONDecodeError:
+                return {}
+        return header if isinstance(header, dict) else {}
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r") as file:
+            header = file.readline()
+            try:
+                if json.loads(header).get("snapshot") != self._snapshot_key():
+                    self._stale = True  # Belongs to an older snapshot, already folded in
+                    return
+            except (json.JSONDecodeError, AttributeError):
+                self._stale = True
+                return
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    self._torn = True  # Torn write from a crash; everything before it is intact
+                    break
+                yield record
+
+    def record(self, changes):
+        """Appends one record per change to the journal."""
+        lines = [json.dumps(change_to_record(change)) + "\n" for change in changes]
+        with self.lock:
+            if self._check_external():
+                self.close()  # Another instance may have replaced the journal
+            if self._file is None:
+                self._open_journal()
+            self._file.write("".join(lines))
+            self._file.flush()
+            self._remember()
+        self.pending_records += len(lines)
+
+    def compaction_due(self):
+        return self.pending_records >= self.compact_every
+
+    def compact(self, tasks):
+        """Writes a fresh snapshot atomically and starts an empty journal."""
+        self.close()
+        os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+        tasks = list(tasks)
+        data = task_format.dumps(tasks)
+        with self.lock:
+            self._check_external()
+            write_atomic(self.snapshot_path, data)
+            self._bounds = key_bounds(tasks)
+            self._start_journal()
+            self._remember()
+        self.pending_records = 0
+        self._write_cache(tasks, data.encode())
+
+    def _read_cache(self):
+        if self.cache is None:
+            return None
+        return self.cache.read(self.snapshot_path)
+
+    def _write_cache(self, tasks, data=None):
+        if self.cache is None:
+            return
+        try:
+            self.cache.write(self.snapshot_path, tasks, data)
+        except (OSError, ValueError) as error:
+            # Only startup speed depends on it; the next start parses the JSON
+            print(f"Could not write the snapshot cache: {error}")
+            self.cache.clear()
+
+    def _open_journal(self):
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) == 0:
+            self._start_journal()
+        self._file = open(self.journal_path, "a")
+
+    def _start_journal(self):
+        header = {"snapshot": self._snapshot_key()}
+        if self._bounds is not None:
+            header["next_id"], header["max_order"] = self._bounds
+        header = json.dumps(header) + "\n"
+        write_atomic(self.journal_path, header)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
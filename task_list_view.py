@@ -0,0 +1,506 @@
+import tkinter as tk
+from bisect import bisect_left, insort
+
+from drag import DragController
+from order_keys import task_order
+from reminders import format_when
+from task_model import Change
+
+
+class TaskRow:
+    """
+    One recyclable row of the task list: drag handle, priority box and checkbox.
+    Rows are bound to whichever task index currently scrolls into their slot,
+    so event handlers always look up `self.index` instead of a baked-in value.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.index = None
+        app = view.app
+
+        self.frame = tk.Frame(view.viewport)
+
+        # Drag handle (for reordering tasks)
+        self.drag_handle = tk.Label(self.frame, text="☰", width=2, cursor="fleur")
+        self.drag_handle.pack(side=tk.LEFT, padx=(0, 2), anchor="center")
+        self.drag_handle.bind("<Button-1>", lambda e: app.on_drag_start(e, self.index))
+        self.drag_handle.bind("<B1-Motion>", lambda e: view.drag.motion(e))
+        self.drag_handle.bind("<ButtonRelease-1>", lambda e: app.on_drag_stop(e))
+
+        # Colored box for priority indication
+        self.priority_box = tk.Label(self.frame, width=2, relief="ridge")
+        self.priority_box.pack(side=tk.LEFT, padx=(0, 5), anchor="center")
+        self.priority_box.bind("<Button-1>", lambda e: app.show_priority_menu(e, self.index))
+
+        # One BooleanVar per row slot, not per task
+        self.var = tk.BooleanVar(value=False)
+        self.checkbox = tk.Checkbutton(
+            self.frame,
+            variable=self.var,
+            font=app.theme.font,
+            command=lambda: app.toggle_task(self.index),
+            highlightthickness=0,
+            bd=0,
+            anchor="w",
+        )
+        self.checkbox.pack(fill=tk.X, anchor="w")
+
+        for widget in (self.frame, self.drag_handle, self.priority_box, self.checkbox):
+            view.bind_scroll(widget)
+            widget.bindtags((view.row_tag,) + widget.bindtags())  # Clicks focus the list
+
+        # Ctrl-click toggles a row in the selection, Shift-click selects a range
+        # ("break" keeps the checkbox from toggling), right-click opens bulk actions
+        for widget in (self.frame, self.drag_handle, self.checkbox):
+            widget.bind("<Control-Button-1>", lambda e: app.select_task(self.index) or "break")
+            widget.bind("<Shift-Button-1>", lambda e: app.select_range(self.index) or "break")
+            widget.bind("<Button-3>", lambda e: app.show_row_menu(e, self.index))
+
+    def show(self, task, index):
+        """Binds the row to a task and repaints it."""
+        self.index = index
+        self.var.set(task["completed"])
+
+        app = self.view.app
+        priority_bg = app.priority_color(task)
+        # Selected rows are highlighted; the priority box keeps its color
+        bg = app.theme.colors["select_bg"] if task in app.selection else priority_bg
+        fg = app.theme.colors["fg"]
+        self.frame.configure(bg=bg)
+        # The last clicked task is marked; Alt+Up/Down moves it
+        current = task is app.current_task
+        self.drag_handle.configure(bg=bg, fg=fg, relief="sunken" if current else "flat")
+        self.priority_box.configure(bg=priority_bg)
+        text = task["text"]
+        due = task.get("due")
+        if due is not None:
+            text = f"{text}  (due {format_when(due)})"
+        self.checkbox.configure(text=text, bg=bg, fg=fg,
+                                activebackground=bg, activeforeground=fg,
+                                selectcolor=bg)
+
+    def place(self, y, height):
+        self.frame.place(x=8, y=y, relwidth=1.0, width=-16, height=height)
+
+    def hide(self):
+        self.index = None
+        self.frame.place_forget()
+
+
+class TaskListView:
+    """
+    Scrollable, virtualized list of tasks.
+
+    Only the rows inside the viewport (plus a small overscan) exist as widgets;
+    they are recycled as the list scrolls, so render cost depends on the window
+    height rather than on the number of tasks.
+
+    A filter narrows the display to a subset of tasks (kept in list order).
+    Row indexes are then positions in that subset; model_index() maps them
+    back to the model. The subset of a filter that matches most of the list
+    may be filled in a batch at a time (see scan_filter).
+
+    A TaskView (see task_views) shows the tasks grouped or sorted another
+    way. Its rows are read straight from the view's maintained buckets, and
+    a filtered subset is kept in the view's order instead of list order.
+    """
+
+    OVERSCAN = 3      # Extra rows realized above and below the viewport
+    ROW_PADDING = 4   # Vertical gap between rows (matches the old pady=2)
+    BULK_CHANGES = 64  # Larger change sets repaint the window once instead of row by row
+    SCAN_DELAY_MS = 1  # Between the batches of a scanned filter
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.top = 0           # Scroll offset in pixels
+        self.rows = {}         # Task index -> TaskRow currently showing it
+        self.spare_rows = []   # Hidden rows ready to be reused
+        self.visible = None    # Filtered tasks in display order, or None to show all
+        self.matcher = None    # matcher(task) -> bool for the active filter
+        self.scan = None       # Batches of the filtered subset still to come, see scan_filter
+        self._scan_timer = None
+        self.view = None       # TaskView in use, or None for the manual order
+        self.sort_key = task_order  # Display order of a filtered subset
+        self.sort_fields = {"order"}  # Fields whose change can move a task on display
+
+        self.frame = app.theme.register(tk.Frame(parent), bg="bg")
+        self.scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.viewport = app.theme.register(tk.Frame(self.frame), bg="bg")
+        self.viewport.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.viewport.bind("<Configure>", lambda e: self.render())
+        self.bind_scroll(self.viewport)
+        # Any click on a row, plain or with Ctrl/Shift, takes the keyboard focus
+        # from the entries, so Delete, Ctrl+A and Ctrl+Z act on the tasks again
+        self.row_tag = f"{self.viewport}.row"
+        self.viewport.bind_class(self.row_tag, "<ButtonPress>", lambda e: self.viewport.focus_set())
+
+        self.drag = DragController(self)  # Drop targets, insertion marker and auto-scroll
+        self.update_font()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    @property
+    def items(self):
+        """The tasks on display: the whole list (or view), or the filtered subset."""
+        if self.visible is not None:
+            return self.visible
+        return self.unfiltered
+
+    @property
+    def unfiltered(self):
+        """The tasks on display without the filter: the whole list, or the view."""
+        return self.app.tasks if self.view is None else self.view
+
+    @property
+    def reorderable(self):
+        """True if dragging rows around maps onto the list's manual order."""
+        return self.view is None or self.view.reorderable
+
+    def task_at(self, index):
+        return self.items[index]
+
+    def model_index(self, index):
+        """Maps a row index to the task's index in the model."""
+        if self.visible is None and self.view is None:
+            return index
+        return self.app.model.index_of(self.items[index])
+
+    def index_of(self, task):
+        """Row index of a task, or None if the filter or view hides it."""
+        if self.visible is None:
+            if self.view is not None:
+                return self.view.index_of(task)
+            return self.app.model.index_of(task)
+        visible = self.visible
+        key = self.sort_key(task)
+        index = bisect_left(visible, key, key=self.sort_key)
+        while index < len(visible) and self.sort_key(visible[index]) == key:
+            if visible[index] is task:
+                return index
+            index += 1
+        return None
+
+    def set_view(self, view):
+        """Switches to a TaskView, or back to the manual order with None; see set_filter."""
+        self.view = view
+        self.sort_key = task_order if view is None else view.sort_key
+        self.sort_fields = {"order"} if view is None else view.sort_fields
+
+    def set_filter(self, visible, matcher):
+        """
+        Shows only `visible` (matching tasks in list order) and keeps it in
+        step with the model using matcher(task). Pass None to show all tasks.
+        With a view, the subset is narrowed to what it shows and put in its order.
+        """
+        self._stop_scan()
+        view = self.view
+        if visible is not None and view is not None:
+            if view.shows is not None:
+                shows, query_matches = view.shows, matcher
+                visible = [task for task in visible if shows(task)]
+
+                def matcher(task):
+                    return shows(task) and query_matches(task)
+            if view.sort_key is not task_order:
+                visible.sort(key=view.sort_key)
+        self.visible = visible
+        self.matcher = matcher if visible is not None else None
+        self.top = 0
+        self.refresh()
+
+    def scan_filter(self, batches, matcher):
+        """
+        Like set_filter, for a filter that matches most of the list: the
+        tasks come from `batches`, lists of them in display order (see
+        SearchIndex.scan). The batches that fill the window are taken right
+        away and the others one per event-loop turn, so the first rows show
+        without going through the whole list; the scrollbar grows as the
+        rest comes in, like it does while the list loads.
+        """
+        self.set_filter([], matcher)
+        self.scan = batches
+        self._scan_step()
+
+    def finish_scan(self):
+        """Takes every batch still to come at once, e.g. before acting on all matching tasks."""
+        if self.scan is None:
+            return
+        for batch in self.scan:
+            self.visible.extend(batch)
+        self._stop_scan()
+        self.render()
+
+    def _scan_step(self):
+        self._scan_timer = None
+        batch = next(self.scan, None)
+        if batch is None:
+            self.scan = None
+        else:
+            self.visible.extend(batch)
+            self._scan_timer = self.app.root.after(self.SCAN_DELAY_MS, self._scan_step)
+        self.scroll_to(self.top)  # Takes more batches first if the window isn't full yet
+
+    def _scan_until(self, rows):
+        """Takes batches until there are `rows` rows or nothing is left."""
+        visible = self.visible
+        while len(visible) < rows:
+            batch = next(self.scan, None)
+            if batch is None:
+                self._stop_scan()
+                return
+            visible.extend(batch)
+
+    def _stop_scan(self):
+        self.scan = None
+        if self._scan_timer is not None:
+            self.app.root.after_cancel(self._scan_timer)
+            self._scan_timer = None
+
+    def update_font(self):
+        """Re-measures the row height after a font change."""
+        line_height = self.app.theme.font.metrics("linespace")
+        self.row_height = line_height + 6 + self.ROW_PADDING
+
+    def restyle(self, font_changed):
+        """Repaints the rows after a theme change, keeping the same task at the top."""
+        if font_changed:
+            first = self.top // self.row_height
+            self.update_font()
+            self.top = first * self.row_height
+        self.refresh()
+
+    def bind_scroll(self, widget):
+        widget.bind("<MouseWheel>", self.on_mousewheel)   # Windows / macOS
+        widget.bind("<Button-4>", self.on_mousewheel)     # X11 scroll up
+        widget.bind("<Button-5>", self.on_mousewheel)     # X11 scroll down
+
+    def content_height(self):
+        return len(self.items) * self.row_height
+
+    def scroll_to(self, top):
+        if self.scan is not None:
+            self._scan_until((int(top) + self.viewport.winfo_height()) // self.row_height + 1)
+        max_top = max(0, self.content_height() - self.viewport.winfo_height())
+        self.top = max(0, min(int(top), max_top))
+        self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: handles both 'moveto' and 'scroll' requests."""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * self.content_height())
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self.viewport.winfo_height() - self.row_height)
+            else:
+                amount *= self.row_height
+            self.scroll_to(self.top + amount)
+
+    def on_mousewheel(self, event):
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self.scroll_to(self.top + steps * 3 * self.row_height)
+
+    def see(self, index):
+        """Scrolls just enough to make the given task index visible."""
+        row_top = index * self.row_height
+        height = self.viewport.winfo_height()
+        if row_top < self.top:
+            self.scroll_to(row_top)
+        elif row_top + self.row_height > self.top + height:
+            self.scroll_to(row_top + self.row_height - height)
+        else:
+            self.render()
+
+    def visible_range(self):
+        """Returns the [first, last) task indexes that should exist as widgets."""
+        height = self.viewport.winfo_height()
+        first = max(0, self.top // self.row_height - self.OVERSCAN)
+        last = min(len(self.items),
+                   (self.top + height) // self.row_height + 1 + self.OVERSCAN)
+        return first, last
+
+    def render(self):
+        """Realizes the visible window of rows, recycling any that scrolled away."""
+        tasks = self.items
+        first, last = self.visible_range()
+
+        # Release rows that are no longer inside the window
+        for index in [i for i in self.rows if not first <= i < last]:
+            row = self.rows.pop(index)
+            row.hide()
+            self.spare_rows.append(row)
+
+        for index in range(first, last):
+            row = self.rows.get(index)
+            if row is None:
+                row = self.spare_rows.pop() if self.spare_rows else TaskRow(self)
+                self.rows[index] = row
+                row.show(tasks[index], index)
+            row.place(index * self.row_height - self.top, self.row_height - self.ROW_PADDING)
+
+        self.update_scrollbar()
+
+    def apply(self, changes):
+        """
+        Reconciles the realized rows with a ChangeSet from the model.
+        Only rows that were inserted, removed, moved or updated are touched;
+        the others just have their index shifted.
+        """
+        if self.visible is not None:
+            self._apply_filtered(changes)
+            return
+        if self.view is not None:
+            # The view's buckets are already up to date; rebind the rows on screen
+            self.refresh()
+            return
+        if len(changes) > self.BULK_CHANGES:
+            self.refresh()  # One pass over the visible rows, however many tasks changed
+            return
+        for change in changes:
+            if change.kind == Change.RESET:
+                self.refresh()
+                return
+            if change.kind == Change.INSERT:
+                self._shift(change.index, None, 1)
+            elif change.kind == Change.REMOVE:
+                self._release(change.index)
+                self._shift(change.index + 1, None, -1)
+            elif change.kind == Change.MOVE:
+                src, dest = change.index, change.dest
+                row = self.rows.pop(src, None)
+                if src < dest:
+                    self._shift(src + 1, dest + 1, -1)
+                else:
+                    self._shift(dest, src, 1)
+                if row is not None:
+                    self.rows[dest] = row
+                    row.index = dest
+            elif change.kind == Change.UPDATE:
+                row = self.rows.get(change.index)
+                if row is not None:
+                    row.show(change.task, change.index)
+        self.scroll_to(self.top)
+
+    def _apply_filtered(self, changes):
+        """Updates the filtered subset, then repaints the realized rows."""
+        visible = self.visible
+        sort_key = self.sort_key
+        if self.scan is not None:
+            # The batches still to come were cut from the list as it was
+            # before this change; find the matches again in one go instead
+            self._stop_scan()
+            self._match_all()
+            self.refresh()
+            return
+        # The model applies a whole set before announcing it, so tasks the set
+        # re-keys (or re-groups, in a view) can't be found by their key any
+        # more: take them out up front and put back the ones still shown
+        moved = {}
+        for change in changes:
+            if change.kind == Change.MOVE or (change.kind == Change.UPDATE and
+                                              not self.sort_fields.isdisjoint(change.fields)):
+                moved[id(change.task)] = change.task
+        if moved:
+            visible[:] = [task for task in visible if id(task) not in moved]
+
+        for change in changes:
+            task = change.task
+            if change.kind == Change.RESET:
+                self._match_all()
+            elif id(task) in moved:
+                continue  # Placed below
+            elif change.kind == Change.INSERT:
+                if self.matcher(task):
+                    insort(visible, task, key=sort_key)
+            elif change.kind == Change.REMOVE:
+                index = self.index_of(task)
+                if index is not None:
+                    del visible[index]
+            elif change.kind == Change.UPDATE:
+                index = self.index_of(task)
+                shown = self.matcher(task)
+                if index is not None and not shown:
+                    del visible[index]
+                elif index is None and shown:
+                    insort(visible, task, key=sort_key)
+
+        by_id = self.app.model.by_id
+        for task in moved.values():
+            if by_id.get(task["id"]) is task and self.matcher(task):
+                insort(visible, task, key=sort_key)
+        self.refresh()
+
+    def _match_all(self):
+        """Refills the filtered subset from every task in the list."""
+        self.visible[:] = [task for task in self.app.tasks if self.matcher(task)]
+        if self.sort_key is not task_order:
+            self.visible.sort(key=self.sort_key)
+
+    def repaint_rows(self):
+        """Repaints every realized row in place, e.g. after the selection changed."""
+        items = self.items
+        for index, row in self.rows.items():
+            row.show(items[index], index)
+
+    def repaint(self, index):
+        """Repaints one row if it is currently realized."""
+        row = self.rows.get(index)
+        if row is not None:
+            row.show(self.items[index], index)
+
+    def _release(self, index):
+        row = self.rows.pop(index, None)
+        if row is not None:
+            row.hide()
+            self.spare_rows.append(row)
+
+    def _shift(self, start, stop, delta):
+        """Renumbers realized rows with index in [start, stop) by delta."""
+        shifted = [(i, row) for i, row in self.rows.items()
+                   if i >= start and (stop is None or i < stop)]
+        for i, _ in shifted:
+            del self.rows[i]
+        for i, row in shifted:
+            self.rows[i + delta] = row
+            row.index = i + delta
+
+        # Keep the rows on screen still when the list changes above them
+        if stop is None and start * self.row_height < self.top:
+            self.top += delta * self.row_height
+
+    def refresh(self):
+        """Repaints every realized row, e.g. after the task list was replaced."""
+        for row in self.rows.values():
+            row.hide()
+            self.spare_rows.append(row)
+        self.rows.clear()
+        self.scroll_to(self.top)
+
+    def update_scrollbar(self):
+        total = self.content_height()
+        if total <= 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        height = self.viewport.winfo_height()
+        self.scrollbar.set(self.top / total, min(1.0, (self.top + height) / total))
+
+    def index_at(self, y_root):
+        """Maps an absolute screen Y coordinate to a task index."""
+        return self.index_at_offset(y_root - self.viewport.winfo_rooty())
+
+    def index_at_offset(self, y):
+        """Maps a Y offset inside the viewport to a task index; rows have a fixed height."""
+        return max(0, min(len(self.items) - 1, (y + self.top) // self.row_height))
+
+    def widget_count(self):
+        return len(self.rows) + len(self.spare_rows)
@@ -0,0 +1,225 @@
+import json
+import os
+import re
+from collections import OrderedDict
+
+from archive import TaskArchive
+from autosave import Autosaver, freeze_changes
+from reminders import ReminderScheduler
+from order_keys import task_order
+from search_index import SearchIndex
+from task_journal import write_atomic
+from task_model import Change, TaskModel
+from task_store import open_task_store
+from task_views import TaskViews
+from undo import UndoHistory
+
+DEFAULT_LIST = "tasks"  # Id of the list kept in data/ itself, as before lists existed
+
+
+class ListManifest:
+    """
+    The named task lists (projects) and which one was open last, kept in
+    data/lists.json.
+
+    Every list is a shard of its own: a directory holding the usual task
+    files for the configured backend (tasks.json plus journal and cache, or
+    tasks.db) and its own archive. The first list lives in data/ itself,
+    so a data directory from before lists existed is simply that list; the
+    others get data/lists/<id>/. The manifest only holds names, directories
+    and task counts, so listing the lists never opens a shard. Counts are
+    as of the last time the app had the list loaded, or moved tasks into it.
+
+    It also holds each list's earliest pending reminder (remind_at), so the
+    app can open a list that isn't loaded when one of its reminders comes
+    due. Whoever adds a reminder to a list that isn't open (moving tasks,
+    the CLI) records it with note_reminder().
+    """
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, "lists.json")
+        self.active = DEFAULT_LIST
+        self.lists = OrderedDict()  # Id -> {"name", "dir", "count"}
+        try:
+            with open(self.path, "r") as file:
+                data = json.load(file)
+            for entry in data["lists"]:
+                self.lists[entry["id"]] = {"name": entry["name"], "dir": entry["dir"],
+                                           "count": entry.get("count"),
+                                           "remind_at": entry.get("remind_at")}
+            self.active = data.get("active", DEFAULT_LIST)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, KeyError, TypeError):
+            print("Invalid JSON data in lists file. Starting with the default list")
+            self.lists.clear()
+        if DEFAULT_LIST not in self.lists:
+            self.lists[DEFAULT_LIST] = {"name": "Tasks", "dir": data_dir, "count": None,
+                                        "remind_at": None}
+            self.lists.move_to_end(DEFAULT_LIST, last=False)
+        if self.active not in self.lists:
+            self.active = DEFAULT_LIST
+
+    def __iter__(self):
+        return iter(self.lists)
+
+    def __getitem__(self, list_id):
+        return self.lists[list_id]
+
+    def find(self, name):
+        """Id of the list called `name` (ignoring case), or None."""
+        for list_id, entry in self.lists.items():
+            if entry["name"].casefold() == name.casefold():
+                return list_id
+        return None
+
+    def add(self, name):
+        """Adds an empty list and returns its id; raises ValueError for a taken name."""
+        name = name.strip()
+        if not name:
+            raise ValueError("A list needs a name")
+        if self.find(name) is not None:
+            raise ValueError(f"There is already a list called {name!r}")
+        slug = re.sub(r"[^a-z0-9]+", "-", name.casefold()).strip("-") or "list"
+        list_id, suffix = slug, 2
+        while list_id in self.lists or os.path.exists(self._shard_dir(list_id)):
+            list_id, suffix = f"{slug}-{suffix}", suffix + 1
+        self.lists[list_id] = {"name": name, "dir": self._shard_dir(list_id), "count": 0,
+                               "remind_at": None}
+        return list_id
+
+    def set_count(self, list_id, count):
+        self.lists[list_id]["count"] = count
+
+    def set_reminder(self, list_id, when):
+        """Sets the list's earliest pending reminder, e.g. from its scheduler when it closes."""
+        self.lists[list_id]["remind_at"] = when
+
+    def note_reminder(self, list_id, when):
+        """Records a reminder added to the list, if it is earlier than the ones known."""
+        entry = self.lists[list_id]
+        if when is not None and (entry["remind_at"] is None or when < entry["remind_at"]):
+            entry["remind_at"] = when
+
+    def next_reminder(self, skip=()):
+        """(time, list id) of the earliest reminder among the lists not in `skip`, or None."""
+        return min(((entry["remind_at"], list_id) for list_id, entry in self.lists.items()
+                    if entry["remind_at"] is not None and list_id not in skip), default=None)
+
+    def save(self):
+        data = {"active": self.active,
+                "lists": [dict(entry, id=list_id) for list_id, entry in self.lists.items()]}
+        os.makedirs(self.data_dir, exist_ok=True)
+        write_atomic(self.path, json.dumps(data, indent=2))
+
+    def _shard_dir(self, list_id):
+        return os.path.join(self.data_dir, "lists", list_id)
+
+
+class ListSession:
+    """
+    One open list: its store and model, and everything the app keeps in
+    step with them (autosaver, archive, search index, sorted views, undo
+    history, reminders).
+
+    Each session writes its own shard through its own autosaver, so a list
+    that is no longer on screen still saves its queued edits, and its
+    reminders still fire while it stays open.
+    """
+
+    def __init__(self, root, list_id, entry, settings, on_status, on_remind, on_due):
+        self.id = list_id
+        self.entry = entry
+        self.model = TaskModel()
+        self.model.subscribe(self.on_changes)
+        self.loader = None  # ProgressiveLoader while tasks are still streaming in
+        self.watch = None   # FileWatcher watch while the list is on screen
+        self.top = 0        # Scroll offset to restore when the list is shown again
+        self.load_error = None  # Why the saved tasks can't be read; nothing is saved then
+        self.store = open_task_store(settings["storage"], entry["dir"])
+        self.autosaver = Autosaver(root, self.store, lambda: self.model.tasks, on_status,
+                                   delay_ms=settings["autosave_delay_ms"],
+                                   is_loading=lambda: self.loader is not None)
+        self.archive = TaskArchive(os.path.join(entry["dir"], "archive"))
+        self.search_index = SearchIndex(self.model)
+        self.views = TaskViews(self.model)  # Buckets behind the sorted and grouped views
+        self.history = UndoHistory(self.model)
+        self.reminders = ReminderScheduler(root, self.model, on_remind, on_due)
+
+    @property
+    def name(self):
+        return self.entry["name"]
+
+    def on_changes(self, changes):
+        # Tasks streamed in or merged from disk are already saved, and files
+        # that couldn't be read are left as they are
+        if changes.source in ("load", "disk") or self.load_error is not None:
+            return
+        if changes.source in ("archive", "rearchive"):
+            # Queued ahead of the removal, so the store never drops a task
+            # before its archive copy is on disk. If that fails, the store
+            # still has them (the worker holds back their removal), so they
+            # come back the same way tasks stream in from disk
+            removed = sorted((change.task for change in changes if change.kind == Change.REMOVE),
+                             key=task_order)  # In list order, as they were shown
+            self.autosaver.archive(self.archive, removed, self.model.insert_loaded)
+        elif changes.source == "unarchive":
+            restored = [change.task for change in changes if change.kind == Change.INSERT]
+            self.autosaver.unarchive(self.archive, restored)
+        self.autosaver.enqueue(changes)
+
+    def close(self):
+        """Stops loading and timers and writes anything still queued."""
+        if self.loader is not None:
+            self.loader.cancel()
+        self.reminders.stop()
+        self.autosaver.flush()  # Still sees the loader, so it won't rewrite a partial list
+        self.loader = None
+
+
+class ListCache:
+    """
+    The sessions of the most recently used lists, so switching back to one
+    is instant. Opening another list beyond `capacity` closes the one used
+    longest ago; the list on screen is always the most recent.
+    """
+
+    def __init__(self, capacity=3):
+        self.capacity = capacity
+        self.sessions = OrderedDict()  # List id -> ListSession, least recent first
+
+    def __iter__(self):
+        return iter(self.sessions.values())
+
+    def get(self, list_id):
+        """The open session of a list, marked as most recently used, or None."""
+        session = self.sessions.get(list_id)
+        if session is not None:
+            self.sessions.move_to_end(list_id)
+        return session
+
+    def add(self, session):
+        """Adds a session as the most recent; returns the sessions evicted to make room."""
+        self.sessions[session.id] = session
+        evicted = []
+        while len(self.sessions) > self.capacity:
+            evicted.append(self.sessions.popitem(last=False)[1])
+        return evicted
+
+
+def append_tasks(store, tasks):
+    """
+    Appends tasks to the end of a list that is not open, as one record in
+    its store. Like adding from the command line, nothing is read when the
+    store knows its id and key bounds.
+    """
+    bounds = store.bounds()
+    model = TaskModel()
+    model.reset([] if bounds is not None else store.load(), *(bounds or ()))
+    recorded = []
+    model.subscribe(recorded.extend)
+    model.insert_many(len(model), tasks)
+    store.record(freeze_changes(recorded))
+    if store.compaction_due():
+        store.compact(store.load())
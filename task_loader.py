@@ -0,0 +1,110 @@
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(file, chunk_size=1 << 16):
+    """
+    Yields the elements of a top-level JSON array one at a time, reading the
+    file in chunks instead of parsing the whole buffer with json.load.
+    Raises json.JSONDecodeError for malformed input.
+    """
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = file.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    fill()
+    skip(_WHITESPACE)
+    if pos >= len(buffer) or buffer[pos] != "[":
+        raise json.JSONDecodeError("Expected '['", buffer, pos)
+    pos += 1
+
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buffer):
+            raise json.JSONDecodeError("Unterminated array", buffer, pos)
+        if buffer[pos] == "]":
+            return
+        try:
+            value, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()  # Element spans the chunk boundary
+            continue
+        if end == len(buffer) and not eof:
+            fill()  # A value ending exactly at the boundary may be truncated
+            continue
+        pos = end
+        yield value
+
+
+class ProgressiveLoader:
+    """
+    Feeds batches of tasks into the model through root.after callbacks, so
+    the window is interactive while a large list is still loading.
+
+    Loaded tasks carry their own ids and order keys, so each one lands in
+    its place no matter what the user added, moved or removed meanwhile.
+    """
+
+    def __init__(self, root, model, batches, on_progress, on_done, delay_ms=1):
+        self.root = root
+        self.model = model
+        self.batches = batches
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.delay_ms = delay_ms
+        self.loaded = len(model)
+        self._timer = None
+
+    def start(self):
+        self._timer = self.root.after(self.delay_ms, self.step)
+
+    def step(self):
+        """Inserts the next batch, then yields back to the event loop."""
+        self._timer = None
+        batch = next(self.batches, None)
+        if batch is None:
+            self.on_done(self.loaded)
+            return
+        self._insert(batch)
+        self.on_progress(self.loaded)
+        self._timer = self.root.after(self.delay_ms, self.step)
+
+    def finish(self):
+        """Loads everything that is left right away, e.g. before a full save."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        for batch in self.batches:
+            self._insert(batch)
+        self.on_done(self.loaded)
+
+    def cancel(self):
+        """Stops loading without calling on_done, e.g. when the list is closed."""
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+
+    def _insert(self, batch):
+        self.model.insert_loaded(batch)
+        self.loaded += len(batch)
@@ -0,0 +1,87 @@
+from snapshot_cache import cache_row
+from task_model import Change
+
+
+def local_edits(changes):
+    """
+    What a list of unsaved changes did to each task: id -> Change.INSERT or
+    Change.REMOVE, or a dict of the edited fields and their values before
+    the first edit (as last saved).
+    """
+    edits = {}
+    for change in changes:
+        task_id = change.task["id"]
+        if change.kind in (Change.INSERT, Change.REMOVE):
+            edits[task_id] = change.kind
+        else:
+            fields = edits.setdefault(task_id, {})
+            if isinstance(fields, dict):  # Edits to a task inserted here stay part of the insert
+                old = change.old or {}
+                for key in change.fields:
+                    fields.setdefault(key, old.get(key))
+    return edits
+
+
+def merge_tasks(model, theirs, edits):
+    """
+    Three-way merge of the tasks on disk into the model.
+
+    The model is what was last saved plus the unsaved `edits` (see
+    local_edits), so every other difference from `theirs` was made on disk.
+    Those become changes to apply; where both sides changed the same field
+    of a task, the local value is kept, since its edit is still going to be
+    written, and counted as a conflict. A task removed on disk is removed
+    here too, unless it was inserted here.
+
+    Returns (changes, conflicts, clashes). clashes counts tasks inserted on
+    both sides under the same id; ours get fresh ids, and the store has to
+    be rewritten as a whole since its queued records still use the old ones.
+    """
+    mine = model.by_id
+    theirs = {task["id"]: task for task in theirs}
+    changes = []
+    conflicts = clashes = 0
+    next_id = max(model.next_id, max(theirs, default=0) + 1)
+
+    for task_id, task in list(mine.items()):
+        edit = edits.get(task_id)
+        their = theirs.get(task_id)
+        if their is None:
+            if edit == Change.INSERT:
+                continue  # Added here and not written yet
+            if edit is not None:
+                conflicts += 1  # Edited here, removed there
+            changes.append(Change(Change.REMOVE, task=task))
+            continue
+        if cache_row(task) == cache_row(their):
+            continue
+        if edit == Change.INSERT:
+            # Both sides handed out this id: theirs keeps it, ours moves to a new one
+            clashes += 1
+            copy = task.copy()
+            copy["id"] = next_id
+            next_id += 1
+            changes.append(Change(Change.REMOVE, task=task))
+            changes.append(Change(Change.INSERT, task=their))
+            changes.append(Change(Change.INSERT, task=copy))
+            continue
+
+        fields = {key: value for key, value in their.items() if task.get(key) != value}
+        if edit:
+            conflicts += sum(1 for key in fields.keys() & edit.keys() if fields[key] != edit[key])
+            fields = {key: value for key, value in fields.items() if key not in edit}
+        order = fields.pop("order", None)
+        if fields:
+            changes.append(Change(Change.UPDATE, task=task, fields=fields,
+                                  old={key: task.get(key) for key in fields}))
+        if order is not None:
+            # A new key can put the task anywhere, which only a MOVE handles
+            changes.append(Change(Change.MOVE, task=task, fields={"order": order},
+                                  old={"order": task["order"]}))
+
+    for task_id, their in theirs.items():
+        if task_id not in mine and edits.get(task_id) != Change.REMOVE:
+            changes.append(Change(Change.INSERT, task=their))
+
+    model.next_id = next_id
+    return changes, conflicts, clashes
@@ -0,0 +1,368 @@
+from order_keys import GAP, OrderedTaskList, ensure_keys, spread_keys
+from task import as_task
+
+
+class Change:
+    """
+    A single row-level edit to the task list.
+
+    kind is one of INSERT, REMOVE, MOVE, UPDATE or RESET. Indexes are the
+    positions at the moment the change is applied, so a list of changes must
+    be replayed in order. The model applies changes by task identity and
+    order key, and fills in index (and dest) as it applies them.
+    """
+
+    INSERT = "insert"
+    REMOVE = "remove"
+    MOVE = "move"
+    UPDATE = "update"
+    RESET = "reset"
+
+    __slots__ = ("kind", "index", "task", "dest", "fields", "old")
+
+    def __init__(self, kind, index=None, task=None, dest=None, fields=None, old=None):
+        self.kind = kind
+        self.index = index      # Position the change applies to
+        self.task = task        # Task dict that was inserted, removed, moved or updated
+        self.dest = dest        # Target position of a MOVE
+        self.fields = fields    # New values of an UPDATE, or {"order": key} of a MOVE
+        self.old = old          # Previous values of an UPDATE or MOVE
+
+    def __repr__(self):
+        return f"Change({self.kind!r}, index={self.index!r}, dest={self.dest!r}, fields={self.fields!r})"
+
+
+class ChangeSet(list):
+    """
+    Ordered list of changes produced by one mutation of the model.
+    `source` says where it came from: "user" edits, "undo" when undo/redo
+    replays an action, "archive" when tasks are moved to the archive,
+    "unarchive" and "rearchive" when undo/redo takes them back out of it or
+    puts them back in, "reminder" when a delivered reminder is cleared,
+    "move" when tasks are moved to another list, "load" when tasks are
+    streamed in from disk, or "disk" when changes someone else made to the
+    files are merged in. Everything but "load" and "disk" still needs
+    saving; only "user" and "archive" changes can be undone.
+    """
+
+    def __init__(self, changes=(), source="user"):
+        super().__init__(changes)
+        self.source = source
+
+
+class TaskModel:
+    """
+    Ordered list of tasks.
+
+    Tasks are stored as compact Task mappings; dicts handed to the model
+    (new tasks, batches from disk) are converted on the way in.
+
+    Every task carries a stable integer "id" and an integer "order" key, and
+    the list is kept sorted by key in an OrderedTaskList. Moving a task
+    rewrites only its own key; neighbours are re-keyed only when there is no
+    gap left between them, and then only in a small window.
+
+    Every mutation goes through this class and is announced to listeners as a
+    ChangeSet, so views and other subscribers can update only what changed
+    instead of rebuilding from scratch.
+    """
+
+    def __init__(self, tasks=None):
+        self.listeners = []
+        self._load(tasks or [])
+
+    def __len__(self):
+        return len(self.tasks)
+
+    def __getitem__(self, index):
+        return self.tasks[index]
+
+    def __iter__(self):
+        return iter(self.tasks)
+
+    def subscribe(self, callback):
+        """Registers callback(changes) to be called after every mutation."""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def get(self, task_id):
+        """Looks a task up by its id."""
+        return self.by_id.get(task_id)
+
+    def index_of(self, task):
+        return self.tasks.index_of(task)
+
+    # Mutations
+
+    def _load(self, tasks, next_id=None, max_order=None):
+        tasks = [as_task(task) for task in tasks]
+        ensure_keys(tasks, next_id or 1)
+        self.tasks = OrderedTaskList(tasks)
+        self.by_id = {task["id"]: task for task in tasks}
+        self.next_id = max(next_id or 1, max(self.by_id, default=0) + 1)
+        # Highest key that may exist on disk; appends go after it while still loading
+        self.max_order = max_order
+
+    def reset(self, tasks, next_id=None, max_order=None):
+        """
+        Replaces the whole list, e.g. after loading from disk. next_id and
+        max_order reserve ids and keys for tasks that are still being loaded.
+        """
+        self._load(tasks, next_id, max_order)
+        self._notify(ChangeSet([Change(Change.RESET)], source="load"))
+
+    def add(self, task, index=None):
+        if index is None:
+            index = len(self.tasks)
+        self.insert_many(index, [task])
+        return index
+
+    def insert_many(self, index, tasks, source="user"):
+        """Inserts a run of tasks starting at index as a single change set."""
+        if not tasks:
+            return
+        tasks = [as_task(task) for task in tasks]
+        changes, keys = self._plan_keys(index, len(tasks))
+        for task, key in zip(tasks, keys):
+            task["id"] = self.next_id
+            task["order"] = key
+            self.next_id += 1
+            changes.append(Change(Change.INSERT, task=task))
+        self._commit(changes, source)
+
+    def insert_loaded(self, tasks):
+        """Inserts tasks that already carry ids and keys, e.g. the next batch from disk."""
+        if tasks:
+            self._commit([Change(Change.INSERT, task=task) for task in tasks], "load")
+
+    def update(self, index, **fields):
+        task = self.tasks[index]
+        old = {key: task.get(key) for key in fields}
+        if old == fields:
+            return
+        self._commit([Change(Change.UPDATE, index, task, fields=fields, old=old)])
+
+    def update_many(self, indices, **fields):
+        """Sets the same fields on several tasks as one change set; returns how many changed."""
+        changes = []
+        for index in sorted(set(indices)):
+            task = self.tasks[index]
+            old = {key: task.get(key) for key in fields}
+            if old != fields:
+                changes.append(Change(Change.UPDATE, index, task, fields=dict(fields), old=old))
+        if changes:
+            self._commit(changes)
+        return len(changes)
+
+    def toggle(self, index):
+        self.update(index, completed=not self.tasks[index]["completed"])
+
+    def set_priority(self, index, priority):
+        self.update(index, priority=priority)
+
+    def move(self, src, dest):
+        """Moves the task at src so that it ends up at index dest."""
+        if src == dest or not 0 <= src < len(self.tasks):
+            return
+        dest = max(0, min(dest, len(self.tasks) - 1))
+        # Gap the task lands in, counted while it is still at src
+        slot = dest + 1 if dest > src else dest
+        self._commit(self._plan_move(self.tasks[src], slot))
+
+    def move_many(self, indices, dest):
+        """
+        Moves several tasks as one block, keeping their relative order, so
+        they end up right before the task currently at dest (or at the end
+        if dest is past the last task).
+        """
+        moving = [self.tasks[i] for i in sorted(set(indices))]
+        moving_ids = {task["id"] for task in moving}
+        while dest < len(self.tasks) and self.tasks[dest]["id"] in moving_ids:
+            dest += 1
+        anchor = self.tasks[dest] if dest < len(self.tasks) else None
+
+        # Usually the whole block fits in the gap it lands in: one key each
+        keys = self._block_keys(anchor, moving_ids, len(moving))
+        if keys is not None:
+            changes = []
+            for task, key in zip(moving, keys):
+                if task["order"] == key:
+                    continue
+                change = Change(Change.MOVE, task=task, fields={"order": key},
+                                old={"order": task["order"]})
+                self._apply(change)
+                changes.append(change)
+            if changes:
+                self._notify(ChangeSet(changes))
+            return
+
+        changes = []
+        for task in moving:
+            slot = self.tasks.index_of(anchor) if anchor is not None else len(self.tasks)
+            # Apply each step right away so the next one sees the new layout
+            planned = self._plan_move(task, slot)
+            for change in planned:
+                self._apply(change)
+            changes.extend(planned)
+        if changes:
+            self._notify(ChangeSet(changes))
+
+    def _block_keys(self, anchor, moving_ids, count):
+        """
+        Keys for a block of `count` tasks moving right before anchor (None for
+        the end), or None if the gap there is too small and needs re-keying.
+        """
+        tasks = self.tasks
+        before = tasks.index_of(anchor) - 1 if anchor is not None else len(tasks) - 1
+        while before >= 0 and tasks[before]["id"] in moving_ids:
+            before -= 1
+        low = tasks[before]["order"] if before >= 0 else None
+        return self._keys_between(low, anchor["order"] if anchor is not None else None, count)
+
+    def remove_many(self, indices, source="user"):
+        """Removes the tasks at the given indexes as one change set."""
+        # Highest index first, as remove_completed does
+        changes = [Change(Change.REMOVE, index, self.tasks[index])
+                   for index in sorted(set(indices), reverse=True)]
+        if changes:
+            self._commit(changes, source)
+        return len(changes)
+
+    def remove_completed(self, source="user"):
+        """Removes every completed task and returns how many were removed."""
+        # Walk backwards so earlier indexes stay valid while replaying
+        changes = [Change(Change.REMOVE, index, task)
+                   for index, task in enumerate(self.tasks) if task.completed]
+        changes.reverse()
+        if changes:
+            self._commit(changes, source)
+        return len(changes)
+
+    def apply(self, changes, source="user"):
+        """Replays an externally built list of changes and notifies listeners."""
+        self._commit(changes, source)
+
+    # Order keys
+
+    def _plan_keys(self, index, count):
+        """
+        Picks `count` ascending order keys for new tasks in the gap before
+        index. Returns UPDATE changes for any neighbours that had to be
+        re-keyed to make room, plus the new keys.
+        """
+        tasks = self.tasks
+        n = len(tasks)
+        low = tasks[index - 1]["order"] if index > 0 else None
+        high = tasks[index]["order"] if index < n else None
+        keys = self._keys_between(low, high, count)
+        if keys is not None:
+            return [], keys
+
+        # No gap left: re-key the smallest window around index that has room
+        width = 1
+        while True:
+            lo, hi = max(0, index - width), min(n, index + width)
+            needed = hi - lo + count
+            low = tasks[lo - 1]["order"] if lo > 0 else tasks[0]["order"] - (needed + 1) * GAP
+            high = tasks[hi]["order"] if hi < n else tasks[n - 1]["order"] + (needed + 1) * GAP
+            if high - low > 2 * (needed + 1):
+                break
+            width *= 2
+
+        keys = spread_keys(low, high, needed)
+        split = index - lo
+        changes = []
+        for i, key in zip(range(lo, hi), keys[:split] + keys[split + count:]):
+            task = tasks[i]
+            changes.append(Change(Change.UPDATE, i, task, fields={"order": key},
+                                  old={"order": task["order"]}))
+        return changes, keys[split:split + count]
+
+    def _keys_between(self, low, high, count):
+        """
+        `count` ascending keys strictly between low and high (None for an
+        open end), or None if they are too close together.
+        """
+        if high is None:
+            if self.max_order is not None:
+                low = self.max_order if low is None else max(low, self.max_order)
+            start = low + GAP if low is not None else 0
+            return [start + i * GAP for i in range(count)]
+        if low is None:
+            return [high - (count - i) * GAP for i in range(count)]
+        if high - low > 2 * count:
+            return spread_keys(low, high, count)
+        return None
+
+    def _plan_move(self, task, slot):
+        """Changes that move a task into the gap before index slot."""
+        src = self.tasks.index_of(task)
+        if slot in (src, src + 1):
+            return []
+        old_order = task["order"]
+        changes, keys = self._plan_keys(slot, 1)
+        changes.append(Change(Change.MOVE, src, task, fields={"order": keys[0]},
+                              old={"order": old_order}))
+        return changes
+
+    # Internals
+
+    def _commit(self, changes, source="user"):
+        if len(changes) > 1 and all(c.kind == Change.REMOVE and c.task is not None
+                                    for c in changes):
+            self._remove_batch(changes)
+        else:
+            for change in changes:
+                self._apply(change)
+        self._notify(ChangeSet(changes, source))
+
+    def _apply(self, change):
+        tasks = self.tasks
+        if change.kind == Change.INSERT:
+            change.task = as_task(change.task)
+            change.index = tasks.insert_sorted(change.task)
+            self.by_id[change.task["id"]] = change.task
+        elif change.kind == Change.REMOVE:
+            if change.task is None:
+                change.task = tasks[change.index]
+            change.index = tasks.index_of(change.task)
+            tasks.pop(change.index)
+            self.by_id.pop(change.task["id"], None)
+        elif change.kind == Change.MOVE:
+            task = change.task
+            change.index = tasks.index_of(task)
+            tasks.pop(change.index)
+            task["order"] = change.fields["order"]
+            change.dest = tasks.insert_sorted(task)
+        elif change.kind == Change.UPDATE:
+            if change.task is None:
+                change.task = tasks[change.index]
+            # Re-keying leaves the list briefly out of order, so trust a
+            # recorded index that still points at the task before searching
+            index = change.index
+            if index is None or not 0 <= index < len(tasks) or tasks[index] is not change.task:
+                change.index = tasks.index_of(change.task)
+            change.task.update(change.fields)
+            if "order" in change.fields:
+                tasks.keys_changed()  # Re-keying keeps relative order
+        else:
+            raise ValueError(f"Unknown change kind: {change.kind}")
+
+    def _remove_batch(self, changes):
+        """Removes many tasks with one pass over the list instead of one pop each."""
+        # One pass to find every position beats a binary search per task
+        positions = {id(task): index for index, task in enumerate(self.tasks)}
+        for change in changes:
+            change.index = positions[id(change.task)]
+        # Replaying highest index first keeps every recorded index valid
+        changes.sort(key=lambda change: change.index, reverse=True)
+        self.tasks.remove_many([change.task for change in changes])
+        for change in changes:
+            self.by_id.pop(change.task["id"], None)
+
+    def _notify(self, changes):
+        for callback in list(self.listeners):
+            callback(changes)
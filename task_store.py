@@ -0,0 +1,79 @@
+import os
+
+
+class TaskStore:
+    """
+    Interface implemented by every task persistence backend.
+
+    The app loads the full list once, then hands every ChangeSet from the
+    model to record(). compact() writes the complete list, e.g. for the
+    "Save Tasks" button or when a backend decides its log has grown too long.
+    """
+
+    def exists(self):
+        """Returns True if the store already holds saved tasks."""
+        raise NotImplementedError
+
+    def load(self):
+        """Returns the saved tasks as a list of task dictionaries."""
+        raise NotImplementedError
+
+    def bounds(self):
+        """
+        (next_id, max_order) covering every saved task, or None if unknown.
+        Lets the app hand out ids and keys before loading has finished.
+        """
+        return None
+
+    def iter_batches(self, batch_size=500):
+        """Yields the saved tasks in order, batch_size at a time."""
+        tasks = self.load()
+        for start in range(0, len(tasks), batch_size):
+            yield tasks[start:start + batch_size]
+
+    def watched_paths(self):
+        """Files that other programs may change under us; empty if not watched."""
+        return ()
+
+    def changed_on_disk(self):
+        """True if watched_paths() changed since this store last read or wrote them."""
+        return False
+
+    def reload(self):
+        """Reads the saved tasks again after they were changed on disk."""
+        return self.load()
+
+    def record(self, changes):
+        """Persists one ChangeSet produced by the model."""
+        raise NotImplementedError
+
+    def compaction_due(self):
+        return False
+
+    def compact(self, tasks):
+        """Rewrites the store so it holds exactly `tasks`."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def open_task_store(backend="json", data_dir="data"):
+    """
+    Creates the store selected by the "storage" setting.
+    "json" is the snapshot + journal pair, "sqlite" a WAL-mode database
+    that imports the JSON files on first use.
+    """
+    snapshot_path = os.path.join(data_dir, "tasks.json")
+    journal_path = os.path.join(data_dir, "tasks.journal")
+
+    if backend == "sqlite":
+        from sqlite_store import SqliteTaskStore
+        return SqliteTaskStore(os.path.join(data_dir, "tasks.db"),
+                               legacy_paths=(snapshot_path, journal_path))
+    if backend == "json":
+        from task_journal import TaskJournal
+        return TaskJournal(snapshot_path, journal_path,
+                           cache_path=os.path.join(data_dir, "tasks.cache"),
+                           lock_path=os.path.join(data_dir, "tasks.lock"))
+    raise ValueError(f"Unknown storage backend: {backend}")
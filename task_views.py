@@ -0,0 +1,320 @@
+from bisect import bisect_left, bisect_right, insort
+from operator import attrgetter
+
+from order_keys import task_order
+from task_model import Change
+
+# View name -> label for the view picker; "manual" is the list's own drag order
+VIEWS = {
+    "manual": "Manual order",
+    "priority": "By priority",
+    "done_last": "Completed last",
+    "open": "Hide completed",
+    "created": "By creation",
+}
+PRIORITY_RANKS = {"high": 0, "medium": 1}  # Anything else groups with "normal"
+_KEY_FIELDS = ("order", "priority", "completed", "created")
+_KEY_FIELD_SET = frozenset(_KEY_FIELDS)
+
+
+def priority_rank(priority):
+    return PRIORITY_RANKS.get(priority, 2)
+
+
+def created_key(task):
+    """
+    (creation time, id) of a task. Tasks saved before creation times were
+    recorded come first, in id order, which is the order they were added.
+    """
+    return (task.created or 0, task.id)
+
+
+class SortedKeyList:
+    """
+    Sorted keys (e.g. (order, id) tuples) in blocks of up to 2 * BLOCK_SIZE,
+    like OrderedTaskList: adding, removing or finding a key bisects the
+    block maxima and then one block, and positional lookup bisects the
+    block offsets.
+    """
+
+    BLOCK_SIZE = 512
+
+    def __init__(self, keys=()):
+        self.reset(keys)
+
+    def reset(self, keys):
+        """Replaces the contents; views holding this list see the new keys."""
+        keys = sorted(keys)
+        self.blocks = [keys[i:i + self.BLOCK_SIZE] for i in range(0, len(keys), self.BLOCK_SIZE)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.length = len(keys)
+        self._starts = None  # Offset of each block; rebuilt after a change
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("key index out of range")
+        starts = self._offsets()
+        block = bisect_right(starts, index) - 1
+        return self.blocks[block][index - starts[block]]
+
+    def add(self, key):
+        self._starts = None
+        self.length += 1
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            return
+        block = min(bisect_left(self.maxes, key), len(self.blocks) - 1)
+        items = self.blocks[block]
+        insort(items, key)
+        self.maxes[block] = items[-1]
+        if len(items) > 2 * self.BLOCK_SIZE:
+            self.blocks[block:block + 1] = [items[:self.BLOCK_SIZE], items[self.BLOCK_SIZE:]]
+            self.maxes[block:block + 1] = [items[self.BLOCK_SIZE - 1], items[-1]]
+
+    def add_many(self, keys):
+        """Adds keys; a run past the current end (e.g. tasks streaming in) is appended in one go."""
+        keys = sorted(keys)
+        if not keys:
+            return
+        if self.blocks and keys[0] <= self.maxes[-1]:
+            for key in keys:
+                self.add(key)
+            return
+        self._starts = None
+        self.length += len(keys)
+        if self.blocks and len(self.blocks[-1]) < self.BLOCK_SIZE:
+            room = self.BLOCK_SIZE - len(self.blocks[-1])
+            self.blocks[-1].extend(keys[:room])
+            self.maxes[-1] = self.blocks[-1][-1]
+            keys = keys[room:]
+        for start in range(0, len(keys), self.BLOCK_SIZE):
+            block = keys[start:start + self.BLOCK_SIZE]
+            self.blocks.append(block)
+            self.maxes.append(block[-1])
+
+    def remove(self, key):
+        self._delete(*self._find(key))
+
+    def discard(self, key):
+        try:
+            location = self._find(key)
+        except ValueError:
+            return
+        self._delete(*location)
+
+    def _delete(self, block, offset):
+        items = self.blocks[block]
+        del items[offset]
+        self._starts = None
+        self.length -= 1
+        if items:
+            self.maxes[block] = items[-1]
+        else:
+            del self.blocks[block]
+            del self.maxes[block]
+
+    def index(self, key):
+        block, offset = self._find(key)
+        return self._offsets()[block] + offset
+
+    def _find(self, key):
+        block = bisect_left(self.maxes, key)
+        if block < len(self.blocks):
+            items = self.blocks[block]
+            offset = bisect_left(items, key)
+            if offset < len(items) and items[offset] == key:
+                return block, offset
+        raise ValueError(f"{key!r} is not in the list")
+
+    def _offsets(self):
+        if self._starts is None:
+            self._starts = []
+            start = 0
+            for block in self.blocks:
+                self._starts.append(start)
+                start += len(block)
+        return self._starts
+
+
+class TaskView:
+    """
+    One way of showing the list: groups of tasks one after another, read
+    as a sequence of tasks, plus what a filtered subset needs to be kept
+    in the same order (sort_key, sort_fields, shows).
+
+    The groups are the live SortedKeyLists of a TaskViews, so a view stays
+    current as the model changes and costs nothing to switch to.
+    """
+
+    def __init__(self, model, lists, group, key, sort_key, sort_fields, shows=None,
+                 reorderable=False):
+        self.model = model
+        self.lists = lists              # SortedKeyLists of the groups, in display order
+        self.group = group              # group(task) -> its SortedKeyList, or None if hidden
+        self.key = key                  # key(task) -> its entry in that list
+        self.sort_key = sort_key        # Orders a filtered subset the same way
+        self.sort_fields = sort_fields  # Fields whose change can move a task in the view
+        self.shows = shows              # shows(task) -> False for tasks the view hides
+        self.reorderable = reorderable  # True if dragging rows maps to the manual order
+
+    def __len__(self):
+        return sum(len(keys) for keys in self.lists)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        for keys in self.lists:
+            if index < len(keys):
+                entry = keys[index]
+                return self.model.by_id[entry[-1] if isinstance(entry, tuple) else entry]
+            index -= len(keys)
+        raise IndexError("task index out of range")
+
+    def __iter__(self):
+        by_id = self.model.by_id
+        for keys in self.lists:
+            for entry in keys:
+                yield by_id[entry[-1] if isinstance(entry, tuple) else entry]
+
+    def index_of(self, task):
+        """Row of a task in the view, or None if the view hides it."""
+        keys = self.group(task)
+        if keys is None:
+            return None
+        try:
+            index = keys.index(self.key(task))
+        except ValueError:
+            return None
+        for earlier in self.lists:
+            if earlier is keys:
+                return index
+            index += len(earlier)
+        return None
+
+
+class TaskViews:
+    """
+    Sorted and grouped views of the model, kept up to date like SearchIndex.
+
+    Open and completed tasks, and tasks of each priority, are kept in
+    buckets of (order key, id) entries sorted in list order, and every task
+    in a bucket of (creation time, id) entries (see created_key). The buckets subscribe
+    to the model and follow each ChangeSet: adding, removing, completing,
+    re-prioritizing or moving a task takes its entries out of the buckets
+    it was in and adds them where it belongs now, each a bisect into one
+    block. Nothing is sorted again after loading, so a view is ready as
+    soon as it is picked, and view(name) never copies the list.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.by_priority = [SortedKeyList() for _ in range(3)]  # High, medium, the rest
+        self.by_status = {False: SortedKeyList(), True: SortedKeyList()}  # Keyed by completed
+        self.by_created = SortedKeyList()  # created_key of every task
+        self.rebuild()
+        model.subscribe(self.on_changes)
+
+    def rebuild(self):
+        """Refills the buckets in place, e.g. after a reset, so existing views stay valid."""
+        tasks = list(self.model)
+        for rank, keys in enumerate(self.by_priority):
+            keys.reset((task.order, task.id) for task in tasks
+                       if priority_rank(task.priority) == rank)
+        for completed, keys in self.by_status.items():
+            keys.reset((task.order, task.id) for task in tasks
+                       if bool(task.completed) == completed)
+        self.by_created.reset(map(created_key, tasks))
+
+    def on_changes(self, changes):
+        # Tasks touched more than once in a set move straight from where they
+        # were before it to where they are after it. Each change's `old` holds
+        # the fields it changed; fields no change in the set touched are
+        # still as they were
+        touched = {}  # id(task) -> [task, fields before the set (None if inserted), present after]
+        for change in changes:
+            kind = change.kind
+            if kind == Change.RESET:
+                self.rebuild()
+                return
+            task = change.task
+            if kind in (Change.UPDATE, Change.MOVE) and _KEY_FIELD_SET.isdisjoint(change.fields):
+                continue
+            entry = touched.get(id(task))
+            if entry is None:
+                entry = touched[id(task)] = [task, None if kind == Change.INSERT else {}, True]
+            before = entry[1]
+            if before is not None and change.old:
+                for field, value in change.old.items():
+                    before.setdefault(field, value)
+            entry[2] = kind != Change.REMOVE
+
+        added = []
+        for task, before, present in touched.values():
+            if before is None:
+                if present:
+                    added.append(task)
+                continue
+            self._remove(task.id, *(before.get(field, getattr(task, field))
+                                    for field in _KEY_FIELDS))
+            if present:
+                self._add(task)
+        if added:
+            self._add_many(added)
+
+    def view(self, name):
+        """The TaskView called name (see VIEWS), or None for the manual order."""
+        model = self.model
+        by_order = attrgetter("order", "id")
+        priorities, status = self.by_priority, self.by_status
+        if name == "priority":
+            return TaskView(model, priorities,
+                            lambda task: priorities[priority_rank(task.priority)], by_order,
+                            lambda task: (priority_rank(task.priority), task.order),
+                            {"order", "priority"})
+        if name == "done_last":
+            return TaskView(model, [status[False], status[True]],
+                            lambda task: status[bool(task.completed)], by_order,
+                            lambda task: (bool(task.completed), task.order),
+                            {"order", "completed"})
+        if name == "open":
+            return TaskView(model, [status[False]],
+                            lambda task: None if task.completed else status[False], by_order,
+                            task_order, {"order"},
+                            shows=lambda task: not task.completed, reorderable=True)
+        if name == "created":
+            return TaskView(model, [self.by_created], lambda task: self.by_created,
+                            created_key, created_key, {"created"})
+        return None
+
+    def _add_many(self, tasks):
+        # Batched per bucket, so loaded batches (which arrive in list order) append in one go
+        for rank, keys in enumerate(self.by_priority):
+            keys.add_many((task.order, task.id) for task in tasks
+                          if priority_rank(task.priority) == rank)
+        for completed, keys in self.by_status.items():
+            keys.add_many((task.order, task.id) for task in tasks
+                          if bool(task.completed) == completed)
+        self.by_created.add_many(map(created_key, tasks))
+
+    def _add(self, task):
+        key = (task.order, task.id)
+        self.by_priority[priority_rank(task.priority)].add(key)
+        self.by_status[bool(task.completed)].add(key)
+        self.by_created.add(created_key(task))
+
+    def _remove(self, task_id, order, priority, completed, created):
+        # discard(): a task that never made it in (e.g. a duplicate id) is simply absent
+        key = (order, task_id)
+        self.by_priority[priority_rank(priority)].discard(key)
+        self.by_status[bool(completed)].discard(key)
+        self.by_created.discard((created or 0, task_id))
@@ -0,0 +1,79 @@
+from task_list_view import TaskListView
+from task_model import TaskModel
+
+
+class _App:
+    """The parts of TodoApp the filtered list reads."""
+
+    def __init__(self, model):
+        self.model = model
+        self.root = FakeRoot()
+
+    @property
+    def tasks(self):
+        return self.model.tasks
+
+
+def make_model(count, **fields):
+    """A model holding `count` open tasks named "task 0", "task 1", ..."""
+    model = TaskModel()
+    model.reset([dict({"text": f"task {i}", "completed": False, "priority": "normal"}, **fields)
+                 for i in range(count)])
+    return model
+
+
+class _Viewport:
+    def winfo_height(self):
+        return 100  # Five rows of 20 pixels
+
+
+def filtered_list(model, search_index, query, view=None, scan_batch=None):
+    """
+    A TaskListView showing the tasks that match `query`, subscribed to the
+    model, without any widgets: only the filtered subset is kept up to date.
+    With scan_batch, the subset is scanned that many tasks at a time; the
+    list's app.root runs the steps.
+    """
+    task_list = TaskListView.__new__(TaskListView)
+    task_list.app = _App(model)
+    task_list.top = 0
+    task_list.row_height = 20
+    task_list.viewport = _Viewport()
+    task_list.visible = None
+    task_list.scan = None
+    task_list._scan_timer = None
+    task_list.refresh = task_list.render = lambda: None
+    task_list.set_view(view)
+    if scan_batch is None:
+        task_list.set_filter(search_index.search(query), query.matches)
+    else:
+        task_list.scan_filter(search_index.scan(query, task_list.unfiltered, scan_batch),
+                              query.matches)
+    model.subscribe(task_list.apply)
+    return task_list
+
+
+def expected_rows(model, query, sort_key):
+    return sorted((task for task in model if query.matches(task)), key=sort_key)
+
+
+class FakeRoot:
+    """Stands in for Tk's root in after() scheduling: timers run when run_timers() is called."""
+
+    def __init__(self):
+        self.timers = {}
+        self.next_timer = 0
+
+    def after(self, delay_ms, callback):
+        self.next_timer += 1
+        self.timers[self.next_timer] = callback
+        return self.next_timer
+
+    def after_cancel(self, timer):
+        self.timers.pop(timer, None)
+
+    def run_timers(self):
+        timers, self.timers = self.timers, {}
+        for callback in timers.values():
+            callback()
+        return bool(timers)
@@ -0,0 +1,99 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from archive import TaskArchive
+
+
+def task(task_id, text):
+    return {"id": task_id, "text": text, "completed": True, "priority": "normal",
+            "order": task_id}
+
+
+class ArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.archive = TaskArchive(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def texts(self):
+        return [record["text"] for _, record in self.archive.iter_records()]
+
+    def segment_path(self):
+        (name,) = self.archive.segments()
+        return os.path.join(self.directory, name)
+
+    def test_append_and_iter_records(self):
+        self.archive.append([task(1, "a"), task(2, "b")])
+        self.archive.append([task(3, "c")])
+        records = list(self.archive.iter_records())
+        self.assertEqual([record["text"] for _, record in records], ["a", "b", "c"])
+        name = self.archive.segments()[0]
+        self.assertEqual([address for address, _ in records],
+                         [f"{name}:0", f"{name}:1", f"{name}:2"])
+        self.assertTrue(all("archived_at" in record for _, record in records))
+
+    def test_newest_month_first(self):
+        self.archive.append([task(1, "older")])
+        os.rename(self.segment_path(), os.path.join(self.directory, "tasks-2000-01.ndjson.gz"))
+        self.archive.append([task(2, "newer")])
+        with open(os.path.join(self.directory, "notes.txt"), "w") as file:
+            file.write("not a segment")
+        self.assertEqual(self.texts(), ["newer", "older"])
+
+    def test_nothing_archived(self):
+        self.archive.append([])
+        self.assertFalse(os.listdir(self.directory))
+        self.assertEqual(self.texts(), [])
+        self.assertEqual(self.archive.restored(), set())
+        self.assertEqual(list(TaskArchive(os.path.join(self.directory, "missing")).iter_records()),
+                         [])
+
+    def test_restored_records_are_skipped(self):
+        self.archive.append([task(1, "a"), task(2, "b"), task(3, "c")])
+        addresses = [address for address, _ in self.archive.iter_records()]
+        self.archive.mark_restored([addresses[1]])
+        self.assertEqual(self.texts(), ["a", "c"])
+        self.assertEqual(TaskArchive(self.directory).restored(), {addresses[1]})
+
+    def test_truncated_segment(self):
+        # An append cut short leaves a partial gzip member at the end
+        self.archive.append([task(1, "a"), task(2, "b")])
+        size = os.path.getsize(self.segment_path())
+        self.archive.append([task(3, "c")])
+        with open(self.segment_path(), "r+b") as file:
+            file.truncate(size + 12)
+        self.assertEqual(self.texts(), ["a", "b"])
+
+    def test_torn_last_line(self):
+        self.archive.append([task(1, "a")])
+        with gzip.open(self.segment_path(), "at", encoding="utf-8") as file:
+            file.write('{"id": 2, "text": "b", "compl')
+        self.assertEqual(self.texts(), ["a"])
+
+    def test_segment_that_is_not_gzip(self):
+        with open(os.path.join(self.directory, "tasks-2000-01.ndjson.gz"), "w") as file:
+            file.write('{"id": 1, "text": "plain"}\n')
+        self.archive.append([task(2, "b")])
+        self.assertEqual(self.texts(), ["b"])
+
+    def test_unarchive_marks_the_newest_record(self):
+        self.archive.append([task(1, "first time"), task(2, "other")])
+        self.archive.unarchive([1])  # Undone...
+        self.archive.append([task(1, "second time")])  # ... and archived again
+        self.assertEqual(self.texts(), ["other", "second time"])
+        self.archive.unarchive([1, 2])
+        self.assertEqual(self.texts(), [])
+
+    def test_unarchive_unknown_ids(self):
+        self.archive.append([task(1, "kept")])
+        self.archive.unarchive([7])
+        self.assertEqual(self.texts(), ["kept"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import shutil
+import tempfile
+import time
+import unittest
+
+from autosave import Autosaver
+from helpers import FakeRoot
+from task_model import TaskModel
+from task_store import open_task_store
+
+
+class FlakyStore:
+    """A store whose next writes fail, like a full disk."""
+
+    def __init__(self, store):
+        self.store = store
+        self.failures = 0
+        self.compacted = []  # Sizes of the lists compacted
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def record(self, changes):
+        self._maybe_fail()
+        self.store.record(changes)
+
+    def compact(self, tasks):
+        self._maybe_fail()
+        tasks = list(tasks)
+        self.compacted.append(len(tasks))
+        self.store.compact(tasks)
+
+    def _maybe_fail(self):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("No space left on device")
+
+
+class AutosaverTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        saved = TaskModel()
+        saved.reset([{"text": f"task {i}", "completed": False, "priority": "normal"}
+                     for i in range(6)])
+        store = open_task_store("json", self.data_dir)
+        store.compact(saved.tasks)
+        store.close()
+
+        self.store = FlakyStore(open_task_store("json", self.data_dir))
+        self.loading = False
+        self.statuses = []
+        self.root = FakeRoot()
+        self.model = TaskModel()
+        self.model.reset(self.store.load(), *self.store.bounds())
+        self.autosaver = Autosaver(self.root, self.store, lambda: self.model.tasks,
+                                   self.statuses.append, delay_ms=0,
+                                   is_loading=lambda: self.loading)
+        # As ListSession does: tasks streamed in are already saved
+        self.model.subscribe(lambda changes: changes.source != "load" and
+                             self.autosaver.enqueue(changes))
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def settle(self):
+        """Runs timers until the worker has nothing left in flight."""
+        deadline = time.monotonic() + 5
+        while self.root.run_timers() or self.autosaver.in_flight:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def saved_texts(self):
+        store = open_task_store("json", self.data_dir)
+        try:
+            return [task["text"] for task in store.load()]
+        finally:
+            store.close()
+
+    def test_writes_queued_changes(self):
+        self.model.update(0, text="edited")
+        self.model.remove_many([5])
+        self.settle()
+        self.autosaver.flush()
+        self.assertEqual(self.saved_texts(), ["edited"] + [f"task {i}" for i in range(1, 5)])
+        self.assertEqual(self.statuses[-1], "All changes saved")
+
+    def test_failed_write_rewrites_the_list(self):
+        self.store.failures = 1
+        self.model.update(0, text="lost write")
+        self.settle()
+        self.assertTrue(self.statuses[-1].startswith("Save failed"))
+        self.model.update(1, text="next edit")
+        self.settle()
+        self.assertEqual(self.store.compacted, [6])
+        self.autosaver.flush()
+        self.assertEqual(self.saved_texts()[:2], ["lost write", "next edit"])
+
+    def test_no_rewrite_while_loading(self):
+        # Only the first half has streamed in when a write fails
+        self.model.reset(self.saved_tasks()[:3], *self.store.bounds())
+        self.loading = True
+        self.store.failures = 1
+        self.model.update(0, text="lost write")
+        self.settle()
+        self.model.update(1, text="next edit")
+        self.settle()
+        self.assertEqual(self.store.compacted, [])
+        # The rest streams in; now the whole list can be written
+        self.model.insert_loaded(self.saved_tasks()[3:])
+        self.loading = False
+        self.autosaver.loaded()
+        self.settle()
+        self.assertEqual(self.store.compacted, [6])
+        self.autosaver.flush()
+        self.assertEqual(self.saved_texts(),
+                         ["lost write", "next edit"] + [f"task {i}" for i in range(2, 6)])
+
+    def test_closing_while_loading_records_the_failed_changes(self):
+        self.model.reset(self.saved_tasks()[:3], *self.store.bounds())
+        self.loading = True
+        self.store.failures = 1
+        self.model.update(0, text="lost write")
+        self.settle()
+        self.model.update(1, text="next edit")
+        self.autosaver.flush()
+        self.assertEqual(self.store.compacted, [])
+        self.assertEqual(self.saved_texts(),
+                         ["lost write", "next edit"] + [f"task {i}" for i in range(2, 6)])
+
+    def saved_tasks(self):
+        store = open_task_store("json", self.data_dir)
+        try:
+            return store.load()
+        finally:
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import cli
+from task_format import FORMAT
+from task_lists import ListManifest
+
+
+class CliTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+
+    def run_cli(self, *argv, stdin="", status=0):
+        """Runs a command; returns its stdout lines, checking the exit status."""
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err), \
+                mock.patch("sys.stdin", io.StringIO(stdin)):
+            result = cli.main(["--data-dir", self.data_dir, *argv])
+        self.assertEqual(result, status, err.getvalue())
+        self.errors = err.getvalue()
+        return out.getvalue().splitlines()
+
+    def listed(self, *query):
+        return [line.split(None, 1)[1] for line in self.run_cli("list", *query)]
+
+    def test_add_list_done_and_rm(self):
+        (first,) = self.run_cli("add", "Buy", "milk")
+        (second,) = self.run_cli("add", "Pay rent", "--priority", "high")
+        self.assertEqual(self.listed(), ["[ ] normal Buy milk", "[ ] high   Pay rent"])
+        self.assertEqual(self.run_cli("done", first), ["Updated 1 tasks"])
+        self.assertEqual(self.listed("is:done"), ["[x] normal Buy milk"])
+        self.assertEqual(self.listed("priority:high", "rent"), ["[ ] high   Pay rent"])
+        self.run_cli("done", "--undo", first)
+        self.run_cli("priority", "medium", first, second)
+        self.assertEqual(self.listed("is:open"), ["[ ] medium Buy milk", "[ ] medium Pay rent"])
+        self.assertEqual(self.run_cli("rm", first), ["Removed 1 tasks"])
+        self.assertEqual(self.listed(), ["[ ] medium Pay rent"])
+
+    def test_sqlite_backend(self):
+        with open(os.path.join(self.data_dir, "settings.json"), "w") as file:
+            json.dump({"storage": "sqlite"}, file)
+        (task_id,) = self.run_cli("add", "stored in sqlite")
+        self.run_cli("done", task_id)
+        self.assertEqual(self.listed(), ["[x] normal stored in sqlite"])
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, "tasks.db")))
+
+    def test_due_and_reminder(self):
+        self.run_cli("add", "Call", "--due", "2030-01-02 10:00", "--remind", "+1h")
+        self.assertEqual(self.listed(), ["[ ] normal Call  (due 2030-01-02 10:00)"])
+        # Noted in the manifest, for an app that doesn't have the list open
+        self.assertIsNotNone(ListManifest(self.data_dir).next_reminder())
+
+    def test_import_and_export(self):
+        self.run_cli("add", "existing")
+        lines = self.run_cli("import", stdin="one\n\n  two  \n")
+        self.assertEqual(lines, ["Imported 2 tasks"])
+        records = [{"text": "from json", "id": 1, "order": 5, "priority": None, "created": 123},
+                   "plain string"]
+        self.run_cli("import", "--format", "json", stdin=json.dumps(records))
+        self.assertEqual(self.run_cli("export", "--format", "lines"),
+                         ["existing", "one", "two", "from json", "plain string"])
+        exported = json.loads("\n".join(self.run_cli("export")))
+        self.assertEqual(len({task["id"] for task in exported}), 5)  # Ids handed out again
+        self.assertEqual(exported[3]["priority"], "normal")
+        self.assertEqual(exported[3]["created"], 123)  # Kept, as for a restored task
+        self.assertTrue(all("created" in task for task in exported))
+
+    def test_null_priority_in_a_hand_edited_file(self):
+        with open(os.path.join(self.data_dir, "tasks.json"), "w") as file:
+            json.dump([{"text": "edited", "completed": False, "priority": None}], file)
+        self.assertEqual(self.listed(), ["[ ] normal edited"])
+
+    def test_named_list(self):
+        manifest = ListManifest(self.data_dir)
+        manifest.add("Work")
+        manifest.save()
+        self.run_cli("--list", "Work", "add", "Send invoice")
+        self.assertEqual([line.split(None, 1)[1] for line in self.run_cli("--list", "Work", "list")],
+                         ["[ ] normal Send invoice"])
+        self.assertEqual(self.listed(), [])
+
+    def test_errors(self):
+        self.run_cli("add", "only")
+        cases = [(("done", "99"), "", "No task with id 99"),
+                 (("rm", "1", "98", "99"), "", "No task with id 98, 99"),
+                 (("add", "x", "--due", "someday"), "", "Unrecognized time"),
+                 (("import", "--format", "json"), "{not json", "Invalid JSON on stdin"),
+                 (("import", "--format", "json"), '{"text": "x"}', "Expected a JSON array"),
+                 (("--list", "Nowhere", "list"), "", "No list called 'Nowhere'")]
+        for argv, stdin, message in cases:
+            with self.subTest(argv):
+                self.assertEqual(self.run_cli(*argv, stdin=stdin, status=1), [])
+                self.assertIn(message, self.errors)
+        self.assertEqual(self.listed(), ["[ ] normal only"])  # Nothing was changed
+
+    def test_task_file_from_a_newer_version(self):
+        with open(os.path.join(self.data_dir, "tasks.json"), "w") as file:
+            file.write(json.dumps({"format": FORMAT, "version": 99}) + "\n[]")
+        self.run_cli("list", status=1)
+        self.assertIn("newer than this app supports", self.errors)
+
+    def test_usage_errors(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            cli.main(["--data-dir", self.data_dir, "priority", "urgent", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
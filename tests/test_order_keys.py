@@ -0,0 +1,115 @@
+import unittest
+
+from helpers import make_model
+from order_keys import GAP, OrderedTaskList, ensure_keys, key_between, spread_keys
+from task import Task
+
+
+def keyed_tasks(orders):
+    return [Task(f"task {i}", id=i + 1, order=order) for i, order in enumerate(orders)]
+
+
+class KeyTest(unittest.TestCase):
+    def test_key_between(self):
+        self.assertEqual(key_between(None, None), 0)
+        self.assertEqual(key_between(10, None), 10 + GAP)
+        self.assertEqual(key_between(None, 10), 10 - GAP)
+        self.assertEqual(key_between(10, 20), 15)
+        self.assertIsNone(key_between(10, 11))  # Adjacent: no room left
+
+    def test_spread_keys(self):
+        self.assertEqual(spread_keys(0, 100, 3), [25, 50, 75])
+
+    def test_ensure_keys_on_a_list_without_keys(self):
+        tasks = [{"text": "a"}, {"text": "b", "id": 7}, {"text": "c"}]
+        self.assertTrue(ensure_keys(tasks))
+        self.assertEqual([task["order"] for task in tasks], [0, GAP, 2 * GAP])
+        self.assertEqual([task["id"] for task in tasks], [8, 7, 9])  # Past the highest id in use
+
+    def test_ensure_keys_sorts_a_keyed_list(self):
+        tasks = [{"text": "b", "id": 2, "order": 5}, {"text": "a", "id": 1, "order": 1}]
+        self.assertFalse(ensure_keys(tasks))
+        self.assertEqual([task["text"] for task in tasks], ["a", "b"])
+
+
+class OrderedTaskListTest(unittest.TestCase):
+    def setUp(self):
+        OrderedTaskList.BLOCK_SIZE = 2  # Several blocks from a handful of tasks
+        self.addCleanup(setattr, OrderedTaskList, "BLOCK_SIZE", 512)
+        self.tasks = keyed_tasks(range(0, 100, 10))
+        self.list = OrderedTaskList(self.tasks)
+
+    def test_positions_and_lookup(self):
+        self.assertEqual(len(self.list), 10)
+        self.assertEqual(list(self.list), self.tasks)
+        self.assertIs(self.list[-1], self.tasks[-1])
+        for index, task in enumerate(self.tasks):
+            self.assertEqual(self.list.index_of(task), index)
+
+    def test_insert_and_pop_across_blocks(self):
+        new = [Task("new", id=20 + key, order=key) for key in (5, 5, 95, -1, 41)]
+        for task in new:
+            self.list.insert_sorted(task)
+        expected = sorted(self.tasks + new, key=lambda task: task.order)
+        self.assertEqual([task.order for task in self.list], [task.order for task in expected])
+        for task in new:
+            self.assertIs(self.list[self.list.index_of(task)], task)  # Equal keys included
+        self.assertIs(self.list.pop(0), new[3])
+        self.assertEqual(len(self.list), 14)
+        self.assertEqual(self.list.index_of(self.tasks[0]), 0)
+
+    def test_remove_many(self):
+        self.list.remove_many(self.tasks[::3])
+        self.assertEqual(list(self.list), [task for i, task in enumerate(self.tasks) if i % 3])
+
+    def test_out_of_range_index(self):
+        with self.assertRaises(IndexError):
+            self.list[10]
+        with self.assertRaises(IndexError):
+            self.list.pop(-11)
+
+    def test_task_not_in_the_list(self):
+        with self.assertRaises(ValueError):
+            self.list.index_of(Task("stranger", id=99, order=30))  # A key in use, another task
+        with self.assertRaises(ValueError):
+            OrderedTaskList().index_of(self.tasks[0])
+
+
+class ModelOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.model = make_model(6)
+        self.changes = []
+        self.model.subscribe(self.changes.append)
+
+    def texts(self):
+        return [task["text"] for task in self.model]
+
+    def test_move_changes_one_key(self):
+        self.model.move(0, 3)
+        self.assertEqual(self.texts(), ["task 1", "task 2", "task 3", "task 0", "task 4", "task 5"])
+        (change,) = self.changes[-1]
+        self.assertEqual(change.fields, {"order": self.model[3]["order"]})
+
+    def test_move_into_a_full_gap_rekeys_neighbours(self):
+        self.model.reset([{"text": f"task {i}", "completed": False, "priority": "normal",
+                           "order": i} for i in range(6)])
+        self.model.move(5, 1)
+        self.assertEqual(self.texts(), ["task 0", "task 5", "task 1", "task 2", "task 3", "task 4"])
+        orders = [task["order"] for task in self.model]
+        self.assertEqual(orders, sorted(set(orders)))
+        self.assertGreater(len(self.changes[-1]), 1)  # The move, plus the re-keyed neighbours
+
+    def test_move_many_keeps_the_block_together(self):
+        self.model.move_many([4, 1], 0)
+        self.assertEqual(self.texts(), ["task 1", "task 4", "task 0", "task 2", "task 3", "task 5"])
+        self.model.move_many([0, 1], 6)  # Past the end
+        self.assertEqual(self.texts(), ["task 0", "task 2", "task 3", "task 5", "task 1", "task 4"])
+
+    def test_move_out_of_range_does_nothing(self):
+        self.model.move(6, 0)
+        self.model.move(2, 2)
+        self.assertEqual(self.changes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
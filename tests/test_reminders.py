@@ -0,0 +1,117 @@
+import time
+import unittest
+
+from helpers import FakeRoot, make_model
+from reminders import ReminderScheduler, format_when, is_overdue, next_reminder, parse_when
+
+
+class ParseWhenTest(unittest.TestCase):
+    def test_relative(self):
+        self.assertEqual(parse_when("+30m", now=1000.5), 1000 + 30 * 60)
+        self.assertEqual(parse_when(" +2h ", now=0), 7200)
+        self.assertEqual(parse_when("+1 d", now=0), 86400)
+        self.assertEqual(parse_when("+1w", now=0), 7 * 86400)
+
+    def test_absolute(self):
+        when = parse_when("2025-07-01 09:30")
+        self.assertEqual(format_when(when), "2025-07-01 09:30")
+        self.assertEqual(parse_when("2025-07-01T09:30"), when)
+        self.assertEqual(format_when(parse_when("2025-07-01")), "2025-07-01 23:59")  # End of day
+
+    def test_empty_means_no_time(self):
+        self.assertIsNone(parse_when(""))
+        self.assertIsNone(parse_when("   "))
+
+    def test_unrecognized(self):
+        for text in ("tomorrow", "+3y", "+h", "2025-13-01", "2025-07-01 25:00", "07/01/2025"):
+            with self.subTest(text), self.assertRaisesRegex(ValueError, "Unrecognized time"):
+                parse_when(text)
+
+
+class TaskTimesTest(unittest.TestCase):
+    def test_next_reminder(self):
+        tasks = [{"text": "a", "completed": False, "remind_at": 300},
+                 {"text": "b", "completed": True, "remind_at": 100},  # Done: never fires
+                 {"text": "c", "completed": False, "remind_at": 200},
+                 {"text": "d", "completed": False, "remind_at": None},
+                 {"text": "e", "completed": False}]
+        self.assertEqual(next_reminder(tasks), 200)
+        self.assertIsNone(next_reminder(tasks[3:]))
+
+    def test_is_overdue(self):
+        self.assertTrue(is_overdue({"completed": False, "due": 100}, now=100))
+        self.assertFalse(is_overdue({"completed": False, "due": 101}, now=100))
+        self.assertFalse(is_overdue({"completed": True, "due": 50}, now=100))
+        self.assertFalse(is_overdue({"completed": False}, now=100))
+
+
+class ReminderSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.now = int(time.time())
+        self.model = make_model(4)
+        self.root = FakeRoot()
+        self.reminded, self.due = [], []
+        self.scheduler = ReminderScheduler(
+            self.root, self.model,
+            lambda tasks: self.reminded.append([task["text"] for task in tasks]),
+            lambda tasks: self.due.append([task["text"] for task in tasks]))
+
+    def test_nothing_scheduled_means_no_timer(self):
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertEqual(self.root.timers, {})
+
+    def test_past_times_fire_and_future_ones_wait(self):
+        self.model.update(0, remind_at=self.now - 60)
+        self.model.update(1, remind_at=self.now + 3600)
+        self.model.update(2, due=self.now - 1)
+        self.assertEqual(len(self.root.timers), 1)  # One timer, however many tasks
+        self.root.run_timers()
+        self.assertEqual(self.reminded, [["task 0"]])
+        self.assertEqual(self.due, [["task 2"]])
+        self.assertEqual(self.scheduler.next_time(), self.now + 3600)
+        self.assertEqual(len(self.root.timers), 1)  # Re-armed for task 1
+        self.root.run_timers()
+        self.assertEqual(self.reminded, [["task 0"]])
+
+    def test_completed_and_removed_tasks_do_not_fire(self):
+        self.model.update(0, remind_at=self.now - 60)
+        self.model.update(1, remind_at=self.now - 60)
+        self.model.toggle(0)
+        self.model.remove_many([1])
+        self.assertEqual(len(self.scheduler), 0)
+        self.root.run_timers()
+        self.assertEqual(self.reminded, [])
+
+    def test_rescheduled_task_fires_at_its_new_time(self):
+        self.model.update(0, remind_at=self.now + 3600)
+        self.model.update(0, remind_at=self.now - 1)
+        self.root.run_timers()
+        self.assertEqual(self.reminded, [["task 0"]])
+        self.assertIsNone(self.scheduler.next_time())
+
+    def test_mark_delivered(self):
+        sources = []
+        self.model.subscribe(lambda changes: sources.append(changes.source))
+        self.model.update(0, remind_at=self.now - 60)
+        task = self.model[0]
+        self.model.remove_many([0])
+        self.scheduler.mark_delivered([task])  # Removed meanwhile: nothing to clear
+        self.assertEqual(sources, ["user", "user"])
+        self.model.update(0, remind_at=self.now - 60)
+        self.scheduler.mark_delivered([self.model[0]])
+        self.assertEqual(sources[-1], "reminder")
+        self.assertIsNone(self.model[0].get("remind_at"))
+
+    def test_stale_entries_are_dropped(self):
+        for offset in range(200):
+            self.model.update(0, remind_at=self.now + 3600 + offset)
+        self.assertLessEqual(len(self.scheduler.heap), 2 * len(self.scheduler) + 64)
+
+    def test_stop(self):
+        self.model.update(0, remind_at=self.now - 60)
+        self.scheduler.stop()
+        self.assertEqual(self.root.timers, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import snapshot_cache
+from snapshot_cache import SnapshotCache
+from task import Task
+
+
+class SnapshotCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.snapshot_path = os.path.join(self.directory, "tasks.json")
+        self.cache = SnapshotCache(os.path.join(self.directory, "tasks.cache"))
+        # Dicts as parsed from JSON and Tasks as the model keeps them, with
+        # and without a creation time and extra fields
+        self.tasks = [{"text": f"task {i}", "completed": bool(i % 2), "priority": "normal",
+                       "id": i + 1, "order": i * 10} for i in range(5)]
+        self.tasks[1]["due"] = 1700000000
+        self.tasks.append(Task("model task", True, "high", 6, 50, 1690000000, {"remind_at": 1}))
+        self.write_snapshot("[]")
+        self.cache.write(self.snapshot_path, self.tasks)
+
+    def write_snapshot(self, text):
+        with open(self.snapshot_path, "w") as file:
+            file.write(text)
+
+    def test_round_trip(self):
+        cached = self.cache.read(self.snapshot_path)
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.bounds(), (7, 50))
+        tasks = cached.tasks()
+        self.assertTrue(all(type(task) is Task for task in tasks))
+        self.assertEqual([task.copy() for task in tasks],
+                         [task.copy() if type(task) is Task else task for task in self.tasks])
+
+    def test_chunks_are_read_as_they_are_consumed(self):
+        original = snapshot_cache.CHUNK_ROWS
+        snapshot_cache.CHUNK_ROWS = 2
+        self.addCleanup(setattr, snapshot_cache, "CHUNK_ROWS", original)
+        self.cache.write(self.snapshot_path, self.tasks)
+        batches = self.cache.read(self.snapshot_path).iter_batches()
+        self.assertEqual([task["id"] for task in next(batches)], [1, 2])
+        self.assertEqual([len(batch) for batch in batches], [2, 2])
+
+    def test_empty_list(self):
+        self.cache.write(self.snapshot_path, [])
+        cached = self.cache.read(self.snapshot_path)
+        self.assertEqual(cached.bounds(), (1, None))
+        self.assertEqual(cached.tasks(), [])
+
+    def test_missing_cache(self):
+        self.cache.clear()
+        self.assertIsNone(self.cache.read(self.snapshot_path))
+        self.cache.clear()  # Already gone: nothing to do
+
+    def test_snapshot_changed_since(self):
+        self.write_snapshot("[{}]")  # A different size
+        self.assertIsNone(self.cache.read(self.snapshot_path))
+
+    def test_snapshot_edited_in_place(self):
+        # Same size and mtime as when the cache was written: only the checksum tells
+        stat = os.stat(self.snapshot_path)
+        self.write_snapshot("{}")
+        os.utime(self.snapshot_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertIsNone(self.cache.read(self.snapshot_path))
+
+    def test_snapshot_missing(self):
+        os.remove(self.snapshot_path)
+        self.assertIsNone(self.cache.read(self.snapshot_path))
+
+    def test_corrupt_caches(self):
+        with open(self.cache.path, "rb") as file:
+            data = file.read()
+        header = snapshot_cache._HEADER
+        for name, corrupt in (("empty", b""),
+                              ("truncated header", data[:5]),
+                              ("other magic", b"XXXX" + data[4:]),
+                              ("other version", header.pack(snapshot_cache.MAGIC, 1, 0) +
+                               data[header.size:]),
+                              ("truncated metadata", data[:header.size + 3]),
+                              ("garbage metadata", data[:header.size] + b"\xff" * 64),
+                              ("truncated chunks", data[:-10])):
+            with self.subTest(name):
+                with open(self.cache.path, "wb") as file:
+                    file.write(corrupt)
+                self.assertIsNone(self.cache.read(self.snapshot_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from task_store import open_task_store
+
+
+class LegacyImportTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        shutil.rmtree(self.data_dir)
+
+    def open_store(self):
+        store = open_task_store("sqlite", self.data_dir)
+        self.stores.append(store)
+        return store
+
+    def write_json(self, data):
+        with open(os.path.join(self.data_dir, "tasks.json"), "w") as file:
+            json.dump(data, file)
+
+    def test_imports_once(self):
+        # The oldest format: a bare array of task texts
+        self.write_json(["a", "b"])
+        store = self.open_store()
+        tasks = store.load()
+        self.assertEqual([task["text"] for task in tasks], ["a", "b"])
+        store.compact([])  # Every task deleted or archived
+        store.close()
+        self.assertEqual(self.open_store().load(), [])
+
+    def test_unreadable_file_is_tried_again(self):
+        with open(os.path.join(self.data_dir, "tasks.json"), "w") as file:
+            file.write("[{")
+        self.assertEqual(self.open_store().load(), [])
+        self.stores.pop().close()
+        self.write_json([{"text": "fixed", "completed": False}])
+        self.assertEqual([task["text"] for task in self.open_store().load()], ["fixed"])
+
+    def test_without_json_files(self):
+        store = self.open_store()
+        store.compact([{"id": 1, "order": 1, "text": "kept", "completed": False,
+                        "priority": "normal"}])
+        store.close()
+        self.write_json(["not imported"])
+        self.assertEqual([task["text"] for task in self.open_store().load()], ["kept"])
+
+
+if __name__ == "__main__":
+    unittest.main()
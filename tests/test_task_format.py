@@ -0,0 +1,72 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import task_format
+from task_format import UnsupportedFormatError
+from task_store import open_task_store
+
+
+class MigrationTest(unittest.TestCase):
+    def test_bare_array_is_version_1(self):
+        version, tasks = task_format.load(io.StringIO(json.dumps(
+            ["plain", {"text": "no priority"}, {"text": "null", "priority": None}])))
+        self.assertEqual(version, 1)
+        self.assertEqual([(task["text"], task["priority"], task["completed"]) for task in tasks],
+                         [("plain", "normal", False), ("no priority", "normal", False),
+                          ("null", "normal", False)])
+        self.assertEqual([task["id"] for task in tasks], [1, 2, 3])
+        orders = [task["order"] for task in tasks]
+        self.assertEqual(orders, sorted(set(orders)))
+
+    def test_current_version_round_trip(self):
+        tasks = [{"text": "a", "completed": True, "priority": "high", "id": 4, "order": 7}]
+        version, loaded = task_format.load(io.StringIO(task_format.dumps(tasks)))
+        self.assertEqual((version, loaded), (task_format.VERSION, tasks))
+
+    def test_newer_version(self):
+        data = '{"format": "2do-tasks", "version": 3}\n[]'
+        with self.assertRaises(UnsupportedFormatError):
+            task_format.load(io.StringIO(data))
+
+    def test_not_a_task_file(self):
+        with self.assertRaises(UnsupportedFormatError):
+            task_format.load(io.StringIO('{"theme": "dark"}\n[]'))
+
+
+class StoreMigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.data_dir, "tasks.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_old_file_is_backed_up_and_upgraded(self):
+        with open(self.path, "w") as file:
+            json.dump(["a", "b"], file)
+        store = open_task_store("json", self.data_dir)
+        self.assertEqual([task["text"] for task in store.load()], ["a", "b"])
+        store.close()
+        self.assertEqual(task_format.file_version(self.path), task_format.VERSION)
+        self.assertTrue(os.path.exists(self.path + ".v1.bak"))
+
+    def test_newer_file_is_left_untouched(self):
+        data = '{"format": "2do-tasks", "version": 3}\n[{"text": "from the future"}]'
+        with open(self.path, "w") as file:
+            file.write(data)
+        store = open_task_store("json", self.data_dir)
+        with self.assertRaises(UnsupportedFormatError):
+            next(store.iter_batches(), None)  # How the app reads the first batch
+        store.close()
+        with open(self.path) as file:
+            self.assertEqual(file.read(), data)
+        written = set(os.listdir(self.data_dir)) - {"tasks.json", "tasks.lock"}
+        self.assertEqual(written, set())  # No journal, cache or backup
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from autosave import freeze_changes
+from task import new_task
+from task_model import TaskModel
+from task_store import open_task_store
+
+
+class StoreRoundTrip:
+    """Edits recorded through a store come back the same from a fresh store on the same files."""
+
+    BACKEND = None
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.stores = []
+        self.store = self.open_store()
+        self.model = self.open_model(self.store)
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        shutil.rmtree(self.data_dir)
+
+    def open_store(self):
+        store = open_task_store(self.BACKEND, self.data_dir)
+        self.stores.append(store)
+        return store
+
+    def open_model(self, store):
+        # Saves "user" changes like the autosaver, one record per change set
+        model = TaskModel()
+        model.reset(store.load(), *(store.bounds() or ()))
+        model.subscribe(lambda changes: store.record(freeze_changes(changes)))
+        return model
+
+    def edit(self, model):
+        # Every other task as saved before creation times were recorded
+        model.insert_many(0, [new_task(f"task {i}") if i % 2 else
+                              {"text": f"task {i}", "completed": False, "priority": "normal"}
+                              for i in range(6)])
+        model.update(1, text="renamed", priority="high")
+        model.toggle(2)
+        model.move_many([0, 3], 6)
+        model.remove_completed()
+
+    def assert_reloads(self, model):
+        tasks = self.open_store().load()
+        self.assertEqual(tasks, [task.copy() for task in model])
+        return tasks
+
+    def test_record_and_load(self):
+        self.edit(self.model)
+        tasks = self.assert_reloads(self.model)
+        self.assertEqual([task["text"] for task in tasks],
+                         ["renamed", "task 4", "task 5", "task 0", "task 3"])
+
+    def test_compact_then_record(self):
+        self.edit(self.model)
+        self.store.compact(self.model.tasks)
+        self.model.update(0, completed=True)
+        self.model.move(4, 0)
+        self.assert_reloads(self.model)
+        next_id, max_order = self.open_store().bounds()
+        self.assertGreater(next_id, max(task["id"] for task in self.model))
+        # Keys of removed tasks stay reserved, so the bound may be higher
+        self.assertGreaterEqual(max_order, max(task["order"] for task in self.model))
+
+    def test_batches_match_load(self):
+        self.edit(self.model)
+        self.store.compact(self.model.tasks)
+        batches = list(self.open_store().iter_batches(batch_size=2))
+        self.assertEqual([task for batch in batches for task in batch],
+                         [task.copy() for task in self.model])
+
+
+class JsonStoreTest(StoreRoundTrip, unittest.TestCase):
+    BACKEND = "json"
+
+    def test_batches_stream_past_a_journal_tail(self):
+        self.model.insert_many(0, [{"text": f"task {i}", "completed": False,
+                                    "priority": "normal"} for i in range(10)])
+        self.store.compact(self.model.tasks)
+        self.edit(self.model)  # Journaled on top of the snapshot
+        os.remove(os.path.join(self.data_dir, "tasks.cache"))
+        for warm_cache in (False, True):  # Parsed from the JSON, which writes the cache
+            store = self.open_store()
+            store.load = None  # Streaming must not fall back to a full load
+            batches = list(store.iter_batches(batch_size=3))
+            self.assertGreater(len(batches), 1)
+            streamed = sorted((task for batch in batches for task in batch),
+                              key=lambda task: task["order"])
+            self.assertEqual([dict(task) for task in streamed],
+                             [task.copy() for task in self.model], warm_cache)
+            self.assertEqual(store.bounds(), self.open_store().bounds())
+
+    def test_reload_after_another_instance_writes(self):
+        self.edit(self.model)
+        other = self.open_store()
+        other_model = self.open_model(other)
+        other_model.add({"text": "from elsewhere", "completed": False, "priority": "normal"})
+        self.assertTrue(self.store.changed_on_disk())
+        tasks = self.store.reload()
+        self.assertFalse(self.store.changed_on_disk())
+        self.assertEqual(tasks, [task.copy() for task in other_model])
+
+    def test_torn_record_is_dropped(self):
+        self.edit(self.model)
+        expected = [task.copy() for task in self.model]
+        self.store.close()
+        with open(os.path.join(self.data_dir, "tasks.journal"), "a") as file:
+            file.write('{"op": "update", "id": 1, "fie')  # Crashed mid-write
+        self.assertEqual(self.open_store().load(), expected)
+
+
+class SqliteStoreTest(StoreRoundTrip, unittest.TestCase):
+    BACKEND = "sqlite"
+
+
+if __name__ == "__main__":
+    unittest.main()
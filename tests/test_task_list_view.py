@@ -0,0 +1,97 @@
+import unittest
+
+from helpers import expected_rows, filtered_list, make_model
+from order_keys import task_order
+from search_index import Query, SearchIndex
+from task_merge import merge_tasks
+
+
+class FilteredListTest(unittest.TestCase):
+    def setUp(self):
+        self.model = make_model(5)
+        self.index = SearchIndex(self.model)
+        self.query = Query("task")
+        self.task_list = filtered_list(self.model, self.index, self.query)
+
+    def assert_rows(self):
+        rows = [task["text"] for task in self.task_list.visible]
+        self.assertEqual(rows, [task["text"] for task in
+                                expected_rows(self.model, self.query, task_order)])
+
+    def test_merge_that_edits_and_moves_a_task(self):
+        # On disk, task 0 got a new priority and moved to the end: an UPDATE
+        # and a MOVE of the same task in one change set
+        theirs = [task.copy() for task in self.model]
+        theirs[0]["priority"] = "high"
+        theirs[0]["order"] = theirs[-1]["order"] + 1
+        changes, conflicts, clashes = merge_tasks(self.model, theirs, {})
+        self.model.apply(changes, source="disk")
+        self.assert_rows()
+        self.assertEqual(self.task_list.visible[-1]["text"], "task 0")
+
+    def test_move_many_and_remove(self):
+        self.model.move_many([0, 2], 5)
+        self.assert_rows()
+        self.model.remove_many([1])
+        self.assert_rows()
+
+    def test_update_that_stops_matching(self):
+        self.model.update(3, text="something else")
+        self.assert_rows()
+        self.assertEqual(len(self.task_list.visible), 4)
+
+
+class ScannedFilterTest(unittest.TestCase):
+    """A filter matching most of the list, filled in ten tasks at a time."""
+
+    def setUp(self):
+        self.model = make_model(100)
+        self.index = SearchIndex(self.model)
+        self.query = Query("task")
+        self.task_list = filtered_list(self.model, self.index, self.query, scan_batch=10)
+
+    def assert_rows(self):
+        self.assertIsNone(self.task_list.scan)
+        self.assertEqual([task["text"] for task in self.task_list.visible],
+                         [task["text"] for task in expected_rows(self.model, self.query, task_order)])
+
+    def test_broad_query_is_scanned(self):
+        self.assertTrue(self.index.broad(self.query))
+        self.assertFalse(self.index.broad(Query("task 42")))
+        self.assertFalse(self.index.broad(self.query, within=list(self.model)[:5]))
+        batches = list(self.index.scan(self.query, self.model, batch_size=30))
+        self.assertEqual([len(batch) for batch in batches], [30, 30, 30, 10])
+        self.assertEqual([task for batch in batches for task in batch],
+                         self.index.search(self.query))
+
+    def test_first_rows_before_the_rest(self):
+        # The window holds five rows plus the overscan; one batch fills it
+        self.assertEqual(len(self.task_list.visible), 10)
+        while self.task_list.app.root.run_timers():
+            pass
+        self.assert_rows()
+
+    def test_scrolling_takes_the_batches_it_shows(self):
+        self.task_list.scroll_to(40 * 20)
+        self.assertGreaterEqual(len(self.task_list.visible), 46)
+        self.assertEqual(self.task_list.top, 40 * 20)
+        self.task_list.finish_scan()
+        self.assert_rows()
+        self.assertFalse(self.task_list.app.root.timers)
+
+    def test_change_while_scanning(self):
+        self.model.update(50, text="something else")
+        self.model.add({"text": "task 100", "completed": False, "priority": "normal"})
+        self.assert_rows()
+        self.assertFalse(self.task_list.app.root.timers)
+        self.assertEqual(len(self.task_list.visible), 100)
+
+    def test_new_filter_stops_the_scan(self):
+        self.task_list.set_filter(self.index.search(Query("task 42")), Query("task 42").matches)
+        self.assertIsNone(self.task_list.scan)
+        self.assertFalse(self.task_list.app.root.timers)
+        self.assertEqual(len(self.task_list.visible), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
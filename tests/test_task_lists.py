@@ -0,0 +1,114 @@
+import contextlib
+import io
+import shutil
+import tempfile
+import time
+import unittest
+
+import cli
+from helpers import FakeRoot
+from task_lists import DEFAULT_LIST, ListManifest, ListSession
+
+SETTINGS = {"storage": "json", "autosave_delay_ms": 0}
+
+
+class ListSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.root = FakeRoot()
+        self.sessions = []
+
+    def tearDown(self):
+        for session in self.sessions:
+            session.close()
+        shutil.rmtree(self.data_dir)
+
+    def open_session(self, list_id="tasks", directory=None):
+        entry = {"name": list_id.title(), "dir": directory or self.data_dir, "count": None}
+        session = ListSession(self.root, list_id, entry, SETTINGS, lambda text: None,
+                              lambda tasks: None, lambda tasks: None)
+        self.sessions.append(session)
+        return session
+
+    def settle(self, session):
+        deadline = time.monotonic() + 5
+        while self.root.run_timers() or session.autosaver.in_flight:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def archived(self, session):
+        return [task["text"] for _, task in session.archive.iter_records()]
+
+    def test_undo_archive(self):
+        session = self.open_session()
+        model = session.model
+        model.insert_many(0, [{"text": text, "completed": text != "open", "priority": "normal"}
+                              for text in ("done 1", "open", "done 2")])
+        model.remove_completed(source="archive")
+        self.settle(session)
+        self.assertEqual(self.archived(session), ["done 1", "done 2"])
+
+        session.history.undo()
+        self.settle(session)
+        self.assertEqual([task["text"] for task in model], ["done 1", "open", "done 2"])
+        self.assertEqual(self.archived(session), [])  # Not offered for restoring twice
+
+        session.history.redo()
+        self.settle(session)
+        self.assertEqual(self.archived(session), ["done 1", "done 2"])
+        session.close()
+        self.sessions.remove(session)
+        self.assertEqual([task["text"] for task in self.open_session().store.load()], ["open"])
+
+
+class ReminderIndexTest(unittest.TestCase):
+    """The manifest's earliest reminder per list, for lists that aren't open."""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.manifest = ListManifest(self.data_dir)
+        self.work = self.manifest.add("Work")
+        self.manifest.save()
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_earliest_reminder_of_lists_not_open(self):
+        self.manifest.note_reminder(self.work, 2000)
+        self.manifest.note_reminder(self.work, 3000)  # Later than the one known
+        self.manifest.note_reminder(DEFAULT_LIST, 2500)
+        self.assertEqual(self.manifest.next_reminder(), (2000, self.work))
+        self.assertEqual(self.manifest.next_reminder(skip={self.work}), (2500, DEFAULT_LIST))
+        self.manifest.set_reminder(self.work, None)  # Delivered while the list was open
+        self.manifest.save()
+        self.assertEqual(ListManifest(self.data_dir).next_reminder(), (2500, DEFAULT_LIST))
+
+    def test_cli_notes_reminders(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            cli.main(["--data-dir", self.data_dir, "--list", "work", "add", "call", "--remind",
+                      "2030-01-01 09:00"])
+            cli.main(["--data-dir", self.data_dir, "add", "no reminder"])
+        when, list_id = ListManifest(self.data_dir).next_reminder()
+        self.assertEqual(list_id, self.work)
+        self.assertEqual(when, time.mktime(time.strptime("2030-01-01 09:00", "%Y-%m-%d %H:%M")))
+
+    def test_session_reports_its_next_reminder(self):
+        root = FakeRoot()
+        entry = self.manifest[self.work]
+        session = ListSession(root, self.work, entry, SETTINGS, lambda text: None,
+                              lambda tasks: None, lambda tasks: None)
+        try:
+            session.model.insert_many(0, [
+                {"text": "later", "completed": False, "priority": "normal", "remind_at": 5000},
+                {"text": "done", "completed": True, "priority": "normal", "remind_at": 10},
+                {"text": "sooner", "completed": False, "priority": "normal", "remind_at": 4000}])
+            self.assertEqual(session.reminders.next_time(), 4000)
+            session.model.toggle(2)
+            self.assertEqual(session.reminders.next_time(), 5000)
+        finally:
+            session.reminders.stop()
+            session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
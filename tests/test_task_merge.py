@@ -0,0 +1,98 @@
+import unittest
+
+from helpers import expected_rows, filtered_list
+from order_keys import task_order
+from search_index import Query, SearchIndex
+from task_merge import local_edits, merge_tasks
+from task_model import TaskModel
+from task_views import TaskViews
+
+TEXTS = ["buy milk", "call mum", "milk the cow", "pay rent", "write milk report", "walk dog"]
+
+
+def saved_tasks():
+    """The list as last saved, as two instances of the app would both load it."""
+    model = TaskModel()
+    model.reset([{"text": text, "completed": False, "priority": "normal"} for text in TEXTS])
+    return [task.copy() for task in model]
+
+
+class MergeTest(unittest.TestCase):
+    """Changes made on disk by another instance, merged into a model with everything subscribed."""
+
+    def setUp(self):
+        self.model = TaskModel()
+        self.model.reset(saved_tasks())
+        self.index = SearchIndex(self.model)
+        self.views = TaskViews(self.model)
+        self.query = Query("milk")
+        self.task_list = filtered_list(self.model, self.index, self.query)
+        self.pending = []  # Local changes not saved yet, as the autosaver queues them
+        self.model.subscribe(lambda changes: changes.source == "user" and
+                             self.pending.extend(changes))
+
+    def merge(self, theirs):
+        changes, conflicts, clashes = merge_tasks(self.model, theirs, local_edits(self.pending))
+        self.model.apply(changes, source="disk")
+        return conflicts, clashes
+
+    def theirs(self):
+        return {task["id"]: task for task in saved_tasks()}
+
+    def assert_consistent(self):
+        tasks = list(self.model)
+        self.assertEqual(tasks, sorted(tasks, key=task_order))
+        self.assertEqual(len({task["id"] for task in tasks}), len(tasks))
+        self.assertEqual(self.index.search(self.query),
+                         [task for task in tasks if self.query.matches(task)])
+        self.assertEqual(self.task_list.visible,
+                         expected_rows(self.model, self.query, task_order))
+        for name in ("priority", "done_last", "open", "created"):
+            view = self.views.view(name)
+            shown = [task for task in tasks if view.shows is None or view.shows(task)]
+            self.assertEqual(list(view), sorted(shown, key=view.sort_key), name)
+
+    def test_their_edits_moves_and_removals(self):
+        theirs = self.theirs()
+        theirs[1]["text"] = "buy oat milk"
+        theirs[1]["priority"] = "high"
+        theirs[3]["order"] = theirs[6]["order"] + 1  # "milk the cow" to the end
+        theirs[5]["completed"] = True
+        del theirs[2]
+        theirs[7] = {"id": 7, "text": "milk shake", "completed": False, "priority": "medium",
+                     "order": theirs[3]["order"] + 1}
+        self.assertEqual(self.merge(list(theirs.values())), (0, 0))
+        self.assertEqual([task["text"] for task in self.model],
+                         ["buy oat milk", "pay rent", "write milk report", "walk dog",
+                          "milk the cow", "milk shake"])
+        self.assert_consistent()
+
+    def test_local_edits_are_kept(self):
+        self.model.update(0, text="buy almond milk")
+        self.model.add({"text": "milk run", "completed": False, "priority": "normal"})
+        theirs = self.theirs()
+        theirs[1]["text"] = "buy goat milk"  # Both sides edited the text: ours wins
+        theirs[1]["priority"] = "high"       # Only they changed the priority
+        theirs[7] = {"id": 7, "text": "their milk", "completed": False, "priority": "normal",
+                     "order": theirs[6]["order"] + 1}  # Same id as our new task
+        conflicts, clashes = self.merge(list(theirs.values()))
+        self.assertEqual((conflicts, clashes), (1, 1))
+        first = self.model[0]
+        self.assertEqual((first["text"], first["priority"]), ("buy almond milk", "high"))
+        texts = {task["text"] for task in self.model}
+        self.assertLessEqual({"milk run", "their milk"}, texts)
+        self.assertEqual(self.model.get(7)["text"], "their milk")
+        self.assert_consistent()
+
+    def test_removed_on_disk_while_edited_here(self):
+        self.model.update(2, completed=True)
+        theirs = self.theirs()
+        del theirs[3]
+        conflicts, clashes = self.merge(list(theirs.values()))
+        self.assertEqual(conflicts, 1)
+        self.assertIsNone(self.model.get(3))
+        self.assert_consistent()
+
+
+if __name__ == "__main__":
+    unittest.main()
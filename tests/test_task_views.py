@@ -0,0 +1,63 @@
+import unittest
+
+from helpers import make_model
+from task import new_task
+from task_merge import merge_tasks
+from task_views import TaskViews
+
+
+class TaskViewsTest(unittest.TestCase):
+    def setUp(self):
+        self.model = make_model(5)
+        self.views = TaskViews(self.model)
+
+    def assert_view(self, name):
+        view = self.views.view(name)
+        tasks = [task for task in self.model if view.shows is None or view.shows(task)]
+        self.assertEqual([task["text"] for task in view],
+                         [task["text"] for task in sorted(tasks, key=view.sort_key)])
+
+    def assert_all_views(self):
+        for name in ("priority", "done_last", "open", "created"):
+            self.assert_view(name)
+
+    def test_merge_that_reprioritizes_and_moves_a_task(self):
+        # An UPDATE then a MOVE of the same task: the MOVE's `old` only holds
+        # the order, the priority it was filed under comes from the UPDATE
+        theirs = [task.copy() for task in self.model]
+        theirs[0]["priority"] = "high"
+        theirs[0]["order"] = theirs[-1]["order"] + 1
+        changes, conflicts, clashes = merge_tasks(self.model, theirs, {})
+        self.model.apply(changes, source="disk")
+        self.assert_all_views()
+        self.assertEqual(sum(len(keys) for keys in self.views.by_priority), 5)
+
+    def test_complete_move_and_remove(self):
+        self.model.toggle(1)
+        self.model.set_priority(3, "medium")
+        self.model.move_many([1, 3], 0)
+        self.assert_all_views()
+        self.model.remove_completed()
+        self.assert_all_views()
+        self.assertEqual(len(self.views.view("created")), 4)
+
+    def test_created_view(self):
+        # make_model's tasks predate creation times; they come first, by id
+        self.model.insert_many(0, [new_task("new"), dict(new_task("restored"), created=1000)])
+        self.model.move(6, 0)
+        view = self.views.view("created")
+        self.assertEqual([task["text"] for task in view],
+                         [f"task {i}" for i in range(5)] + ["restored", "new"])
+        self.model.apply(merge_tasks(self.model, [dict(task.copy(), created=500)
+                                                  if task["text"] == "new" else task.copy()
+                                                  for task in self.model], {})[0], source="disk")
+        self.assertEqual(view[5]["text"], "new")
+        self.assert_all_views()
+
+    def test_reset(self):
+        self.model.reset([{"text": "only", "completed": True, "priority": "high"}])
+        self.assert_all_views()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from helpers import make_model
+from undo import UndoHistory
+
+
+class UndoHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.model = make_model(4)
+        self.history = UndoHistory(self.model)
+
+    def texts(self):
+        return [task["text"] for task in self.model]
+
+    def test_undo_and_redo_removal(self):
+        self.model.remove_many([1, 2])
+        self.assertTrue(self.history.undo())
+        self.assertEqual(self.texts(), ["task 0", "task 1", "task 2", "task 3"])
+        self.assertTrue(self.history.redo())
+        self.assertEqual(self.texts(), ["task 0", "task 3"])
+
+    def test_undo_and_redo_archive(self):
+        sources = []
+        self.model.subscribe(lambda changes: sources.append(changes.source))
+        self.model.toggle(1)
+        self.model.remove_completed(source="archive")
+        self.assertTrue(self.history.undo())
+        self.assertEqual(self.texts(), ["task 0", "task 1", "task 2", "task 3"])
+        self.assertTrue(self.history.redo())
+        self.assertEqual(self.texts(), ["task 0", "task 2", "task 3"])
+        self.assertTrue(self.history.undo())
+        # The session takes them out of the archive, puts them back, and out again
+        self.assertEqual(sources[-3:], ["unarchive", "rearchive", "unarchive"])
+        self.assertTrue(self.history.undo())  # The toggle
+        self.assertFalse(self.model[1]["completed"])
+
+if __name__ == "__main__":
+    unittest.main()
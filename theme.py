@@ -0,0 +1,92 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+# Colors per mode, worked out once instead of on every repaint
+PALETTES = {
+    "light": {
+        "bg": "#f0f0f0",
+        "fg": "#000000",
+        "entry_bg": "#ffffff",
+        "button_bg": "#e0e0e0",
+        "select_bg": "#cce4ff",
+        "overdue": "#ffd2a8",  # Orange for open tasks past their due date
+        "priority": {
+            "normal": "#f0f0f0",  # Normal priority tasks use the window background
+            "medium": "#fff8c4",  # Light yellow for medium priority
+            "high":   "#ffe4e4",  # Light red for high priority
+        },
+    },
+    "dark": {
+        "bg": "#1e1e1e",
+        "fg": "#ffffff",
+        "entry_bg": "#2d2d2d",
+        "button_bg": "#3a3a3a",
+        "select_bg": "#264f78",
+        "overdue": "#5c3a1a",  # Dark orange for overdue tasks in dark mode
+        "priority": {
+            "normal": "#2b2b2b",  # Dark grey for normal priority in dark mode
+            "medium": "#4a4420",  # Darker yellow for medium priority
+            "high":   "#4a2a2a",  # Darker red for high priority
+        },
+    },
+}
+
+
+class ThemeEngine:
+    """
+    Shared fonts and colors for the main window.
+
+    Widgets take the named `font` object instead of their own (family, size)
+    tuple, so a font change is one Tk call that every widget follows. Widgets
+    are registered with the palette roles of their color options, e.g.
+    register(entry, bg="entry_bg", fg="fg"), and apply() recolors all of them
+    in place in a single pass.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.font = tkfont.Font(root=root)  # A Tk named font, shared by reference
+        self.widgets = []  # (widget, {option: palette role}) pairs
+        self.font_spec = None
+        self.mode = None
+        self.colors = {}
+        self.priority_colors = {}
+
+    def apply(self, settings):
+        """
+        Switches to the font and mode in `settings`, recoloring every
+        registered widget. Returns True if the font changed.
+        """
+        font_spec = (settings["font_family"], settings["font_size"])
+        font_changed = font_spec != self.font_spec
+        if font_changed:
+            self.font_spec = font_spec
+            self.font.configure(family=font_spec[0], size=font_spec[1])
+
+        mode = "dark" if settings["dark_mode"] else "light"
+        if mode != self.mode:
+            self.mode = mode
+            palette = PALETTES[mode]
+            self.colors = {key: value for key, value in palette.items() if key != "priority"}
+            self.priority_colors = palette["priority"]
+            self.root.configure(bg=self.colors["bg"])
+            self.widgets = [(widget, roles) for widget, roles in self.widgets
+                            if widget.winfo_exists()]
+            for widget, roles in self.widgets:
+                self._paint(widget, roles)
+        return font_changed
+
+    def register(self, widget, **roles):
+        """Colors a widget from the palette now and whenever the mode changes."""
+        self.widgets.append((widget, roles))
+        self._paint(widget, roles)
+        return widget
+
+    def priority_color(self, priority):
+        return self.priority_colors.get(priority, self.colors["bg"])
+
+    def _paint(self, widget, roles):
+        try:
+            widget.configure(**{option: self.colors[role] for option, role in roles.items()})
+        except tk.TclError:
+            pass  # Destroyed since it was registered
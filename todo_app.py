@@ -1,84 +1,445 @@
 import tkinter as tk
 import json
 import os
-from settings_window import SettingsWindow
+import time
+from file_watcher import FileWatcher
+from reminders import ReminderScheduler, format_when, is_overdue, next_reminder, parse_when
+from search_index import Query
+from selection import Selection
+from task_list_view import TaskListView
+from task_lists import ListCache, ListManifest, ListSession, append_tasks
+from task_loader import ProgressiveLoader
+from task import new_task
+from task_format import UnsupportedFormatError
+from task_merge import local_edits, merge_tasks
+from task_store import open_task_store
+from task_views import VIEWS
+from theme import ThemeEngine
 
 
 class TodoApp:
+    LOAD_BATCH_SIZE = 500  # Tasks inserted per step while loading progressively
+    REMINDER_RETRY_MS = 200  # Wait for a list to load before opening the next for a reminder
+    SETTINGS_PATH = "data/settings.json"
+
     def __init__(self, root):
         self.root = root
         self.root.title("2do App")
 
-        self.tasks = []  # List to store task dictionaries
+        self.current_task = None  # Last task clicked; target of keyboard moves
+        self.selection = Selection()  # Tasks picked with Ctrl/Shift-click for bulk actions
+        self.reminder_window = None
+        self._reminder_timer = None  # Armed for the next reminder of a list that isn't open
+        self.query = Query("")  # Active filter; empty shows every task
+        self._filter_timer = None
         
         # Default settings
         self.settings = {
             "font_family": "TkDefaultFont",
             "font_size": 10,
-            "dark_mode": False
+            "dark_mode": False,
+            "storage": "json",  # "json" (snapshot + journal) or "sqlite"
+            "autosave_delay_ms": 1000,  # Quiet period before queued edits are written
+            "view": "manual"  # How the list is sorted or grouped; see task_views.VIEWS
         }
 
         self.load_settings()
+        # Other instances, sync tools or scripts may edit the files while we run
+        self.watcher = FileWatcher(self.root)
+        self.settings_watch = self.watcher.watch([self.SETTINGS_PATH],
+                                                 self.on_settings_file_changed)
+
+        # Named lists, each stored in a shard of its own; only the one on
+        # screen and the few used before it are loaded (see task_lists)
+        self.manifest = ListManifest()
+        self.lists = ListCache()
+        self.session = None  # ListSession of the list on screen
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.filter_var = tk.StringVar()  # Text of the filter box
+        self.filter_var.trace_add("write", lambda *args: self.schedule_filter())
+
+        self.theme = ThemeEngine(self.root)  # Shared font and palette; restyles widgets in place
         self.apply_theme()
         self.create_widgets()
-        self.load_tasks()
+        self.switch_list(self.manifest.active)
+        self.arm_list_reminders()  # Catches up on reminders of the other lists, too
+
+    # The list on screen; each open list has its own store, model, autosaver
+    # (edits are batched and written on a worker thread after a quiet
+    # period), archive, search index, undo history and reminder timer
+
+    @property
+    def model(self):
+        return self.session.model
+
+    @property
+    def store(self):
+        return self.session.store
+
+    @property
+    def autosaver(self):
+        return self.session.autosaver
+
+    @property
+    def archive(self):
+        return self.session.archive
+
+    @property
+    def search_index(self):
+        return self.session.search_index
+
+    @property
+    def history(self):
+        return self.session.history
+
+    @property
+    def loader(self):
+        return self.session.loader
+
+    @property
+    def tasks(self):
+        return self.model.tasks
+
+    def on_tasks_changed(self, changes):
+        # Subscribed to the model of the list on screen only; saving is up to its session
+        if len(self.selection):
+            self.selection.discard_removed(changes)
+            self.update_selection_status()
+
+        # Only the rows named in the change set are touched
+        self.task_list.apply(changes)
+
+    def set_save_status(self, text):
+        if hasattr(self, "status_label") and self.status_label.winfo_exists():
+            self.status_label.configure(text=text)
+
+    def on_save_status(self, session, text):
+        # Lists off screen keep saving in the background without a word
+        if session is self.session:
+            self.set_save_status(text)
+
+    def on_close(self):
+        # Write anything still queued, in every open list, before the window goes away
+        self.watcher.stop()
+        for session in self.lists:
+            self.remember_session(session)
+            session.close()
+        self.manifest.save()
+        self.root.destroy()
+
+    # Lists
+
+    def open_list(self, list_id):
+        """The session of a list, opened and loading if it wasn't in the cache."""
+        session = self.lists.get(list_id)
+        if session is not None:
+            return session
+        session = ListSession(self.root, list_id, self.manifest[list_id], self.settings,
+                              lambda text: self.on_save_status(session, text),
+                              lambda tasks: self.on_reminders_due(session, tasks),
+                              lambda tasks: self.on_tasks_overdue(session, tasks))
+        self.load_tasks(session)
+        evicted = self.lists.add(session)
+        for old in evicted:
+            self.remember_session(old)
+            old.close()
+        if evicted:
+            self.arm_list_reminders()  # The manifest has their reminders again
+        return session
+
+    def remember_session(self, session):
+        """Notes a list's task count and next reminder in the manifest, for while it is closed."""
+        when = session.reminders.next_time()
+        if session.loader is None:
+            self.manifest.set_count(session.id, len(session.model))
+            self.manifest.set_reminder(session.id, when)
+        else:
+            self.manifest.note_reminder(session.id, when)  # Only part of the list is known
 
-    def priority_color(self, task):
-        base = self.root.cget("bg")  # Get the default background color of the root window
-        if self.settings["dark_mode"]:
-            colors = {
-                "normal": "#2b2b2b",       # Dark grey for normal priority in dark mode
-                "medium": "#4a4420",       # Darker yellow for medium priority
-                "high":   "#4a2a2a",       # Darker red for high priority
-            }
+    def arm_list_reminders(self):
+        """
+        Points one timer at the earliest reminder of the lists that aren't
+        open, as the manifest knows them; open lists have their own schedulers.
+        """
+        if self._reminder_timer is not None:
+            self.root.after_cancel(self._reminder_timer)
+            self._reminder_timer = None
+        upcoming = self.manifest.next_reminder(skip={session.id for session in self.lists})
+        if upcoming is not None:
+            delay = max(0, int((upcoming[0] - time.time()) * 1000))
+            self._reminder_timer = self.root.after(min(delay, ReminderScheduler.MAX_DELAY_MS),
+                                                   self.on_list_reminder_due)
+
+    def on_list_reminder_due(self):
+        self._reminder_timer = None
+        if any(session.loader is not None for session in self.lists):
+            # One list at a time: opening another could evict this one before it fires
+            self._reminder_timer = self.root.after(self.REMINDER_RETRY_MS, self.on_list_reminder_due)
+            return
+        upcoming = self.manifest.next_reminder(skip={session.id for session in self.lists})
+        if upcoming is not None and upcoming[0] <= time.time():
+            # Opened in the background: its scheduler fires the reminder as the
+            # tasks stream in, and the list on screen stays the most recent
+            self.open_list(upcoming[1])
+            self.lists.get(self.session.id)
+        self.arm_list_reminders()
+
+    def switch_list(self, list_id):
+        """
+        Puts another list on screen. Only its visible rows are realized, so
+        switching costs the same whatever the size of either list; a list
+        still in the cache comes back as it was left, scroll position included.
+        """
+        previous = self.session
+        if previous is not None:
+            if previous.id == list_id:
+                return
+            previous.top = self.task_list.top
+            previous.model.unsubscribe(self.on_tasks_changed)
+            if previous.watch is not None:
+                self.watcher.unwatch(previous.watch)
+                previous.watch = None
+            self.remember_session(previous)
+
+        self.session = session = self.open_list(list_id)
+        session.model.subscribe(self.on_tasks_changed)
+        if session.store.watched_paths():
+            session.watch = self.watcher.watch(session.store.watched_paths(),
+                                               self.on_task_files_changed)
+        self.manifest.active = list_id
+        self.manifest.save()
+
+        self.current_task = None
+        self.selection.clear()
+        self.update_selection_status()
+        self.show_view()
+        self.task_list.scroll_to(session.top)
+        self.progress_label.configure(text="" if session.loader is None else
+                                      f"Loading… {session.loader.loaded:,} tasks")
+        if session.load_error is not None:
+            self.set_save_status(f"Not saved: {session.load_error}")
         else:
-            colors = {
-                "normal": base,       # Normal priority tasks use the default background
-                "medium": "#fff8c4",  # Light yellow for medium priority
-                "high":   "#ffe4e4",  # Light red for high priority
-            }
-        # Return the color for the given priority, defaulting to 'normal' if not specified,
-        # and falling back to 'base' if the priority is not in the colors map.
-        return colors.get(task.get("priority", "normal"), base)
-
-    def load_tasks(self):
+            self.set_save_status("Saving…" if session.autosaver.busy() else "All changes saved")
+        self.update_list_menu()
+
+    def list_label(self, list_id):
+        entry = self.manifest[list_id]
+        session = self.lists.sessions.get(list_id)
+        count = len(session.model) if session is not None and session.loader is None else entry["count"]
+        return entry["name"] if count is None else f"{entry['name']} ({count:,})"
+
+    def update_list_menu(self):
+        # Rebuilt whenever the switcher opens, so the counts are current
+        menu = self.list_menu["menu"]
+        menu.delete(0, tk.END)
+        for list_id in self.manifest:
+            menu.add_command(label=self.list_label(list_id),
+                             command=lambda list_id=list_id: self.switch_list(list_id))
+        self.list_var.set(self.list_label(self.session.id))
+
+    def new_list(self):
+        from tkinter import messagebox, simpledialog
+        name = simpledialog.askstring("New list", "Name of the new list:", parent=self.root)
+        if name is None:
+            return
+        try:
+            list_id = self.manifest.add(name)
+        except ValueError as error:
+            messagebox.showerror("New list", str(error), parent=self.root)
+            return
+        self.switch_list(list_id)  # Saves the manifest
+
+    def move_selected_to_list(self, list_id):
         """
-        Loads tasks from the 'data/tasks.json' file.
-        If the file doesn't exist, it creates the directory and starts with an empty list.
-        Handles cases where tasks are strings or missing the 'priority' key.
+        Moves the selected tasks to the end of another list. Only the two
+        lists' own files are written: the removal here, and one appended
+        record in the other list, which is not loaded for it if it isn't open.
+        Neither side is an undo step, as undo can only reach this list.
         """
-        file_path = "data/tasks.json"
+        indices = sorted(self.selected_indices())
+        moved = [{key: value for key, value in self.model[index].items()
+                  if key not in ("id", "order")} for index in indices]
+        target = self.lists.sessions.get(list_id)
+        if target is not None:
+            target.model.insert_many(len(target.model), moved, source="move")
+        else:
+            entry = self.manifest[list_id]
+            os.makedirs(entry["dir"], exist_ok=True)
+            store = open_task_store(self.settings["storage"], entry["dir"])
+            try:
+                append_tasks(store, moved)
+            finally:
+                store.close()
+            self.manifest.note_reminder(list_id, next_reminder(moved))
+        self.model.remove_many(indices, source="move")
+
+        count = self.manifest[list_id]["count"]
+        if target is not None and target.loader is None:
+            count = len(target.model)
+        elif count is not None:
+            count += len(moved)
+        self.manifest.set_count(list_id, count)
+        if self.loader is None:
+            self.manifest.set_count(self.session.id, len(self.model))
+        self.manifest.save()
+        self.arm_list_reminders()
+        self.update_list_menu()
+        self.set_save_status(f"Moved {len(moved):,} tasks to {self.manifest[list_id]['name']}")
 
-        if not os.path.exists(file_path):
-            print("JSON file not found. Starting with empty list")
-            os.makedirs("data", exist_ok=True)
+    def priority_color(self, task):
+        # Open tasks past their due date stand out whatever their priority
+        if is_overdue(task, time.time()):
+            return self.theme.colors["overdue"]
+        # Palette lookup, defaulting to 'normal' if no priority is set; unknown
+        # priorities fall back to the window background
+        return self.theme.priority_color(task.get("priority", "normal"))
+
+    def on_tasks_overdue(self, session, tasks):
+        # Just passed their due date: recolor their rows if they are on screen
+        if session is not self.session:
+            return
+        for task in tasks:
+            index = self.task_list.index_of(task)
+            if index is not None:
+                self.task_list.repaint(index)
+
+    def on_reminders_due(self, session, tasks):
+        from reminder_window import ReminderWindow  # Imported on first use, not at startup
+        if self.reminder_window is None or not self.reminder_window.exists():
+            self.reminder_window = ReminderWindow(self.root, self.theme_colors)
+        self.reminder_window.add(tasks)
+        self.root.bell()
+        session.reminders.mark_delivered(tasks)
+
+    def ask_time(self, field, title):
+        """Asks for a due date or reminder time and sets it on the selected tasks."""
+        from tkinter import messagebox, simpledialog
+        tasks = [self.model.get(task_id) for task_id in self.selection.ids]
+        current = tasks[0].get(field) if len(tasks) == 1 else None
+        text = simpledialog.askstring(
+            title, "YYYY-MM-DD [HH:MM], or from now: +30m, +2h, +1d, +1w\n"
+                   "Leave empty to clear.",
+            initialvalue=format_when(current) if current is not None else "",
+            parent=self.root)
+        if text is None:
             return
-        
         try:
-            with open(file_path, "r") as file:
-                loaded_tasks = json.load(file)
-
-                for task in loaded_tasks:
-                    if isinstance(task, str):
-                        # Convert old string-based tasks to dictionary format
-                        self.tasks.append({"text": task, "completed": False, "priority": "normal"})
-                    else:
-                        # Ensure dictionary-based tasks have a priority key
-                        if "priority" not in task:
-                            task["priority"] = "normal"
-                        self.tasks.append(task)
-                
-                self.refresh_task_display()
+            when = parse_when(text)
+        except ValueError as error:
+            messagebox.showerror(title, str(error), parent=self.root)
+            return
+        self.set_selected(**{field: when})
+
+    def load_tasks(self, session):
+        """
+        Loads a list's tasks from its TaskStore ('tasks.json' plus its journal
+        by default, or 'tasks.db', in the list's directory).
+        If nothing is saved yet, it creates the directory and starts with an empty list.
+        Files saved by older versions are migrated once while loading (see task_format).
+        A file from a newer version, or one that isn't a task file, is reported
+        and left untouched: the list opens empty and nothing in it is saved.
+        """
+        store, model = session.store, session.model
+        if not store.exists():
+            print(f"No saved tasks found for {session.name}. Starting with empty list")
+            os.makedirs(session.entry["dir"], exist_ok=True)
+            return
+
+        # Show the first batch right away and stream the rest in from the event loop
+        batches = store.iter_batches(self.LOAD_BATCH_SIZE)
+        try:
+            first_batch = next(batches, [])
         except json.JSONDecodeError:
             print("Invalid JSON data in json file. Starting with empty list")
-    
+            return
+        except UnsupportedFormatError as error:
+            self.on_load_failed(session, error)
+            return
+
+        # Ids and keys still on disk are reserved so edits made meanwhile can't collide
+        model.reset(first_batch, *(store.bounds() or ()))  # Listeners repaint once
+        session.loader = ProgressiveLoader(self.root, model, self._guard_batches(session, batches),
+                                           lambda count: self.on_load_progress(session, count),
+                                           lambda count: self.on_load_done(session, count))
+        session.loader.start()
+
+    def _guard_batches(self, session, batches):
+        try:
+            yield from batches
+        except json.JSONDecodeError:
+            print("Invalid JSON data in json file. Keeping the tasks loaded so far")
+        except UnsupportedFormatError as error:
+            self.on_load_failed(session, error)
+
+    def on_load_failed(self, session, error):
+        from tkinter import messagebox
+        print(f"Can't read the tasks of {session.name}: {error}")
+        session.load_error = str(error)
+        messagebox.showerror("Can't read tasks",
+                             f"{error}.\n\nThe files of {session.name} are left as they are, "
+                             "and changes to the list won't be saved.", parent=self.root)
+
+    def on_load_progress(self, session, count):
+        if session is self.session:
+            self.progress_label.configure(text=f"Loading… {count:,} tasks")
+
+    def on_load_done(self, session, count):
+        session.loader = None
+        session.autosaver.loaded()
+        self.manifest.set_count(session.id, len(session.model))
+        if session is self.session:
+            self.progress_label.configure(text="")
+
     def save_tasks(self):
-        file_path = "data/tasks.json"
-        with open(file_path, "w") as file:
-            json.dump(self.tasks, file)
+        if self.session.load_error is not None:
+            self.set_save_status(f"Not saved: {self.session.load_error}")
+            return
+        # A full rewrite must not drop tasks that haven't streamed in yet
+        if self.loader is not None:
+            self.loader.finish()
+        # ... nor what someone else changed on disk, so merge that in first
+        if not self.autosaver.busy() and self.check_disk(then=self.save_tasks):
+            return
+        # Write the complete list (a fresh snapshot for the JSON backend) in the background
+        self.autosaver.save_all(self.tasks)
+
+    def on_task_files_changed(self):
+        if self.loader is not None or self.autosaver.busy():
+            return False  # Look again once loading and our own writes are done
+        self.check_disk()
+
+    def check_disk(self, then=None):
+        """
+        Starts a reload if someone else changed the task files since we last
+        read or wrote them; merge_from_disk(session, tasks, then) runs once
+        they are read. Returns True if a reload was started.
+        """
+        if not self.store.changed_on_disk():
+            return False
+        session = self.session
+        self.autosaver.reload(lambda tasks: self.merge_from_disk(session, tasks, then))
+        return True
+
+    def merge_from_disk(self, session, tasks, then=None):
+        """Applies the changes found on disk, keeping local edits that aren't saved yet."""
+        model, autosaver = session.model, session.autosaver
+        changes, conflicts, clashes = merge_tasks(model, tasks, local_edits(autosaver.pending))
+        if changes:
+            model.apply(changes, source="disk")  # Only the changed rows repaint
+            message = f"Merged {len(changes):,} changes from disk"
+            if conflicts:
+                message += f", kept {conflicts:,} local edits"
+            print(message)
+            self.on_save_status(session, message)
+        if clashes:
+            # Queued records still use ids that now belong to tasks from disk
+            autosaver.save_all(model.tasks)
+        if then is not None and session is self.session:
+            then()
 
     def load_settings(self):
-        file_path = "data/settings.json"
+        file_path = self.SETTINGS_PATH
         
         if not os.path.exists(file_path):
             print("Settings file not found. Using default settings.")
@@ -92,197 +453,441 @@ class TodoApp:
             print("Invalid JSON data in settings file. Using default settings.")
     
     def save_settings(self):
-        file_path = "data/settings.json"
+        file_path = self.SETTINGS_PATH
         os.makedirs("data", exist_ok=True)
         with open(file_path, "w") as file:
             json.dump(self.settings, file, indent=2)
+        self.settings_watch.accept()  # Our own write, not an external change
+
+    def on_settings_file_changed(self):
+        # Edited outside the app: apply it the same way as the settings window
+        self.load_settings()
+        self.apply_settings()
 
     def apply_theme(self):
-        if self.settings["dark_mode"]:
-            bg_color = "#1e1e1e"
-            fg_color = "#ffffff"
-            entry_bg = "#2d2d2d"
-            button_bg = "#3a3a3a"
-        else:
-            bg_color = "#f0f0f0"
-            fg_color = "#000000"
-            entry_bg = "#ffffff"
-            button_bg = "#e0e0e0"
-        
-        # Store theme colors for later use
-        self.theme_colors = {
-            "bg": bg_color,
-            "fg": fg_color,
-            "entry_bg": entry_bg,
-            "button_bg": button_bg
-        }
-        
-        # Apply to root window
-        self.root.configure(bg=bg_color)
+        """Applies font and colors from the settings; returns True if the font changed."""
+        font_changed = self.theme.apply(self.settings)
+        # Store theme colors for later use (e.g. by the settings window)
+        self.theme_colors = self.theme.colors
+        return font_changed
 
     def add_task(self):
         task_text = self.task_entry.get()
         if task_text:
-            task = {"text": task_text, "completed": False, "priority": "normal"}
-            self.tasks.append(task)
-            self.create_task_checkbox(task, len(self.tasks) - 1)
+            task = new_task(task_text)
+            # The model stores its own Task copy, so look the new task up by position
+            index = self.task_list.index_of(self.model[self.model.add(task)])
+            if index is not None:  # The filter may hide it
+                self.task_list.see(index)  # Scroll the new task into view
             self.task_entry.delete(0, tk.END)  # Clear the input field
 
-    def refresh_task_display(self):
-        # Destroy all existing widgets in the tasks frame
-        for widget in self.tasks_frame.winfo_children():
-            widget.destroy()
+    def add_tasks(self, texts):
+        """Adds one task per text at the end of the list, as a single change."""
+        tasks = [new_task(text) for text in texts]
+        self.model.insert_many(len(self.model), tasks)
+        index = self.task_list.index_of(self.model[-1])
+        if index is not None:
+            self.task_list.see(index)
+
+    def on_paste(self, event):
+        # Pasting several lines creates one task per line; a single line pastes as usual
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            return None
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if len(lines) < 2:
+            return None
+        self.add_tasks(lines)
+        return "break"
+
+    def schedule_filter(self):
+        # Coalesce fast typing into one search per idle moment
+        if self._filter_timer is None:
+            self._filter_timer = self.root.after_idle(self.apply_filter)
+
+    def apply_filter(self):
+        """Narrows the list to the tasks matching the filter box."""
+        self._filter_timer = None
+        query = Query(self.filter_var.get())
+        if not query:
+            self.query = query
+            self.task_list.set_filter(None, None)
+            return
+        # While typing, the new query usually narrows the one already shown
+        # (once all of it has been found)
+        within = None
+        if self.query and query.narrows(self.query) and self.task_list.scan is None:
+            within = self.task_list.visible
+        self.query = query
+        if self.search_index.broad(query, within):
+            # Most of the list is a candidate: show the first matches now, the rest as they are found
+            tasks = self.task_list.unfiltered if within is None else within
+            self.task_list.scan_filter(self.search_index.scan(query, tasks), query.matches)
+        else:
+            self.task_list.set_filter(self.search_index.search(query, within), query.matches)
+
+    def show_view(self):
+        """
+        Shows the list the way the "view" setting asks for. The list's
+        TaskViews keeps every view's buckets up to date, so nothing is
+        sorted here; the filter box is applied to the view from scratch.
+        """
+        self.shown_view = self.settings["view"]
+        self.view_var.set(VIEWS.get(self.shown_view, VIEWS["manual"]))
+        self.task_list.set_view(self.session.views.view(self.shown_view))
+        self.query = Query("")
+        self.apply_filter()
+
+    def set_view(self, name):
+        self.settings["view"] = name
+        self.save_settings()
+        self.show_view()
 
-        # Recreate checkboxes for all current tasks
-        for index, task in enumerate(self.tasks):
-            self.create_task_checkbox(task, index)
+    def clear_filter(self):
+        self.filter_var.set("")
+
+    def refresh_task_display(self):
+        # Pick up edits made to the files outside the app, then rebind the
+        # visible rows; off-screen tasks have no widgets to rebuild
+        if self.loader is None and not self.autosaver.busy():
+            self.check_disk()
+        self.task_list.refresh()
 
     def remove_task(self):
-        # Filter out completed tasks
-        self.tasks = [task for task in self.tasks if not task["completed"]]
-        self.refresh_task_display()
+        # Move completed tasks to the archive; only their rows are destroyed.
+        # The session writes them to the archive, and undo takes them back out
+        self.model.remove_completed(source="archive")
+
+    def open_archive(self):
+        from archive_window import ArchiveWindow  # Imported on first use, not at startup
+        ArchiveWindow(self.root, self.archive, self.theme_colors, self.restore_tasks)
+
+    def restore_tasks(self, tasks):
+        """Adds archived tasks back at the end of the list, under new ids but as old as they were."""
+        restored = [{key: value for key, value in task.items()
+                     if key not in ("id", "order", "archived_at")} for task in tasks]
+        self.model.insert_many(len(self.model), restored)
 
     def create_widgets(self):
-        # Get theme colors and font
-        font_config = (self.settings["font_family"], self.settings["font_size"])
-        
+        # Widgets share the theme's named font and are registered with their
+        # palette roles, so a theme change restyles them in place
+        theme = self.theme
+
+        # List switcher: every list with its task count, and a way to start a new one
+        list_frame = theme.register(tk.Frame(self.root), bg="bg")
+        list_frame.pack(pady=(10, 0), fill=tk.X)
+        list_label = theme.register(tk.Label(list_frame, text="List:", font=theme.font),
+                                    bg="bg", fg="fg")
+        list_label.pack(side=tk.LEFT, padx=5)
+        self.list_var = tk.StringVar()
+        self.list_menu = theme.register(tk.OptionMenu(list_frame, self.list_var, ""),
+                                        bg="button_bg", fg="fg", activebackground="select_bg")
+        self.list_menu.configure(font=theme.font, highlightthickness=0)
+        self.list_menu["menu"].configure(postcommand=self.update_list_menu)
+        self.list_menu.pack(side=tk.LEFT)
+        new_list_button = theme.register(tk.Button(list_frame, text="New list…",
+                                                   command=self.new_list, font=theme.font),
+                                         bg="button_bg", fg="fg")
+        new_list_button.pack(side=tk.LEFT, padx=5)
+
+        # View picker: manual order, grouped by priority or status, or by creation time
+        self.view_var = tk.StringVar()
+        view_menu = theme.register(tk.OptionMenu(list_frame, self.view_var, ""),
+                                   bg="button_bg", fg="fg", activebackground="select_bg")
+        view_menu.configure(font=theme.font, highlightthickness=0)
+        view_menu["menu"].delete(0, tk.END)
+        for name, label in VIEWS.items():
+            view_menu["menu"].add_command(label=label, command=lambda name=name: self.set_view(name))
+        view_menu.pack(side=tk.RIGHT, padx=5)
+        view_label = theme.register(tk.Label(list_frame, text="View:", font=theme.font),
+                                    bg="bg", fg="fg")
+        view_label.pack(side=tk.RIGHT)
+
         # Frame for task input elements
-        input_frame = tk.Frame(self.root, bg=self.theme_colors["bg"])
+        input_frame = theme.register(tk.Frame(self.root), bg="bg")
         input_frame.pack(pady=10, fill=tk.X)
 
-        self.task_entry = tk.Entry(input_frame, width=40, 
-                                   bg=self.theme_colors["entry_bg"], 
-                                   fg=self.theme_colors["fg"],
-                                   font=font_config,
-                                   insertbackground=self.theme_colors["fg"])
+        self.task_entry = theme.register(tk.Entry(input_frame, width=40, font=theme.font),
+                                         bg="entry_bg", fg="fg", insertbackground="fg")
         self.task_entry.pack(side=tk.LEFT, padx=5, fill=tk.BOTH, expand=True)
         self.task_entry.bind("<Return>", self.on_enter_pressed)  # Bind Enter key to add_task
+        self.task_entry.bind("<<Paste>>", self.on_paste)  # Multi-line paste adds many tasks
+
+        # Filter box: words match anywhere in the text, plus priority:high / is:done tokens
+        self.filter_entry = theme.register(tk.Entry(input_frame, width=20,
+                                                    textvariable=self.filter_var,
+                                                    font=theme.font),
+                                           bg="entry_bg", fg="fg", insertbackground="fg")
+        self.filter_entry.pack(side=tk.RIGHT, padx=5)
+        self.filter_entry.bind("<Escape>", lambda e: self.clear_filter())
+        filter_label = theme.register(tk.Label(input_frame, text="Filter:", font=theme.font),
+                                      bg="bg", fg="fg")
+        filter_label.pack(side=tk.RIGHT)
         self.root.bind("<Delete>", self.on_delete_pressed)     # Bind Delete key to remove_task
-
-        # Frame to hold the individual task checkboxes
-        self.tasks_frame = tk.Frame(self.root, bg=self.theme_colors["bg"])
-        self.tasks_frame.pack(pady=10, fill=tk.BOTH, expand=True)
+        self.root.bind("<Alt-Up>", lambda e: self.move_current_task(-1))    # Move last clicked task up
+        self.root.bind("<Alt-Down>", lambda e: self.move_current_task(1))   # ... or down
+        self.root.bind("<Control-a>", self.on_select_all_pressed)    # Select every shown task
+        self.root.bind("<Escape>", self.on_escape_pressed)           # Clear the selection
+        self.root.bind("<Control-z>", self.on_undo_pressed)          # Undo the last action
+        self.root.bind("<Control-y>", self.on_redo_pressed)          # ... and redo it
+        self.root.bind("<Control-Shift-Z>", self.on_redo_pressed)
+
+        # Virtualized list that only keeps the visible task rows as widgets
+        self.task_list = TaskListView(self.root, self)
+        self.task_list.pack(pady=10, fill=tk.BOTH, expand=True)
 
         # Frame for action buttons (remove, refresh, save)
-        button_frame = tk.Frame(self.root, bg=self.theme_colors["bg"])
+        button_frame = theme.register(tk.Frame(self.root), bg="bg")
         button_frame.pack(pady=5, fill=tk.X)
 
-        add_button = tk.Button(input_frame, text="Add Task", command=self.add_task,
-                              bg=self.theme_colors["button_bg"], 
-                              fg=self.theme_colors["fg"],
-                              font=font_config) 
+        add_button = theme.register(tk.Button(input_frame, text="Add Task", command=self.add_task,
+                                              font=theme.font),
+                                    bg="button_bg", fg="fg")
         add_button.pack(side=tk.LEFT)
 
         # Settings button on the left side
-        settings_button = tk.Button(button_frame, text="⚙ Settings", command=self.open_settings,
-                                   bg=self.theme_colors["button_bg"], 
-                                   fg=self.theme_colors["fg"],
-                                   font=font_config)
+        settings_button = theme.register(tk.Button(button_frame, text="⚙ Settings",
+                                                   command=self.open_settings, font=theme.font),
+                                         bg="button_bg", fg="fg")
         settings_button.pack(side=tk.LEFT, padx=5)
 
-        remove_button = tk.Button(button_frame, text="Remove Task/s", command=self.remove_task,
-                                 bg=self.theme_colors["button_bg"], 
-                                 fg=self.theme_colors["fg"],
-                                 font=font_config)
+        remove_button = theme.register(tk.Button(button_frame, text="Remove Task/s",
+                                                 command=self.remove_task, font=theme.font),
+                                       bg="button_bg", fg="fg")
         remove_button.pack(side=tk.LEFT, padx=5)
 
-        refresh_button = tk.Button(button_frame, text="Refresh Tasks", command=self.refresh_task_display,
-                                  bg=self.theme_colors["button_bg"], 
-                                  fg=self.theme_colors["fg"],
-                                  font=font_config)
+        archive_button = theme.register(tk.Button(button_frame, text="Archive…",
+                                                  command=self.open_archive, font=theme.font),
+                                        bg="button_bg", fg="fg")
+        archive_button.pack(side=tk.LEFT, padx=5)
+
+        refresh_button = theme.register(tk.Button(button_frame, text="Refresh Tasks",
+                                                  command=self.refresh_task_display, font=theme.font),
+                                        bg="button_bg", fg="fg")
         refresh_button.pack(side=tk.LEFT, padx=5)
 
-        save_button = tk.Button(button_frame, text="Save Tasks", command=self.save_tasks,
-                               bg=self.theme_colors["button_bg"], 
-                               fg=self.theme_colors["fg"],
-                               font=font_config)
+        save_button = theme.register(tk.Button(button_frame, text="Save Tasks",
+                                               command=self.save_tasks, font=theme.font),
+                                     bg="button_bg", fg="fg")
         save_button.pack(side=tk.LEFT, padx=5)
 
+        # Autosave status, updated from Autosaver via set_save_status
+        self.status_label = theme.register(tk.Label(button_frame, text="All changes saved",
+                                                    font=theme.font),
+                                           bg="bg", fg="fg")
+        self.status_label.pack(side=tk.RIGHT, padx=5)
+
+        # Number of selected tasks, empty when nothing is selected
+        self.selection_label = theme.register(tk.Label(button_frame, text="", font=theme.font),
+                                              bg="bg", fg="fg")
+        self.selection_label.pack(side=tk.RIGHT, padx=5)
+
+        # Progress of a progressive load, empty once everything is in
+        self.progress_label = theme.register(tk.Label(button_frame, text="", font=theme.font),
+                                             bg="bg", fg="fg")
+        self.progress_label.pack(side=tk.RIGHT, padx=5)
+
     def on_drag_start(self, event, index):
-        self._drag_start_index = index
+        self.set_current_task(self.task_list.task_at(index))
+        # In a sorted or grouped view the rows' places aren't the manual order
+        if self.task_list.reorderable:
+            self.task_list.drag.start(index)
 
     def on_drag_stop(self, event):
-        if not hasattr(self, "_drag_start_index"):
+        # The drag tracked the task and the pointer, so the drop target is plain arithmetic
+        drop = self.task_list.drag.stop(event)
+        if drop is None:
             return
 
-        self.tasks_frame.update_idletasks()  # Ensure all widgets are updated for accurate positioning
-
-        y = event.y_root  # Y-coordinate of the mouse release relative to the screen
-        children = list(self.tasks_frame.winfo_children())  # Get all task rows
-        target_index = len(children) - 1  # Default target to last position
-        for i, w in enumerate(children):
-            top = w.winfo_rooty()    # Absolute top Y-coordinate of the widget
-            bottom = top + w.winfo_height()  # Absolute bottom Y-coordinate of the widget
-            if y < bottom:
-                target_index = i  # Found the target index if mouse is above the bottom of this widget
-                break
-
-        src = self._drag_start_index
-        if 0 <= src < len(self.tasks) and target_index != src:
-            task = self.tasks.pop(src)  # Remove task from its original position
-            self.tasks.insert(target_index, task)  # Insert task at the new position
-            self.refresh_task_display()  # Refresh the UI to reflect the new order
-
-        del self._drag_start_index  # Clean up the stored index
-
-    def create_task_checkbox(self, task, index):
-        bg = self.priority_color(task)  # Get background color based on task priority
-        font_config = (self.settings["font_family"], self.settings["font_size"])
-        
-        # Determine text color based on theme
-        text_color = self.theme_colors["fg"]
-
-        # Frame for the individual task row, colored by priority
-        row = tk.Frame(self.tasks_frame, bg=bg)
-        row.pack(fill=tk.X, padx=8, pady=2)
-
-        # Drag handle (for reordering tasks)
-        drag_handle = tk.Label(row, text="☰", bg=bg, fg=text_color, width=2, cursor="fleur")
-        drag_handle.pack(side=tk.LEFT, padx=(0, 2), anchor="center")
-        # Bind drag-and-drop to the drag handle
-        drag_handle.bind("<Button-1>", lambda e, i=index: self.on_drag_start(e, i))
-        drag_handle.bind("<ButtonRelease-1>", lambda e: self.on_drag_stop(e))
-
-        # Colored box for priority indication
-        priority_box = tk.Label(row, bg=bg, width=2, relief="ridge") 
-        priority_box.pack(side=tk.LEFT, padx=(0, 5), anchor="center")
-        # Bind left-click to show priority selection menu
-        priority_box.bind("<Button-1>", lambda e, i=index: self.show_priority_menu(e, i))
-
-        var = tk.BooleanVar(value=task["completed"])  # Boolean variable for checkbox state
-        checkbox = tk.Checkbutton(
-            row,
-            text=task["text"], 
-            variable=var,
-            command=lambda: self.toggle_task(index),  # Command to toggle task completion
-            bg=bg,
-            fg=text_color,
-            activebackground=bg,
-            activeforeground=text_color,
-            selectcolor=bg,
-            highlightthickness=0,
-            bd=0,
-            anchor="w",
-            font=font_config
-        )
-        checkbox.pack(fill=tk.X, anchor="w")
+        src, target_index = drop
+        if target_index == src:
+            return
+        if self.acts_on_selection(self.task_list.task_at(src)):
+            # Dragging a selected row moves the whole selection as one block,
+            # below the target row when moving down, above it when moving up
+            slot = target_index + 1 if target_index > src else target_index
+            dest = (self.task_list.model_index(slot) if slot < len(self.task_list.items)
+                    else len(self.model))
+            self.model.move_many(self.selected_indices(), dest)
+        else:
+            # Rows may be a filtered subset; the task lands where the target task is
+            self.model.move(self.task_list.model_index(src),
+                            self.task_list.model_index(target_index))  # Only the moved row and its neighbours shift
 
     def toggle_task(self, index):
-        self.tasks[index]["completed"] = not self.tasks[index]["completed"]
+        task = self.task_list.task_at(index)
+        self.set_current_task(task)
+        if self.acts_on_selection(task):
+            # Every selected task follows the clicked one, in one change
+            self.model.update_many(self.selected_indices(), completed=not task["completed"])
+        else:
+            self.model.toggle(self.task_list.model_index(index))
+
+    def set_current_task(self, task):
+        previous, self.current_task = self.current_task, task
+        for changed in (previous, task):
+            if changed is not None and changed["id"] in self.model.by_id:
+                index = self.task_list.index_of(changed)
+                if index is not None:
+                    self.task_list.repaint(index)
+
+    def move_current_task(self, step):
+        task = self.current_task
+        if task is None or task["id"] not in self.model.by_id or not self.task_list.reorderable:
+            return
+        index = self.task_list.index_of(task)
+        if index is None:
+            return
+        target = index + step
+        if 0 <= target < len(self.task_list.items):
+            # Swap places with the neighbouring row, even if the filter hides tasks between
+            self.model.move(self.task_list.model_index(index),
+                            self.task_list.model_index(target))  # Rewrites one order key
+            self.task_list.see(target)
 
     def on_enter_pressed(self, event):
         self.add_task()
 
     def on_delete_pressed(self, event):
-        self.remove_task()
+        if isinstance(event.widget, tk.Entry):
+            return  # Deleting text in an entry, not tasks
+        if len(self.selection):
+            self.delete_selected()
+        else:
+            self.remove_task()
+
+    def on_select_all_pressed(self, event):
+        if not isinstance(event.widget, tk.Entry):
+            self.select_all()
+
+    def on_escape_pressed(self, event):
+        if not isinstance(event.widget, tk.Entry):
+            self.clear_selection()
+
+    def on_undo_pressed(self, event):
+        if not isinstance(event.widget, tk.Entry):
+            self.undo()
+
+    def on_redo_pressed(self, event):
+        if not isinstance(event.widget, tk.Entry):
+            self.redo()
+
+    def undo(self):
+        # Only the rows the reverted action touched are repainted
+        self.history.undo()
+
+    def redo(self):
+        self.history.redo()
+
+    # Selection and bulk actions; each bulk action is one model change set,
+    # so the list repaints once and autosave writes it in one go
+
+    def select_task(self, index):
+        """Ctrl-click: adds the row's task to the selection, or removes it."""
+        self.selection.toggle(self.task_list.task_at(index))
+        self.on_selection_changed()
+
+    def select_range(self, index):
+        """Shift-click: selects every row between the anchor and this one."""
+        anchor = self.selection.anchor
+        start = self.task_list.index_of(anchor) if anchor is not None and anchor in self.selection else None
+        if start is None:
+            self.select_task(index)
+            return
+        items = self.task_list.items
+        low, high = min(start, index), max(start, index)
+        self.selection.add(items[i] for i in range(low, high + 1))
+        self.on_selection_changed()
+
+    def select_all(self):
+        """Selects every task on display, i.e. everything the filter matches."""
+        self.task_list.finish_scan()
+        self.selection.replace(self.task_list.items)
+        self.on_selection_changed()
+
+    def clear_selection(self):
+        if len(self.selection):
+            self.selection.clear()
+            self.on_selection_changed()
+
+    def on_selection_changed(self):
+        self.task_list.repaint_rows()
+        self.update_selection_status()
+
+    def update_selection_status(self):
+        count = len(self.selection)
+        self.selection_label.configure(text=f"{count:,} selected" if count else "")
+
+    def acts_on_selection(self, task):
+        """True if an action on this task's row should apply to the whole selection."""
+        return task in self.selection and len(self.selection) > 1
+
+    def selected_indices(self):
+        """Model indexes of the selected tasks."""
+        return [self.model.index_of(self.model.get(task_id)) for task_id in self.selection.ids]
+
+    def set_selected(self, **fields):
+        self.model.update_many(self.selected_indices(), **fields)
+
+    def delete_selected(self):
+        self.model.remove_many(self.selected_indices())
+
+    def archive_selected(self):
+        self.model.remove_many(self.selected_indices(), source="archive")
+
+    def move_selected(self, to_end):
+        self.model.move_many(self.selected_indices(), len(self.model) if to_end else 0)
+
+    def show_row_menu(self, event, index):
+        task = self.task_list.task_at(index)
+        if task not in self.selection:
+            # Right-clicking outside the selection acts on that row alone
+            self.selection.replace([task], anchor=task)
+            self.on_selection_changed()
+        count = len(self.selection)
+        label = f"{count:,} tasks" if count > 1 else "task"
+
+        menu = tk.Menu(self.root, tearoff=0)
+        menu.add_command(label=f"Complete {label}", command=lambda: self.set_selected(completed=True))
+        menu.add_command(label=f"Uncomplete {label}", command=lambda: self.set_selected(completed=False))
+        priority_menu = tk.Menu(menu, tearoff=0)
+        for p in ["normal", "medium", "high"]:
+            priority_menu.add_command(label=p.capitalize(), background=self.priority_color({"priority": p}),
+                                      command=lambda priority=p: self.set_selected(priority=priority))
+        menu.add_cascade(label="Set priority", menu=priority_menu)
+        menu.add_command(label="Set due date…", command=lambda: self.ask_time("due", "Due date"))
+        menu.add_command(label="Remind me…", command=lambda: self.ask_time("remind_at", "Reminder"))
+        menu.add_command(label="Move to top", command=lambda: self.move_selected(to_end=False))
+        menu.add_command(label="Move to bottom", command=lambda: self.move_selected(to_end=True))
+        other_lists = [list_id for list_id in self.manifest if list_id != self.session.id]
+        if other_lists:
+            list_menu = tk.Menu(menu, tearoff=0)
+            for list_id in other_lists:
+                list_menu.add_command(label=self.manifest[list_id]["name"],
+                                      command=lambda list_id=list_id: self.move_selected_to_list(list_id))
+            menu.add_cascade(label="Move to list", menu=list_menu)
+        menu.add_command(label=f"Archive {label}", command=self.archive_selected)
+        menu.add_command(label=f"Delete {label}", command=self.delete_selected)
+        menu.add_separator()
+        menu.add_command(label="Select all shown", command=self.select_all)
+        menu.add_command(label="Clear selection", command=self.clear_selection)
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
 
     def show_priority_menu(self, event, index):
+        # The row may be rebound to another task (scrolling, a change from
+        # disk) before an item is picked, so the menu holds on to the task
+        task = self.task_list.task_at(index)
+        self.set_current_task(task)
         menu = tk.Menu(self.root, tearoff=0)  # Create a new menu without the tear-off feature
         priorities = ["normal", "medium", "high"]
         for p in priorities:
             color = self.priority_color({"priority": p})  # Get the color for the current priority
             menu.add_command(label=p.capitalize(), background=color, 
-                             command=lambda priority=p: self.update_task_priority(index, priority))
+                             command=lambda priority=p: self.update_task_priority(task, priority))
         
         try:
             menu.tk_popup(event.x_root, event.y_root)  # Display the menu at the cursor's absolute screen position
@@ -290,22 +895,31 @@ class TodoApp:
             menu.grab_release() 
 
     def open_settings(self):
+        from settings_window import SettingsWindow  # Imported on first use, not at startup
         SettingsWindow(self.root, self.settings, self.theme_colors, self.on_settings_applied)
 
     def on_settings_applied(self, new_settings):
         self.settings.update(new_settings)
         self.save_settings()
-        self.apply_theme()
-        
-        # Recreate all widgets with new theme
-        for widget in self.root.winfo_children():
-            widget.destroy()
-        
-        self.create_widgets()
-        self.refresh_task_display()
-
-    def update_task_priority(self, index, new_priority):
-        self.tasks[index]["priority"] = new_priority
-        self.save_tasks() 
-        self.refresh_task_display()
+        self.apply_settings()
+
+    def apply_settings(self):
+        font_changed = self.apply_theme()
+        for session in self.lists:
+            session.autosaver.delay_ms = self.settings["autosave_delay_ms"]
+
+        # Existing widgets were restyled in place, so tasks, scroll position
+        # and entry contents are untouched; only the visible rows repaint
+        self.task_list.restyle(font_changed)
+        if self.settings["view"] != self.shown_view:
+            self.show_view()  # Changed in the settings file
+
+    def update_task_priority(self, task, new_priority):
+        if self.model.get(task["id"]) is not task:
+            return  # Removed, or another list shown, while the menu was open
+        if self.acts_on_selection(task):
+            self.set_selected(priority=new_priority)  # One change for the whole selection
+            return
+        # Recolors a single row; autosave persists it
+        self.model.set_priority(self.model.index_of(task), new_priority)
 
@@ -0,0 +1,137 @@
+from collections import deque
+
+from task_model import Change
+
+# Source of an action that can be undone -> source its undo is applied with.
+# Undoing an archive brings the tasks back out of the archive, and redoing
+# that puts them back in, so those keep saying what happened to the archive
+UNDONE_AS = {"user": "undo", "archive": "unarchive"}
+REDONE_AS = {"undo": "undo", "unarchive": "rearchive", "rearchive": "unarchive"}
+
+
+def invert(changes):
+    """
+    Changes that take the list back to where it was before `changes` ran,
+    as (kind, task, fields, old) tuples, last change first.
+
+    Entries reference the task objects themselves rather than copies: a
+    removed task is kept as it was and goes back in under its own id and
+    order key. Key changes are undone as MOVEs, which keep the list sorted
+    after every step; re-keyed neighbours restored in place could
+    otherwise end up out of order around a task that moved back among them.
+    """
+    inverse = []
+    for change in reversed(changes):
+        kind, task = change.kind, change.task
+        if kind == Change.INSERT:
+            inverse.append((Change.REMOVE, task, None, None))
+        elif kind == Change.REMOVE:
+            inverse.append((Change.INSERT, task, None, None))
+        elif kind == Change.MOVE:
+            inverse.append((Change.MOVE, task, change.old, change.fields))
+        elif kind == Change.UPDATE:
+            old = dict(change.old)
+            order = old.pop("order", None)
+            if order is not None:
+                inverse.append((Change.MOVE, task, {"order": order},
+                                {"order": change.fields["order"]}))
+            if old:
+                inverse.append((Change.UPDATE, task, old,
+                                {key: change.fields[key] for key in old}))
+    return inverse
+
+
+class UndoHistory:
+    """
+    Undo/redo for the task model, as a log of invertible change sets.
+
+    Every "user" or "archive" ChangeSet the model announces is stored as
+    its inverse, so a bulk action (removing 30,000 completed tasks, moving a
+    selection) is a single entry, and an entry costs a few references per
+    changed task instead of a copy of the list. Undo applies the inverse
+    through the model with source "undo" ("unarchive" for an archive), so
+    views repaint only the affected rows and the autosaver writes it like
+    any other edit; its own inverse goes onto the redo stack.
+
+    The history is bounded both in entries and in the total number of
+    changes it holds, dropping the oldest entries first. It is cleared when
+    the list is reset or changed on disk by someone else, since the stored
+    changes may no longer apply.
+    """
+
+    def __init__(self, model, limit=100, max_changes=200_000):
+        self.model = model
+        self.limit = limit              # Entries kept on the undo stack
+        self.max_changes = max_changes  # Changes kept across both stacks
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.size = 0  # Changes held by both stacks
+        model.subscribe(self.on_changes)
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def on_changes(self, changes):
+        source = UNDONE_AS.get(changes.source)
+        if source is not None:
+            self._clear(self.redo_stack)
+            self._push(self.undo_stack, (source, invert(changes)))
+            self._evict()
+        elif changes.source == "disk" or any(c.kind == Change.RESET for c in changes):
+            self.clear()
+
+    def undo(self):
+        """Reverts the last action; returns False if there was nothing to undo."""
+        return self._replay(self.undo_stack, self.redo_stack)
+
+    def redo(self):
+        return self._replay(self.redo_stack, self.undo_stack)
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.size = 0
+
+    def _replay(self, stack, target):
+        while stack:
+            source, entry = stack.pop()
+            self.size -= len(entry)
+            changes = self._applicable(entry)
+            if changes:
+                self.model.apply(changes, source=source)
+                self._push(target, (REDONE_AS[source], invert(changes)))
+                self._evict()
+                return True
+            # Everything it touched is gone already, e.g. archived tasks that came back
+        return False
+
+    def _applicable(self, entry):
+        """Fresh Change objects for an entry, skipping the ones that no longer fit."""
+        by_id = self.model.by_id
+        changes = []
+        for kind, task, fields, old in entry:
+            if kind == Change.INSERT:
+                if task["id"] in by_id:
+                    continue
+            elif by_id.get(task["id"]) is not task:
+                continue
+            changes.append(Change(kind, task=task, fields=fields, old=old))
+        return changes
+
+    def _push(self, stack, item):
+        # Items are (source to apply the entry with, entry)
+        if item[1]:
+            stack.append(item)
+            self.size += len(item[1])
+
+    def _clear(self, stack):
+        self.size -= sum(len(entry) for _, entry in stack)
+        stack.clear()
+
+    def _evict(self):
+        while self.undo_stack and (len(self.undo_stack) > self.limit
+                                   or self.size > self.max_changes):
+            self.size -= len(self.undo_stack.popleft()[1])